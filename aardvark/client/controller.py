@@ -14,16 +14,19 @@ __docformat__ = 'reStructuredText'
 
 import os
 import sys
+import time
+import threading
 import configparser
 import collections
 
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
 from PyQt5.QtWidgets import (
     QApplication, QStyleFactory
 )
 from aardvark.client.view import (
     MainView
 )
-from aardvark.client.model import Client
+from aardvark.client.model import AvailabilityCache, Client
 
 
 class MainController:
@@ -38,10 +41,12 @@ class MainController:
         self.app = QApplication(sys.argv)
         self.client = Client(self.getServerSocket())
         self.menu = self.client.requestMenu()
-        self.window = MainView(self.menu, self.client.requestTotalTables())
+        self.menu.setPopularity(self.client.requestPopularity("week"))
+        self.window = MainView(self.menu, self.client.requestFloorPlan())
 
         self.initialiseSettings()
         self.initialiseViewControllers()
+        self.initialiseEventListener()
         self.exit()
 
     def initialiseSettings(self):
@@ -61,7 +66,40 @@ class MainController:
         self.orderViewController = \
             OrderViewController(self.window.tabOrder, self.client)
         self.bookingViewController = \
-            BookingViewController(self.window.tabBook, self.client)
+            BookingViewController(self.window.tabBook, self.client,
+                                  self.client.requestSlots())
+
+    def initialiseEventListener(self):
+        """
+        Listens to the events pushed by the server to keep the views up to
+        date without polling.
+        """
+        self.eventListener = EventListener(self.client)
+        self.eventListener.receivedEvent.connect(
+            self.paymentViewController.handleEvent)
+        self.eventListener.receivedEvent.connect(self.handleEvent)
+        self.eventListener.start()
+
+    def handleEvent(self, type, data):
+        """
+        Event handler that refreshes the state of the table an event is
+        about on the floor plan (or of every table when events were missed),
+        and drops the cached booking availability once a booking is made.
+
+        :param type: The type of the event pushed by the server.
+        :param data: The data of the event.
+        """
+        if type in ("booking-created", "resync"):
+            self.bookingViewController.availability.invalidate()
+
+        if type == "resync":
+            tables = None
+        elif data.get("table") is not None:
+            tables = [data["table"]]
+        else:
+            return
+
+        self.window.tables.setTables(self.client.requestFloorPlan(tables))
 
     def getApplicationStyle(self):
         """
@@ -163,6 +201,11 @@ class OrderViewController:
         self.tableNumber = tableNumber
         self.orderView.displayOrderScreen(self.tableNumber)
 
+        # Reorders the food buttons as the popularity changes during a shift
+        popularity = self.client.requestPopularity("week")
+        if popularity:
+            self.orderView.orderScreen.setPopularity(popularity)
+
     def handleSubmitButtonClick(self):
         """
         Event handler that submits all items in the order items basket to the
@@ -229,25 +272,40 @@ class BookingViewController:
     Controller for the Order View widget.
     """
 
-    def __init__(self, bookingView, client):
+    # The amount of milliseconds a field must stop changing for before it
+    # is acted upon
+    LOOKUP_DELAY = 250
+
+    def __init__(self, bookingView, client, slots=()):
         """
         Constructor that mainly connects buttons to handlers.
 
         :param bookingView: An instantiated BookingView object.
         :param client: The client that deals with the communicating to the
         server.
+        :param slots: The service slots of every weekday, fetched once from
+                      the server (see Client.requestSlots).
         """
         self.bookingView = bookingView
+        self.slots = slots
         self.bookingView.clickedBookingButton.connect(self.handleBookingButtonClick)
+        self.bookingView.clickedFloorPlanTable.connect(self.bookingView.setBookingTable)
 
-        self.bookingView.clickedDateEdit.connect(self.handleDateEditClick)
-        self.dateEditClickedTimes = 0
+        # The available sizes and tables, looked up in the background once
+        # the fields stop changing
+        self.availability = AvailabilityCache(client)
+        self.availabilityLoader = AvailabilityLoader(self.availability)
+        self.availabilityLoader.loaded.connect(self.displayAvailability)
+        self.sizesKey = None
+        self.tablesKey = None
 
-        self.bookingView.clickedTimeField.connect(self.handleTimeFieldClick)
-        self.timeFieldClickedTimes = 0
+        self.dateTimer = self.createDebounceTimer(self.handleDateEditClick)
+        self.lookupTimer = self.createDebounceTimer(self.lookUpAvailability)
+        self.lookupKey = None
 
+        self.bookingView.clickedDateEdit.connect(self.dateTimer.start)
+        self.bookingView.clickedTimeField.connect(self.handleTimeFieldClick)
         self.bookingView.clickedSizeField.connect(self.handleSizeFieldClick)
-        self.sizeFieldClickedTimes = 0
 
 #        self.tableFieldClickedTimes = 0
 #        self.bookingView.clickedTableField.connect(self.handleTableFieldClick)
@@ -290,52 +348,153 @@ class BookingViewController:
             self.bookingView.showInvalidPhonePopup()
         else:
             response = self.client.sendBookingDetails(**bookingDetails)
+            self.availability.invalidate()
+
+            # Only the booking and its conflict are sent in Json, the
+            # refused bookings come with a plain text reason
+            if response.status_code == requests.codes.bad_request:
+                self.bookingView.showBookingErrorPopup(
+                    response.content.decode("utf-8"))
+                return
+            elif response.status_code not in (requests.codes.ok,
+                                              requests.codes.conflict):
+                self.bookingView.showBookingErrorPopup()
+                return
+
             data = json.loads(response.content.decode("utf-8"))
+            if response.status_code == requests.codes.conflict:
+                self.handleBookedTable(bookingSize, data["alternatives"])
+                return
 
             self.bookingView.setBookingStatusText(data["reference"])
             self.bookingView.tableField.clear()
+            self.tablesKey = None
+
+    def handleBookedTable(self, bookingSize, alternatives):
+        """
+        Handles a table that was booked in the meantime by showing the tables
+        still free, and offering the free tables of the size in the table
+        field.
+
+        :param bookingSize: the size booked.
+        :param alternatives: the free table dictionaries sent by the server.
+        """
+        self.bookingView.showBookedTablePopup(alternatives)
+        self.bookingView.tableField.clear()
+        self.bookingView.tableField.addItems(
+            [str(table["number"]) for table in alternatives
+             if str(table["size"]) == bookingSize])
+
+    def createDebounceTimer(self, handler):
+        """
+        Creates a timer that calls a handler once it has not been restarted
+        for LOOKUP_DELAY milliseconds.
+
+        :param handler: The function to be called.
+        :return: The QTimer.
+        """
+        timer = QTimer()
+        timer.setSingleShot(True)
+        timer.setInterval(self.LOOKUP_DELAY)
+        timer.timeout.connect(handler)
+        return timer
 
     def handleDateEditClick(self):
         """
-        Event handler for clicking on the date widget.
-        Sets the size time widget to enabled to allow entering of input
-        and fetches data for that field form the server.
+        Event handler for changing the date widget (once it stops changing).
+        Fills the time widget with the slots of the weekday of the date and
+        enables it, and resets the size and table fields.
         """
-        # Fixed unchanging times, or so it is assumed
-        TIMES = ["09:00", "11:00", "13:00", "15:00"]
+        weekday = self.bookingView.dateField.date().dayOfWeek() - 1
+        times = [slot["time"] for slot in
+                 (self.slots[weekday] if weekday < len(self.slots) else ())]
         self.bookingView.timeField.clear()
-        self.bookingView.timeField.addItems(TIMES)
+        self.bookingView.timeField.addItems(times)
         self.bookingView.timeField.setDisabled(False)
 
+        self.sizesKey = None
+        self.tablesKey = None
+        self.bookingView.sizeField.setDisabled(True)
+        self.bookingView.sizeField.clear()
+        self.bookingView.tableField.setDisabled(True)
+        self.bookingView.tableField.clear()
+
     def handleTimeFieldClick(self):
         """
         Event handler for clicking on the time field widget.
-        Sets the size field widget to enabled to allow entering of input
-        and fetches data for that field from the server.
+        Looks up the available sizes for the field, unless the same time was
+        reselected.
         """
-        date = self.bookingView.getBookingDate()
-        time = self.bookingView.getBookingTime()
-        sizes = self.client.requestAvailableSizes(date, time)
-        self.bookingView.sizeField.clear()
-        self.bookingView.sizeField.addItems(sizes)
-        self.bookingView.sizeField.setDisabled(False)
+        key = (self.bookingView.getBookingDate(),
+               self.bookingView.getBookingTime(), None)
+        if key == self.sizesKey:
+            return
 
+        self.sizesKey = key
+        self.tablesKey = None
+        self.bookingView.sizeField.setDisabled(True)
+        self.bookingView.sizeField.clear()
         self.bookingView.tableField.setDisabled(True)
         self.bookingView.tableField.clear()
+        self.scheduleLookup(key)
 
     def handleSizeFieldClick(self):
         """
         Event handler for clicking on the size field widget.
-        Sets the time field widget to enabled to allow entering of input
-        and fetches data for that field from the server.
+        Looks up the available tables for the field, unless the same size
+        was reselected.
         """
-        date = self.bookingView.getBookingDate()
-        time = self.bookingView.getBookingTime()
-        size = self.bookingView.getBookingSize()
-        tables = self.client.requestAvailableTables(date, time, size)
+        key = (self.bookingView.getBookingDate(),
+               self.bookingView.getBookingTime(),
+               self.bookingView.getBookingSize())
+        if key == self.tablesKey:
+            return
+
+        self.tablesKey = key
+        self.bookingView.tableField.setDisabled(True)
         self.bookingView.tableField.clear()
-        self.bookingView.tableField.addItems(tables)
-        self.bookingView.tableField.setDisabled(False)
+        self.scheduleLookup(key)
+
+    def scheduleLookup(self, key):
+        """
+        Looks up the availability of a key once the fields stop changing,
+        replacing the lookup scheduled before.
+
+        :param key: The <date, time, size> tuple to be looked up (the size
+                    being None for the available sizes).
+        """
+        self.lookupKey = key
+        self.lookupTimer.start()
+
+    def lookUpAvailability(self):
+        """
+        Displays the availability of the scheduled key straight away if it
+        is cached, or loads it in the background otherwise.
+        """
+        values = self.availability.get(*self.lookupKey)
+        if values is not None:
+            self.displayAvailability(self.lookupKey, values)
+        else:
+            self.availabilityLoader.load(self.lookupKey)
+
+    def displayAvailability(self, key, values):
+        """
+        Fills the size or table field with the availability of a key,
+        unless the fields changed since it was looked up.
+
+        :param key: The <date, time, size> tuple looked up.
+        :param values: The list of the available sizes or tables.
+        """
+        if key[2] is None and key == self.sizesKey:
+            field = self.bookingView.sizeField
+        elif key == self.tablesKey:
+            field = self.bookingView.tableField
+        else:
+            return
+
+        field.clear()
+        field.addItems(values)
+        field.setDisabled(False)
 
     def _validateEmail(self):
         """
@@ -397,6 +556,7 @@ class PaymentViewController:
         self.paymentView.paymentScreen.clickedPayButton.connect(self.handlePayButtonClick)
         self.paymentView.paymentScreen.clickedPrintButton.connect(self.handlePrintButtonClick)
         self.client = client
+        self.tableNumber = None
 
     def handlePrintButtonClick(self):
         print("You've clicked the print button")
@@ -436,13 +596,35 @@ class PaymentViewController:
 
         :param tableNumber: The number of the table.
         """
-        fieldFormat = "{:.2f}"
-
         self.tableNumber = tableNumber
         self.paymentView.displayPaymentScreen(self.tableNumber)
+        self.refreshBill()
+
+    def handleEvent(self, type, data):
+        """
+        Event handler that refreshes the displayed bill when an order is
+        created or a bill is settled for its table (or when events were
+        missed).
+
+        :param type: The type of the event pushed by the server.
+        :param data: The data of the event.
+        """
+        isDisplayed = (self.paymentView.currentWidget() ==
+                       self.paymentView.paymentScreen)
+
+        if isDisplayed and (type == "resync" or
+                            data.get("table") == self.tableNumber):
+            self.refreshBill()
+
+    def refreshBill(self):
+        """
+        Fetches the total bill of the selected table from the server and
+        displays it along with the change.
+        """
+        fieldFormat = "{:.2f}"
 
         # Fetches the total bill from the server and then displays it
-        total = float(self.client.requestTotalBill(tableNumber))
+        total = float(self.client.requestTotalBill(self.tableNumber))
         totalFormatted = fieldFormat.format(total)
         self.paymentView.paymentScreen.setTotalFieldValue(totalFormatted)
 
@@ -453,6 +635,93 @@ class PaymentViewController:
         self.paymentView.paymentScreen.setChangeFieldValue(changeFormatted)
 
 
+class EventListener(QObject):
+    """
+    Listens to the events pushed by the server in a background thread and
+    re-emits them as a signal, which Qt delivers on the GUI thread.
+
+    The connection is re-established after a delay whenever it drops,
+    without missing the events sent in the meantime.
+    """
+    receivedEvent = pyqtSignal(str, dict)
+
+    # The amount of seconds to wait before reconnecting
+    RECONNECT_DELAY = 5
+
+    def __init__(self, client, types=()):
+        """
+        :param client: An instantiated Client object.
+        :param types: The event types to listen to (all types when empty).
+        """
+        super().__init__()
+        self.client = client
+        self.types = types
+        self.lastEventId = None
+
+        # A daemon thread so that a blocked connection never delays exiting
+        self.thread = threading.Thread(target=self.listen, daemon=True)
+
+    def start(self):
+        """
+        Starts listening in the background.
+        """
+        self.thread.start()
+
+    def listen(self):
+        """
+        Emits every event received, reconnecting whenever the connection
+        drops.
+        """
+        while True:
+            try:
+                events = self.client.streamEvents(self.types, self.lastEventId)
+                for id, type, data in events:
+                    if id is not None:
+                        self.lastEventId = id
+                    self.receivedEvent.emit(type, data)
+            except requests.RequestException:
+                pass
+            time.sleep(self.RECONNECT_DELAY)
+
+
+class AvailabilityLoader(QObject):
+    """
+    Looks up the booking availability in a background thread and emits it as
+    a signal, which Qt delivers on the GUI thread.
+    """
+    loaded = pyqtSignal(tuple, list)
+
+    def __init__(self, availability):
+        """
+        :param availability: The AvailabilityCache to look up.
+        """
+        super().__init__()
+        self.availability = availability
+
+    def load(self, key):
+        """
+        Looks up a key in the background (the cache coalesces the lookups of
+        a key being requested already).
+
+        :param key: The <date, time, size> tuple to be looked up.
+        """
+        thread = threading.Thread(target=self.run, args=(key,), daemon=True)
+        thread.start()
+
+    def run(self, key):
+        """
+        Emits the availability of a key, unless the server can not be
+        reached.
+
+        :param key: The <date, time, size> tuple to be looked up.
+        """
+        try:
+            values = self.availability.lookup(*key)
+        except requests.RequestException:
+            return
+        self.loaded.emit(key, values)
+
+
 def _getRelativePath(*args):
     """
     Gets the relative path to a file.
@@ -7,8 +7,21 @@ order system.
 
 __docformat__ = 'reStructuredText'
 
+import bisect
+import codecs
+import re
 import requests
 import json
+import threading
+import time
+
+from concurrent.futures import Future
+from urllib3.util import make_headers
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 
 class Client:
@@ -17,26 +30,55 @@ class Client:
     server for additional information.
     """
 
-    def __init__(self, serverSocket="127.0.0.1:8000"):
+    # The amount of bytes read at once from streamed responses
+    CHUNK_SIZE = 16384
+
+    def __init__(self, serverSocket="127.0.0.1:8000", session=requests,
+                 isBinary=True):
         """
         Attempts to connect to the http server.
 
         :param serverSocket: The host URL to be communicated to.
+        :param session: The object that sends the http requests (the requests
+                        module by default, or a requests.Session object to
+                        reuse connections).
+        :param isBinary: Whether to ask the server for the MessagePack format
+                         (only if msgpack is installed) rather than Json.
         """
         tableToDir = {"getTables": "/table/total",
+                      "getFloorPlan": "/table/floor",
                       "getMenu": "/menu/get",
                       "sendMenu": "/menu/update",
                       "sendBooking": "/booking/update",
+                      "getSlots": "/booking/slots",
                       "getBookingSizes": "/booking/sizes",
                       "getBookingTables": "/booking/tables",
-                      "submitOrder": "/order/submit",
+                      "submitOrder": "/order/update",
                       "getBill": "/order/bill",
-                      "sendPayment": "/order/payment"}
+                      "sendPayment": "/order/payment",
+                      "getEvents": "/events/stream",
+                      "getPopularity": "/menu/popularity"}
 
         self.tableToURL = {}
         for table, dir in tableToDir.items():
             self.tableToURL[table] = "http://" + serverSocket + dir
 
+        self.session = session
+
+        # The codecs the client understands, in order of preference
+        if isBinary and msgpack is not None:
+            self.codecs = [MSGPACK, JSON]
+        else:
+            self.codecs = [JSON]
+        accept = ", ".join(codec.contentType for codec in self.codecs)
+        self.headers = {"Accept": accept}
+
+        # The compressed encodings urllib3 can decode (gzip and deflate, as
+        # well as brotli when it is installed), responses are decompressed
+        # transparently when their content is read
+        encodings = make_headers(accept_encoding=True)["accept-encoding"]
+        self.headers["Accept-Encoding"] = encodings
+
     def submitOrder(self, orderedItems, tableNum):
         """
         Sends details of the booking to the server.
@@ -54,7 +96,7 @@ class Client:
 
             data["order"].append(order)
 
-        response = requests.post(self.tableToURL["submitOrder"],
+        response = self.session.post(self.tableToURL["submitOrder"],
                                  data=json.dumps(data))
         return response
 
@@ -78,24 +120,24 @@ class Client:
                           "table": table,
                           "size": size}
 
-        response = requests.post(self.tableToURL["sendBooking"],
+        response = self.session.post(self.tableToURL["sendBooking"],
                                  data=json.dumps(bookingDetails))
         return response
 
     def sendMenu(self, menu):
         """
-        Sends the server the menu in Json form.
+        Sends the server the menu in Json form, which upserts its food items
+        by name.
 
         :param: An instantiated menu object.
-        :return: An http response object of the post request.
+        :return: An http response object of the post request (holding the
+                 amount of food items inserted, updated and rejected).
         """
-        JsonMenu = []
+        JsonMenu = [self._convertFoodToJson(food) for food in menu.items]
 
-        for food in menu.items:
-            JsonFood = self._convertFoodToJson(food)
-            JsonMenu.append({"fields": JsonFood})
-
-        response = requests.post(self.tableToURL["sendMenu"], data=JsonMenu)
+        response = self.session.post(self.tableToURL["sendMenu"],
+                                     data=json.dumps({"menu": JsonMenu}),
+                                     headers=self.headers)
         return response
 
     def sendPayment(self, paid, table):
@@ -106,23 +148,49 @@ class Client:
         :return: An http response object of the post request.
         """
         payment = {"paid": paid, "table": table}
-        response = requests.post(self.tableToURL["sendPayment"], payment)
+        response = self.session.post(self.tableToURL["sendPayment"], payment)
         return response
 
-    def requestMenu(self):
+    def requestMenu(self, compact=True):
         """
         Requests the menu from the server.
 
+        The response is streamed and the food objects are built directly
+        from it as it arrives, rather than first decoding the whole menu.
+
+        :param compact: Whether to ask for the compact wire format (food rows
+                        without the model, pk and fields envelope).
         :return: An instantiated Menu object.
         """
-        response = requests.get(self.tableToURL["getMenu"])
+        query = {"format": "compact"} if compact else {}
+        response = self.session.get(self.tableToURL["getMenu"],
+                                    params=query, headers=self.headers,
+                                    stream=True)
+
         if response.status_code == requests.codes.ok:
-            jsonData = json.loads(response.content.decode("utf-8"))
-            parsedData = self._parseJsonMenu(jsonData)
-            return Menu(parsedData)
+            chunks = response.iter_content(chunk_size=self.CHUNK_SIZE)
+            codec = self._getCodec(response)
+            return Menu(self._streamJsonMenu(chunks, codec))
         else:
             return Menu()
 
+    def requestSlots(self):
+        """
+        Requests the service slots of every day of the week from the server.
+
+        :return: A list of the slots of every weekday (Monday first), each
+                 a dictionary of its "time" ("HH:MM") and "duration" (in
+                 minutes), or an empty list.
+        """
+        response = self.session.get(self.tableToURL["getSlots"],
+                                    headers=self.headers)
+
+        if response.status_code == requests.codes.ok:
+            data = self._decodeResponse(response)
+            return data["slots"]
+        else:
+            return []
+
     def requestAvailableTables(self, date, time, size):
         """
         Requests the available tables for booking for a given date, time and
@@ -131,11 +199,11 @@ class Client:
         :return: A list of available tables from the server.
         """
         query = {"date": date, "time": time, "size": size}
-        response = requests.get(self.tableToURL["getBookingTables"],
-                                params=query)
+        response = self.session.get(self.tableToURL["getBookingTables"],
+                                    params=query, headers=self.headers)
 
         if response.status_code  == requests.codes.ok:
-            data = json.loads(response.content.decode("utf-8"))
+            data = self._decodeResponse(response)
             return data["tables"]
         else:
             return []
@@ -148,11 +216,11 @@ class Client:
         :return: A list of available sizes from the server.
         """
         query = {"date": date, "time": time}
-        response = requests.get(self.tableToURL["getBookingSizes"],
-                                params=query)
+        response = self.session.get(self.tableToURL["getBookingSizes"],
+                                    params=query, headers=self.headers)
 
         if response.status_code  == requests.codes.ok:
-            data = json.loads(response.content.decode("utf-8"))
+            data = self._decodeResponse(response)
             return data["sizes"]
         else:
             return []
@@ -163,12 +231,35 @@ class Client:
 
         :return: A list of all the table numbers.
         """
-        response = requests.get(self.tableToURL["getTables"])
+        response = self.session.get(self.tableToURL["getTables"],
+                                    headers=self.headers)
 
         if response.status_code == requests.codes.ok:
-            data = json.loads(response.content.decode("utf-8"))
+            data = self._decodeResponse(response)
             return data["tables"]
 
+    def requestFloorPlan(self, tables=None):
+        """
+        Requests the tables of the floor plan along with their state from the
+        server.
+
+        :param tables: The numbers of the tables to request (for refreshing
+                       their state), or None for all the tables.
+        :return: A list of table dictionaries ("number", "size", "x", "y",
+                 "section", "isOccupied" and "isBooked").
+        """
+        query = {}
+        if tables is not None:
+            query["tables"] = ",".join(str(table) for table in tables)
+        response = self.session.get(self.tableToURL["getFloorPlan"],
+                                    params=query, headers=self.headers)
+
+        if response.status_code == requests.codes.ok:
+            data = self._decodeResponse(response)
+            return data["tables"]
+        else:
+            return []
+
     def requestTotalBill(self, tableNumber):
         """
         Requests the total bill for a given table from the server.
@@ -176,12 +267,84 @@ class Client:
         :return: A list of all the table numbers.
         """
         data = {"table": tableNumber}
-        response = requests.get(self.tableToURL["getBill"], params=data)
+        response = self.session.get(self.tableToURL["getBill"], params=data,
+                                    headers=self.headers)
 
         if response.status_code == requests.codes.ok:
-            data = json.loads(response.content.decode("utf-8"))
+            data = self._decodeResponse(response)
             return data["bill"]
 
+    def requestPopularity(self, window=None):
+        """
+        Requests the amount of times each food item was ordered from the
+        server.
+
+        :param window: The window to count over ("hour", "day" or "week") or
+                       None for all time.
+        :return: A dictionary that maps food name to its popularity.
+        """
+        query = {"window": window} if window else {}
+        response = self.session.get(self.tableToURL["getPopularity"],
+                                    params=query, headers=self.headers)
+
+        if response.status_code == requests.codes.ok:
+            data = self._decodeResponse(response)
+            return data["popularity"]
+        else:
+            return {}
+
+    def streamEvents(self, types=(), lastEventId=None):
+        """
+        Subscribes to the events pushed by the server ("order-created",
+        "bill-settled" and "booking-created", as well as "resync" when events
+        were dropped because the client did not keep up).
+
+        :param types: The event types to receive (all types when empty).
+        :param lastEventId: The id of the last event received, so that the
+                            events missed while disconnected are sent again.
+        :return: A generator of (id, type, data) tuples which blocks until
+                 the next event arrives.
+        """
+        query = {"types": ",".join(types)} if types else {}
+        headers = {"Accept": "text/event-stream"}
+        if lastEventId is not None:
+            headers["Last-Event-ID"] = str(lastEventId)
+
+        response = self.session.get(self.tableToURL["getEvents"],
+                                    params=query, headers=headers,
+                                    stream=True)
+        if response.status_code != requests.codes.ok:
+            return
+
+        try:
+            lines = (line.decode("utf-8") for line in response.iter_lines())
+            for id, type, data in _iterServerSentEvents(lines):
+                yield id, type, json.loads(data)
+        finally:
+            response.close()
+
+    def _getCodec(self, response):
+        """
+        Picks the codec to decode a response with from its content type.
+
+        :param response: A response from the server.
+        :return: The codec matching the content type (Json by default).
+        """
+        contentType = response.headers.get("Content-Type", "")
+        for codec in self.codecs:
+            if codec.contentType in contentType:
+                return codec
+        return JSON
+
+    def _decodeResponse(self, response):
+        """
+        Decodes the body of a response in the format the server sent it in.
+
+        :param response: A response from the server.
+        :return: The decoded data.
+        """
+        return self._getCodec(response).decode(response.content)
+
     def _parseJsonMenu(self, JsonMenu):
         """
         Parses Json input containing data about the menu to a suitable form
@@ -198,6 +361,28 @@ class Client:
 
         return foodList
 
+    def _streamJsonMenu(self, chunks, codec=None):
+        """
+        Parses a menu in Json (or MessagePack) formatting from a stream of
+        bytes, building each Food object as soon as its data has arrived.
+
+        Both the compact format (a list of [name, type, description, price]
+        rows) and Django's serialized format (a list of dictionaries holding
+        the food data under "fields") are understood.
+
+        :param chunks: An iterable of the bytes of the menu.
+        :param codec: The codec the menu is encoded with (Json by default).
+        :return: A generator of Food objects.
+        """
+        attributes = ("name", "type", "description", "price")
+        codec = codec or JSON
+
+        for foodData in codec.iterArray(chunks):
+            if isinstance(foodData, dict):
+                fields = foodData["fields"]
+                foodData = [fields[attribute] for attribute in attributes]
+            yield Food(foodData)
+
     def _parseJsonFood(self, JsonInput):
         """
         Parses Json input containing data about the food to a suitable form
@@ -388,10 +573,36 @@ class Menu:
                           to the menu.
         """
         self.items = MenuSet()
+        self.popularity = {}
 
         if foodItems:
             for food in foodItems:
                 self.items.add(food)
+            self.invalidateIndex()
+
+    @property
+    def items(self):
+        """
+        :return: The food objects of the menu. The search index must be
+                 invalidated once they are changed in place (see
+                 invalidateIndex).
+        """
+        return self._items
+
+    @items.setter
+    def items(self, foodItems):
+        """
+        :param foodItems: The food objects of the menu.
+        """
+        self._items = foodItems
+        self.invalidateIndex()
+
+    def invalidateIndex(self):
+        """
+        Rebuilds the search index upon the next search, for a menu whose
+        items were added, removed or renamed.
+        """
+        self._index = None
 
     def findItem(self, foodName):
         """
@@ -429,6 +640,8 @@ class Menu:
     def categorizeFood(self):
         """
         Separates the food into types (e.g. main course, desserts, etc).
+        When the popularity is known, the most popular food of each type
+        comes first.
 
         :return: A dictionary that maps food type to a food object.
         """
@@ -439,8 +652,36 @@ class Menu:
                 foodType[food.type] = []
             foodType[food.type].append(food)
 
+        if self.popularity:
+            def byPopularity(food):
+                return -self.popularity.get(food.name, 0), food.name
+
+            for foods in foodType.values():
+                foods.sort(key=byPopularity)
+
         return foodType
 
+    def searchItems(self, prefix):
+        """
+        Finds the food whose name, or one of its words, starts with a prefix
+        (e.g. "chi" finds "chips" and "fish and chips").
+
+        :param prefix: The prefix to be searched (case insensitive).
+        :return: A set of the names of the matching food.
+        """
+        if self._index is None:
+            self._index = PrefixIndex(food.name for food in self.items)
+        return self._index.search(prefix)
+
+    def setPopularity(self, popularity):
+        """
+        :param popularity: A dictionary that maps food name to the amount of
+                           times it was ordered.
+        """
+        self.popularity = popularity
+        # The menu is refreshed along with the popularity
+        self.invalidateIndex()
+
     def getFoodTypes(self):
         """
         Gets the food types meant to be on the menu in order.
@@ -450,6 +691,151 @@ class Menu:
         return ["starter", "main course", "dessert", "beverage"]
 
 
+class PrefixIndex:
+    """
+    An index of names that looks up the names starting with a prefix in
+    O(log n + k) time (k being the amount of matches), rather than testing
+    every name.
+
+    Every word of a name is indexed along with the rest of the name, so that
+    a name can also be found by its later words.
+    """
+
+    def __init__(self, names=()):
+        """
+        :param names: An iterable of the names to be indexed.
+        """
+        self.names = set(names)
+        self._keys = []
+
+        for name in self.names:
+            words = name.lower().split()
+            for i in range(len(words)):
+                self._keys.append((" ".join(words[i:]), name))
+        self._keys.sort()
+
+    def __len__(self):
+        """
+        :return: The amount of names indexed.
+        """
+        return len(self.names)
+
+    def search(self, prefix):
+        """
+        :param prefix: The prefix to be searched (case insensitive).
+        :return: A set of the names starting with the prefix (or having a
+                 word that does). All the names if the prefix is empty.
+        """
+        prefix = " ".join(prefix.lower().split())
+        if not prefix:
+            return set(self.names)
+
+        matches = set()
+        i = bisect.bisect_left(self._keys, (prefix,))
+        while i < len(self._keys) and self._keys[i][0].startswith(prefix):
+            matches.add(self._keys[i][1])
+            i += 1
+        return matches
+
+
+class AvailabilityCache:
+    """
+    Caches the available booking sizes and tables for a short time, keyed by
+    (date, time, size), so that reselecting a value of the booking form does
+    not ask the server again.
+
+    Lookups of the same key made while it is being requested (e.g. from
+    several threads) wait for that request rather than sending their own.
+    """
+
+    # The amount of seconds a lookup is cached for
+    TTL = 30
+
+    def __init__(self, client, ttl=TTL, clock=time.monotonic):
+        """
+        :param client: An instantiated Client object.
+        :param ttl: The amount of seconds a lookup is cached for.
+        :param clock: The function giving the current time in seconds.
+        """
+        self.client = client
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = {}
+        self._pending = {}
+        # Drops the lookups that were sent before the last invalidation
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, date, time, size=None):
+        """
+        Gets a lookup without requesting it.
+
+        :param date: The booking date.
+        :param time: The booking time.
+        :param size: The booking size, or None for the available sizes.
+        :return: The cached list of available sizes (or tables of the size),
+                 or None if it is not cached or expired.
+        """
+        with self._lock:
+            entry = self._entries.get((date, time, size))
+            if entry is not None and entry[0] > self.clock():
+                return entry[1]
+        return None
+
+    def lookup(self, date, time, size=None):
+        """
+        Gets a lookup, requesting it from the server unless it is cached or
+        already being requested.
+
+        :param date: The booking date.
+        :param time: The booking time.
+        :param size: The booking size, or None for the available sizes.
+        :return: A list of the available sizes, or of the available tables
+                 of the size.
+        """
+        key = (date, time, size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                return entry[1]
+
+            future = self._pending.get(key)
+            isRequesting = future is None
+            if isRequesting:
+                future = self._pending[key] = Future()
+            generation = self._generation
+
+        if not isRequesting:
+            return future.result()
+
+        try:
+            if size is None:
+                values = self.client.requestAvailableSizes(date, time)
+            else:
+                values = self.client.requestAvailableTables(date, time, size)
+        except Exception as error:
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(error)
+            raise
+
+        with self._lock:
+            del self._pending[key]
+            if generation == self._generation:
+                self._entries[key] = (self.clock() + self.ttl, values)
+        future.set_result(values)
+        return values
+
+    def invalidate(self):
+        """
+        Drops every lookup (e.g. after a booking), including the ones being
+        requested.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+
 class MenuSet(set):
     """
     A simple set class that has the same properties as a set class
@@ -579,3 +965,166 @@ class Food:
         if float(foodPrice) < 0:
             raise ValueError("The food price must be non-negative.")
         self._price = foodPrice
+
+
+# The characters that may follow an element of a Json array
+_JSON_DELIMITERS = {",", "]", " ", "\t", "\n", "\r"}
+
+
+def _iterJsonArray(chunks):
+    """
+    Incrementally decodes a Json array from a stream of bytes.
+
+    :param chunks: An iterable of the bytes of the Json array.
+    :return: A generator of the decoded elements of the array.
+    """
+    decoder = json.JSONDecoder()
+    textDecoder = codecs.getincrementaldecoder("utf-8")()
+    skipWhitespace = re.compile(r"[ \t\n\r]*").match
+    buffer = ""
+    isStarted = False
+
+    for chunk in chunks:
+        buffer += textDecoder.decode(chunk)
+        position = 0
+
+        while True:
+            position = skipWhitespace(buffer, position).end()
+            if position == len(buffer):
+                break
+
+            character = buffer[position]
+            if not isStarted:
+                if character != "[":
+                    raise ValueError("The Json data is not an array.")
+                isStarted = True
+                position += 1
+            elif character == ",":
+                position += 1
+            elif character == "]":
+                return
+            else:
+                try:
+                    element, end = decoder.raw_decode(buffer, position)
+                except ValueError:
+                    # The element is incomplete, wait for more data
+                    break
+
+                # A number (or literal) is only complete once followed by a
+                # delimiter, it may continue in the next chunk (e.g. "1." or
+                # "12e" decode as the number before the dot or exponent)
+                if (not isinstance(element, (dict, list, str))
+                        and buffer[end:end + 1] not in _JSON_DELIMITERS):
+                    break
+
+                yield element
+                position = end
+
+        buffer = buffer[position:]
+
+    raise ValueError("The Json array ended unexpectedly.")
+
+
+def _iterServerSentEvents(lines):
+    """
+    Parses a stream in the server-sent events format.
+
+    :param lines: An iterable of the lines of the stream.
+    :return: A generator of (id, type, data) tuples, the id being None for
+             events sent without one.
+    """
+    id, type, data = None, "message", []
+
+    for line in lines:
+        if not line:
+            if data:
+                yield id, type, "\n".join(data)
+            id, type, data = None, "message", []
+        elif not line.startswith(":"):
+            field, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+
+            if field == "id":
+                id = int(value)
+            elif field == "event":
+                type = value
+            elif field == "data":
+                data.append(value)
+
+
+def _iterMsgPackArray(chunks):
+    """
+    Incrementally decodes a MessagePack array from a stream of bytes.
+
+    :param chunks: An iterable of the bytes of the MessagePack array.
+    :return: A generator of the decoded elements of the array.
+    """
+    unpacker = msgpack.Unpacker(raw=False)
+    remaining = None
+
+    for chunk in chunks:
+        unpacker.feed(chunk)
+        try:
+            if remaining is None:
+                remaining = unpacker.read_array_header()
+            while remaining:
+                element = unpacker.unpack()
+                remaining -= 1
+                yield element
+        except msgpack.OutOfData:
+            # The element is incomplete, wait for more data
+            continue
+        except ValueError:
+            raise ValueError("The MessagePack data is not an array.")
+
+        if remaining == 0:
+            return
+
+    raise ValueError("The MessagePack array ended unexpectedly.")
+
+
+class JsonCodec:
+    """
+    Decodes the data sent by the server in Json formatting.
+    """
+    contentType = "application/json"
+
+    def decode(self, content):
+        """
+        :param content: The bytes of the Json data.
+        :return: The decoded data.
+        """
+        return json.loads(content.decode("utf-8"))
+
+    def iterArray(self, chunks):
+        """
+        :param chunks: An iterable of the bytes of a Json array.
+        :return: A generator of the decoded elements of the array.
+        """
+        return _iterJsonArray(chunks)
+
+
+class MsgPackCodec:
+    """
+    Decodes the data sent by the server in MessagePack formatting (a compact
+    binary format), which requires the msgpack package.
+    """
+    contentType = "application/msgpack"
+
+    def decode(self, content):
+        """
+        :param content: The bytes of the MessagePack data.
+        :return: The decoded data.
+        """
+        return msgpack.unpackb(content, raw=False)
+
+    def iterArray(self, chunks):
+        """
+        :param chunks: An iterable of the bytes of a MessagePack array.
+        :return: A generator of the decoded elements of the array.
+        """
+        return _iterMsgPackArray(chunks)
+
+
+JSON = JsonCodec()
+MSGPACK = MsgPackCodec()
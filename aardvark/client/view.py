@@ -10,20 +10,25 @@ are all then added to a single main widget that is displayed.
 
 __docformat__ = 'reStructuredText'
 
+import hashlib
 import os
 
 from collections import OrderedDict
 
 from PyQt5.QtWidgets import (
-    QWidget, QPushButton, QLabel, QVBoxLayout, QHBoxLayout, QTabWidget,
+    QWidget, QPushButton, QLabel, QVBoxLayout, QHBoxLayout, QGridLayout,
+    QTabWidget,
     QStackedWidget, QMainWindow, QScrollArea, QSizePolicy, QLineEdit, QFrame,
     QDesktopWidget, QFormLayout, QDateEdit, QComboBox,
-    QDialog, QMessageBox)
+    QDialog, QMessageBox, QGraphicsItem, QGraphicsScene, QGraphicsView,
+    QListView)
 from PyQt5.QtGui import (
-    QFont, QPixmap, QIcon
+    QFont, QPixmap, QIcon, QImageReader, QPixmapCache, QColor, QPen,
+    QPainter, QTransform
 )
 from PyQt5.QtCore import (
-    Qt, pyqtSignal, QDate
+    Qt, pyqtSignal, QDate, QEvent, QSize, QStandardPaths, QRectF,
+    QAbstractListModel, QModelIndex, QSortFilterProxyModel
 )
 
 
@@ -38,10 +43,13 @@ class BookingView(QWidget):
     clickedTimeField = pyqtSignal()
     clickedTableField = pyqtSignal()
     clickedSizeField = pyqtSignal()
+    clickedFloorPlanTable = pyqtSignal(int)
 
-    def __init__(self):
+    def __init__(self, floorPlan):
         """
         Constructs the booking tab.
+
+        :param floorPlan: The FloorPlanScene of the restaurant.
         """
         super().__init__()
         mainLayout = QVBoxLayout()
@@ -52,8 +60,8 @@ class BookingView(QWidget):
         self.mainTitleLayout = self.createTitleLayout()
         mainLayout.addLayout(self.mainTitleLayout)
 
-        # Add image
-        self.mainImage = self.createImageLayout()
+        # Add floor plan
+        self.mainImage = self.createFloorPlanLayout(floorPlan)
         mainLayout.addLayout(self.mainImage)
         mainLayout.addSpacing(20)
 
@@ -166,23 +174,21 @@ class BookingView(QWidget):
         layout.addRow("Table: ", self.tableField)
         return layout
 
-    def createImageLayout(self):
+    def createFloorPlanLayout(self, floorPlan):
         """
-        Creates a layout containing an image with a black border
+        Creates a layout containing the floor plan with a black border, on
+        which clicking a table picks it for the booking.
 
-        :return: The layout of the image.
+        :param floorPlan: The FloorPlanScene of the restaurant.
+        :return: The layout of the floor plan.
         """
         layout = QHBoxLayout()
-        imagePath = _getRelativePath('..', '..', 'asset', 'floor_plan.jpg')
-        pixMap = QPixmap(imagePath)
 
-        image = QLabel()
-        image.setAlignment(Qt.AlignCenter)
-        image.setStyleSheet("border: 2px solid black");
-        image.setPixmap(pixMap)
-        image.setFixedSize(600, 400)
-        image.setScaledContents(True)
-        layout.addWidget(image)
+        self.floorPlanView = FloorPlanView(floorPlan)
+        self.floorPlanView.setStyleSheet("border: 2px solid black");
+        self.floorPlanView.setFixedSize(600, 400)
+        self.floorPlanView.clickedTable.connect(self.clickedFloorPlanTable)
+        layout.addWidget(self.floorPlanView)
         return layout
 
     def createTitleLayout(self):
@@ -258,6 +264,34 @@ class BookingView(QWidget):
         text = "What kind of a phone number is that?"
         self._generatePopup(text).show()
 
+    def showBookedTablePopup(self, alternatives):
+        """
+        Displays a message box that notifies the user that the table was
+        booked in the meantime, along with the tables still free.
+
+        :param alternatives: A list of the free table dictionaries ("number"
+                             and "size").
+        """
+        if alternatives:
+            text = ("That table has just been booked. Still free: {}.".format(
+                ", ".join("table {} ({} seats)".format(table["number"],
+                                                        table["size"])
+                          for table in alternatives)))
+        else:
+            text = "That table has just been booked, and no other is free."
+        self._generatePopup(text).show()
+
+    def showBookingErrorPopup(self, message=None):
+        """
+        Displays a message box that notifies the user that the server refused
+        the booking.
+
+        :param message: The reason sent by the server, or None if it sent
+                        none.
+        """
+        text = "The booking could not be made"
+        self._generatePopup(text + (": " + message if message else ".")).show()
+
     def _generatePopup(self, messageText):
         """
         Creates and initializes a standard QMessageBox.
@@ -295,6 +329,17 @@ class BookingView(QWidget):
     def getBookingTable(self):
         return self.tableField.currentText()
 
+    def setBookingTable(self, tableNumber):
+        """
+        Picks a table in the table field, if it is one of the available
+        tables.
+
+        :param tableNumber: The number of the table.
+        """
+        index = self.tableField.findText(str(tableNumber))
+        if index >= 0:
+            self.tableField.setCurrentIndex(index)
+
     def getBookingTime(self):
         return self.timeField.currentText()
 
@@ -307,17 +352,18 @@ class OrderView(QStackedWidget):
     Responsible for displaying the order tab.
     """
 
-    def __init__(self, menu, tables):
+    def __init__(self, menu, tables, floorPlan):
         """
         Constructs the order tab.
+
+        :param menu: An instantiated menu object.
+        :param tables: The TableListModel of the restaurant.
+        :param floorPlan: The FloorPlanScene of the restaurant.
         """
         super().__init__()
         # First widget where all tables are displayed.
-        self.tableScreen = TableScreen(tables)
-        self.tableScroll = QScrollArea()
-        self.tableScroll.setWidget(self.tableScreen)
-        self.tableScroll.setWidgetResizable(True)
-        self.addWidget(self.tableScroll)
+        self.tableScreen = TableScreen(tables, floorPlan)
+        self.addWidget(self.tableScreen)
 
         # Second widget where order information for a particular table
         # is displayed
@@ -325,16 +371,17 @@ class OrderView(QStackedWidget):
         self.orderScroll = QScrollArea()
         self.orderScroll.setWidget(self.orderScreen)
         self.orderScroll.setWidgetResizable(True)
+        self.orderScroll.viewport().installEventFilter(self.orderScreen)
         self.addWidget(self.orderScroll)
 
         # Set the table screen as the default
-        self.setCurrentWidget(self.tableScroll)
+        self.setCurrentWidget(self.tableScreen)
 
     def displayTableScreen(self):
         """
         Sets the current widget to the table screen.
         """
-        self.setCurrentWidget(self.tableScroll)
+        self.setCurrentWidget(self.tableScreen)
 
     def displayOrderScreen(self, tableNumber):
         """
@@ -357,6 +404,11 @@ class OrderScreen(QWidget):
     clickedSubmitButton = pyqtSignal()
     clickedBackButton = pyqtSignal()
 
+    # The width and height of the food buttons, and the space between them,
+    # in pixels
+    FOOD_BUTTON_SIZE = 100
+    FOOD_BUTTON_SPACING = 6
+
     def __init__(self, menu):
         """
         Constructs the order screen which consists of titles of the food
@@ -371,28 +423,41 @@ class OrderScreen(QWidget):
         mainLayout.setAlignment(Qt.AlignCenter)
         self.setLayout(mainLayout)
 
-        # Get the food types and create a title for each type
-        # Then create an entry for each of the foods within the food type
-        foodType = menu.categorizeFood()
+        self.menu = menu
+        self.columns = 1
+        self.matchingFood = None
 
+        # Quick search box that filters the food buttons as the user types
+        self.searchField = QLineEdit()
+        self.searchField.setPlaceholderText("Search the menu...")
+        self.searchField.setClearButtonEnabled(True)
+        self.searchField.textChanged.connect(self.filterFood)
+        mainLayout.addWidget(self.searchField)
+        mainLayout.addSpacing(20)
+
+        # Create a title and a grid of food buttons for each food type
+        self.typeToGrid = OrderedDict()
         for type in menu.getFoodTypes():
-            # Create a title for each food type
             title = self.createTitle(type.title())
             titleLayout = QHBoxLayout()
             titleLayout.setAlignment(Qt.AlignCenter)
             titleLayout.addWidget(title)
             mainLayout.addLayout(titleLayout)
 
-            # Group food buttons in rows
-            rowLayout = QHBoxLayout()
-            for food in foodType[type]:
-                foodButton = self.createFoodButton(food.name)
-                rowLayout.addWidget(foodButton)
-
-            # Add row to main layout
-            mainLayout.addLayout(rowLayout)
+            grid = QGridLayout()
+            grid.setAlignment(Qt.AlignCenter)
+            grid.setSpacing(self.FOOD_BUTTON_SPACING)
+            self.typeToGrid[type] = grid
+            mainLayout.addLayout(grid)
             mainLayout.addSpacing(20)
 
+        # The buttons are created once then only moved around the grids
+        self.foodButtons = {}
+        for food in menu.items:
+            if food.type in self.typeToGrid:
+                self.foodButtons[food.name] = self.createFoodButton(food.name)
+        self.arrangeFoodButtons()
+
         # Ordered items section
         self.orderedItemsTitle = self.createTitle("Ordered Items")
         orderedItemsTitleLayout = QHBoxLayout()
@@ -413,6 +478,81 @@ class OrderScreen(QWidget):
         navigationLayout.addWidget(submitButton)
         mainLayout.addLayout(navigationLayout)
 
+    def arrangeFoodButtons(self):
+        """
+        Lays the food buttons of each type out in rows that wrap at the
+        width of the screen, the most popular food first. The buttons not
+        matching the search are hidden.
+        """
+        foodType = self.menu.categorizeFood()
+
+        for type, grid in self.typeToGrid.items():
+            # Takes the buttons out of the grid without deleting them
+            while grid.count():
+                grid.takeAt(0)
+
+            position = 0
+            for food in foodType.get(type, []):
+                button = self.foodButtons[food.name]
+                if self.matchingFood is None or food.name in self.matchingFood:
+                    row, column = divmod(position, self.columns)
+                    grid.addWidget(button, row, column)
+                    button.show()
+                    position += 1
+                else:
+                    button.hide()
+
+    def setPopularity(self, popularity):
+        """
+        Reorders the food buttons by popularity.
+
+        :param popularity: A dictionary that maps food name to the amount of
+                           times it was ordered.
+        """
+        self.menu.setPopularity(popularity)
+        self.arrangeFoodButtons()
+
+    def filterFood(self, text):
+        """
+        Only shows the food buttons whose name (or one of its words) starts
+        with the searched text.
+
+        :param text: The text in the search box.
+        """
+        if text.strip():
+            self.matchingFood = self.menu.searchItems(text)
+        else:
+            self.matchingFood = None
+        self.arrangeFoodButtons()
+
+    def wrapFoodButtons(self, width):
+        """
+        Wraps the rows of food buttons to a width.
+
+        :param width: The available width in pixels.
+        """
+        width += self.FOOD_BUTTON_SPACING
+        columns = max(1, width // (self.FOOD_BUTTON_SIZE +
+                                   self.FOOD_BUTTON_SPACING))
+        if columns != self.columns:
+            self.columns = columns
+            self.arrangeFoodButtons()
+
+    def eventFilter(self, watched, event):
+        """
+        Wraps the rows of food buttons whenever the widget showing the
+        screen (e.g. the viewport of a scroll area) is resized. The width of
+        the screen itself cannot be used, since it never shrinks below the
+        width of its widest row.
+
+        :param watched: The widget showing the screen.
+        :param event: The event sent to the widget.
+        :return: Whether to stop the event from being handled further.
+        """
+        if event.type() == QEvent.Resize:
+            self.wrapFoodButtons(event.size().width())
+        return super().eventFilter(watched, event)
+
     def displayOrderedItems(self, orderedItems):
         """
         Updates the ordered items section displaying their quantity
@@ -456,7 +596,7 @@ class OrderScreen(QWidget):
         :return: The food button.
         """
         button = QPushButton()
-        button.setFixedSize(100, 100)
+        button.setFixedSize(self.FOOD_BUTTON_SIZE, self.FOOD_BUTTON_SIZE)
         button.setLayout(QVBoxLayout())
 
         label = QLabel(button)
@@ -602,19 +742,17 @@ class PaymentView(QStackedWidget):
     Responsible for displaying the payment tab.
     """
 
-    def __init__(self, tables):
+    def __init__(self, tables, floorPlan):
         """
         Constructs the payment tab.
 
-        :param tables: The total number of tables in the restaurant.
+        :param tables: The TableListModel of the restaurant.
+        :param floorPlan: The FloorPlanScene of the restaurant.
         """
         super().__init__()
         # First widget where all tables are displayed.
-        self.tableScreen = TableScreen(tables)
-        self.tableScroll = QScrollArea()
-        self.tableScroll.setWidget(self.tableScreen)
-        self.tableScroll.setWidgetResizable(True)
-        self.addWidget(self.tableScroll)
+        self.tableScreen = TableScreen(tables, floorPlan)
+        self.addWidget(self.tableScreen)
 
         # Second widget where payment information for a particular
         # table is displayed
@@ -622,13 +760,13 @@ class PaymentView(QStackedWidget):
         self.addWidget(self.paymentScreen)
 
         # Set the table screen as the default
-        self.setCurrentWidget(self.tableScroll)
+        self.setCurrentWidget(self.tableScreen)
 
     def displayTableScreen(self):
         """
         Sets the current widget to the table screen.
         """
-        self.setCurrentWidget(self.tableScroll)
+        self.setCurrentWidget(self.tableScreen)
 
     def displayPaymentScreen(self, tableNumber):
         """
@@ -845,15 +983,24 @@ class InputField:
 
 class TableScreen(QWidget):
     """
-    Screen that displays the payment calculations options.
+    Screen to choose a table from, either on the floor plan or in a list of
+    the tables that can be filtered by section and state.
     """
     clickedTableButton = pyqtSignal(int)
 
-    def __init__(self, tables):
+    # The size of a table in the list
+    LIST_ITEM_SIZE = QSize(90, 60)
+
+    # The amount of tables the list lays out at once
+    LIST_BATCH_SIZE = 100
+
+    def __init__(self, tables, floorPlan):
         """
-        Table Screen that is displayed within the PaymentView widget
+        Table Screen that is displayed within the OrderView and PaymentView
+        widgets.
 
-        :param tables: The total number of tables in the restaurant.
+        :param tables: The TableListModel of the restaurant.
+        :param floorPlan: The FloorPlanScene of the restaurant.
         """
         super().__init__()
         mainLayout = QVBoxLayout()
@@ -862,37 +1009,92 @@ class TableScreen(QWidget):
         # Create title and add it to layout
         title = self.createTitle("Choose Table:")
         mainLayout.addWidget(title)
-        mainLayout.addStretch(1)
 
-        # Calculate total rows required for all buttons
-        tablesPerRow = 5
-        remainder = len(tables) % tablesPerRow
-        totalRows = len(tables) // tablesPerRow
-
-        # Add extra tables to complete row
-        if remainder != 0:
-            totalRows += 1
-
-        # Create table buttons numbered from 1 to tables
-        tableNumber = 0
-        for row in range(totalRows):
-            rowLayout = QHBoxLayout()
-            rowLayout.addStretch(1)
-            for col in range(tablesPerRow):
-
-                # Adds a normal button if possible otherwise a blank button
-                try:
-                    tableButton = self.createTableButton(tables[tableNumber])
-                    tableNumber += 1
-                except IndexError:
-                    tableButton = self.createBlankButton()
-
-                rowLayout.addWidget(tableButton)
-                rowLayout.addStretch(1)
-            rowLayout.addStretch(1)
-            mainLayout.addLayout(rowLayout)
-            mainLayout.addSpacing(20)
-        mainLayout.addStretch(1)
+        self.floorPlanView = FloorPlanView(floorPlan)
+        self.floorPlanView.clickedTable.connect(self.clickedTableButton)
+
+        self.tabs = QTabWidget()
+        self.tabs.addTab(self.floorPlanView, "Floor Plan")
+        self.tabs.addTab(self.createListLayout(tables), "List")
+        mainLayout.addWidget(self.tabs)
+
+    def createListLayout(self, tables):
+        """
+        Creates the list of the tables along with its filters. Only the
+        tables within the visible area of the list are painted, and the list
+        is laid out in batches so that a large restaurant does not block the
+        GUI.
+
+        :param tables: The TableListModel of the restaurant.
+        :return: The widget containing the list of the tables.
+        """
+        self.tableFilter = TableFilterModel(tables)
+
+        self.sectionField = QComboBox()
+        self.sectionField.setMinimumWidth(150)
+        self.sectionField.activated.connect(lambda index:
+                                            self.filterTables())
+        self.updateSections(tables)
+        tables.sectionsChanged.connect(lambda: self.updateSections(tables))
+
+        self.stateField = QComboBox()
+        self.stateField.setMinimumWidth(150)
+        self.stateField.addItem("All tables", None)
+        for state in TableListModel.STATES:
+            self.stateField.addItem(state.capitalize(), state)
+        self.stateField.activated.connect(lambda index:
+                                          self.filterTables())
+
+        filterLayout = QHBoxLayout()
+        filterLayout.addWidget(QLabel("Section: "))
+        filterLayout.addWidget(self.sectionField)
+        filterLayout.addWidget(QLabel("State: "))
+        filterLayout.addWidget(self.stateField)
+        filterLayout.addStretch()
+
+        self.tableList = QListView()
+        self.tableList.setViewMode(QListView.IconMode)
+        self.tableList.setMovement(QListView.Static)
+        self.tableList.setResizeMode(QListView.Adjust)
+        self.tableList.setUniformItemSizes(True)
+        self.tableList.setGridSize(self.LIST_ITEM_SIZE)
+        self.tableList.setLayoutMode(QListView.Batched)
+        self.tableList.setBatchSize(self.LIST_BATCH_SIZE)
+        self.tableList.setSelectionMode(QListView.NoSelection)
+        self.tableList.setModel(self.tableFilter)
+        self.tableList.clicked.connect(lambda index:
+                                       self.clickedTableButton.emit(
+                                           index.data(
+                                               TableListModel.NumberRole)))
+
+        widget = QWidget()
+        layout = QVBoxLayout()
+        layout.addLayout(filterLayout)
+        layout.addWidget(self.tableList)
+        widget.setLayout(layout)
+        return widget
+
+    def filterTables(self):
+        """
+        Shows the tables within the chosen section and state only.
+        """
+        self.tableFilter.setFilter(self.sectionField.currentData(),
+                                   self.stateField.currentData())
+
+    def updateSections(self, tables):
+        """
+        Fills the section field with the sections of the restaurant, keeping
+        the chosen section.
+
+        :param tables: The TableListModel of the restaurant.
+        """
+        section = self.sectionField.currentData()
+        self.sectionField.clear()
+        self.sectionField.addItem("All sections", None)
+        for name in tables.getSections():
+            self.sectionField.addItem(name or "No section", name)
+        self.sectionField.setCurrentIndex(
+            max(0, self.sectionField.findData(section)))
 
     def createTitle(self, text):
         """
@@ -905,33 +1107,378 @@ class TableScreen(QWidget):
         title.setFont(QFont("", 20, QFont.Bold, False))
         return title
 
-    def createTableButton(self, tableNumber):
+
+class TableListModel(QAbstractListModel):
+    """
+    The tables of the restaurant along with their state, shared by the views
+    that display them (the floor plan and the lists of the tables).
+    """
+    sectionsChanged = pyqtSignal()
+
+    # The roles of the data of a table, besides its display text
+    NumberRole = Qt.UserRole
+    SectionRole = Qt.UserRole + 1
+    StateRole = Qt.UserRole + 2
+
+    # The states of a table
+    STATES = ("free", "booked", "occupied")
+
+    def __init__(self, tables):
         """
-        Creates a 50x50 square button with the table number as the text
+        :param tables: A list of the table dictionaries of the floor plan
+                       (see Client.requestFloorPlan).
+        """
+        super().__init__()
+        self.tables = []
+        self.numberToRow = {}
+        self.setTables(tables)
 
-        :param tableNumber: The number of the table.
-        :return: The QPushButton with the table number on it.
-        """
-        button = QPushButton(str(tableNumber))
-        button.setFixedSize(50, 50)
-        button.setFont(QFont("", 14, QFont.Normal, True))
-        # Emit a signal when the button is pressed with the button's
-        # text as the argument
-        button.clicked.connect(lambda isClicked, tableNumber=button.text():
-                               self.clickedTableButton.emit(int(tableNumber)))
-        return button
+    def rowCount(self, parent=QModelIndex()):
+        """
+        :param parent: The parent index (unused by a list).
+        :return: The amount of tables.
+        """
+        return 0 if parent.isValid() else len(self.tables)
 
-    def createBlankButton(self):
+    def data(self, index, role=Qt.DisplayRole):
         """
-        Creates a 50x50 square button blank button that doesn't do anything.
-        Used to deal with GUI spacing issues.
+        :param index: The QModelIndex of a table.
+        :param role: The role of the data.
+        :return: The data of the table for the role, or None.
+        """
+        if not index.isValid():
+            return None
+
+        table = self.tables[index.row()]
+        if role == Qt.DisplayRole:
+            return "{}\n{} seats".format(table["number"], table["size"])
+        elif role == Qt.ToolTipRole:
+            return "Table {} ({} seats, {})".format(
+                table["number"], table["size"], table["state"])
+        elif role == Qt.BackgroundRole:
+            return QColor(TableItem.COLOURS[table["state"]])
+        elif role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        elif role == self.NumberRole:
+            return table["number"]
+        elif role == self.SectionRole:
+            return table.get("section", "")
+        elif role == self.StateRole:
+            return table["state"]
+        return None
 
-        :return: The QPushButton with the table number on it.
+    def getTable(self, row):
         """
-        button = QPushButton()
-        button.setFixedSize(50, 50)
-        button.setDisabled(True)
-        return button
+        :param row: The row of a table.
+        :return: The table dictionary of the floor plan, along with its
+                 "state".
+        """
+        return self.tables[row]
+
+    def getSections(self):
+        """
+        :return: A sorted list of the sections of the tables.
+        """
+        return sorted({table.get("section", "") for table in self.tables})
+
+    def setTables(self, tables):
+        """
+        Adds the new tables and updates the state of the others, notifying
+        the views of the rows that changed only.
+
+        :param tables: A list of the table dictionaries of the floor plan.
+        """
+        sections = self.getSections()
+        newTables = []
+        for table in tables:
+            table = dict(table, state=_getTableState(table))
+            row = self.numberToRow.get(table["number"])
+            if row is None:
+                newTables.append(table)
+            elif table != self.tables[row]:
+                self.tables[row] = table
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+
+        if newTables:
+            first = len(self.tables)
+            self.beginInsertRows(QModelIndex(), first,
+                                 first + len(newTables) - 1)
+            for row, table in enumerate(newTables, first):
+                self.tables.append(table)
+                self.numberToRow[table["number"]] = row
+            self.endInsertRows()
+
+        if self.getSections() != sections:
+            self.sectionsChanged.emit()
+
+
+class TableFilterModel(QSortFilterProxyModel):
+    """
+    The tables of a TableListModel within a section and in a state, sorted
+    by number.
+    """
+
+    def __init__(self, tables):
+        """
+        :param tables: The TableListModel to be filtered.
+        """
+        super().__init__()
+        self.section = None
+        self.state = None
+        self.setSourceModel(tables)
+        self.setSortRole(TableListModel.NumberRole)
+        self.sort(0)
+
+    def setFilter(self, section, state):
+        """
+        :param section: The section of the tables, or None for all of them.
+        :param state: The state of the tables, or None for all of them.
+        """
+        self.section = section
+        self.state = state
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, sourceRow, sourceParent):
+        """
+        :param sourceRow: The row of a table in the TableListModel.
+        :param sourceParent: The parent index (unused by a list).
+        :return: Whether the table is in the section and state.
+        """
+        table = self.sourceModel().getTable(sourceRow)
+        return ((self.section is None or
+                 table.get("section", "") == self.section) and
+                (self.state is None or table["state"] == self.state))
+
+
+class TableItem(QGraphicsItem):
+    """
+    A table on the floor plan, coloured by its state.
+
+    Tables are painted directly rather than built from widgets, so that a
+    floor plan of hundreds of tables stays cheap. The scene only paints the
+    tables within the visible area, and the details of a table are only
+    painted once the floor plan is zoomed in enough to read them.
+    """
+
+    # The colours of the table states
+    COLOURS = {"free": "#8fd18f", "booked": "#f2c46d", "occupied": "#e57373"}
+
+    # The side of a table of up to four seats, and the extra width for
+    # every two more seats
+    SIDE = 50
+    SEATS_WIDTH = 25
+
+    # The scales from which the table number, and then its amount of seats,
+    # are painted
+    NUMBER_DETAIL = 0.4
+    SEATS_DETAIL = 1.2
+
+    def __init__(self, table):
+        """
+        :param table: The table dictionary of the floor plan (see
+                      Client.requestFloorPlan).
+        """
+        super().__init__()
+        self.number = table["number"]
+        self.size = table["size"]
+        self.state = None
+
+        extraSeats = max(0, self.size - 4)
+        width = self.SIDE + self.SEATS_WIDTH * ((extraSeats + 1) // 2)
+        self.rect = QRectF(0, 0, width, self.SIDE)
+
+        self.setPos(table["x"], table["y"])
+        self.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
+        self.setState(table)
+
+    def setState(self, table):
+        """
+        Colours the table by its state, repainting it only if it changed.
+
+        :param table: The table dictionary of the floor plan.
+        """
+        state = _getTableState(table)
+        if state != self.state:
+            self.state = state
+            self.setToolTip("Table {} ({} seats, {})".format(
+                self.number, self.size, state))
+            self.update()
+
+    def boundingRect(self):
+        """
+        :return: The area painted by the table (including its outline).
+        """
+        return self.rect.adjusted(-1, -1, 1, 1)
+
+    def paint(self, painter, option, widget=None):
+        """
+        Paints the table with as much detail as the zoom allows.
+
+        :param painter: The QPainter to paint with.
+        :param option: The QStyleOptionGraphicsItem of the paint.
+        :param widget: The widget painted on.
+        """
+        detail = option.levelOfDetailFromTransform(painter.worldTransform())
+        painter.setBrush(QColor(self.COLOURS[self.state]))
+
+        if detail < self.NUMBER_DETAIL:
+            painter.setPen(Qt.NoPen)
+            painter.drawRect(self.rect)
+            return
+
+        painter.setPen(QPen(Qt.black, 1))
+        painter.drawRoundedRect(self.rect, 5, 5)
+        painter.setFont(self.scene().tableFont)
+        if detail < self.SEATS_DETAIL:
+            painter.drawText(self.rect, Qt.AlignCenter, str(self.number))
+        else:
+            painter.drawText(self.rect, Qt.AlignCenter,
+                             "{}\n{} seats".format(self.number, self.size))
+
+
+class FloorPlanScene(QGraphicsScene):
+    """
+    The floor plan of the restaurant, shared by the views that display it
+    and kept in step with the TableListModel of the restaurant.
+    """
+
+    def __init__(self, tables):
+        """
+        :param tables: The TableListModel of the restaurant.
+        """
+        super().__init__()
+        self.tableFont = QFont("", 10, QFont.Bold, False)
+        self.tableItems = {}
+        self.tables = tables
+
+        tables.rowsInserted.connect(lambda parent, first, last:
+                                    self.addTables(first, last))
+        tables.dataChanged.connect(lambda topLeft, bottomRight:
+                                   self.updateTables(topLeft.row(),
+                                                     bottomRight.row()))
+        self.addTables(0, tables.rowCount() - 1)
+
+    def addTables(self, first, last):
+        """
+        Adds the placed tables of the given rows to the floor plan.
+
+        :param first: The first row of the TableListModel.
+        :param last: The last row of the TableListModel.
+        """
+        for row in range(first, last + 1):
+            table = self.tables.getTable(row)
+            if table["x"] is not None and table["y"] is not None:
+                item = TableItem(table)
+                self.tableItems[item.number] = item
+                self.addItem(item)
+
+    def updateTables(self, first, last):
+        """
+        Updates the state of the tables of the given rows, so that only the
+        tables that changed are repainted.
+
+        :param first: The first row of the TableListModel.
+        :param last: The last row of the TableListModel.
+        """
+        for row in range(first, last + 1):
+            table = self.tables.getTable(row)
+            item = self.tableItems.get(table["number"])
+            if item is not None:
+                item.setState(table)
+
+    def tableAt(self, position):
+        """
+        :param position: A position (QPointF) on the floor plan.
+        :return: The number of the table at the position, or None.
+        """
+        item = self.itemAt(position, QTransform())
+        return item.number if isinstance(item, TableItem) else None
+
+
+class FloorPlanView(QGraphicsView):
+    """
+    Displays the floor plan, fitted to the view until it is zoomed in or
+    out with the mouse wheel (and dragged around).
+    """
+    clickedTable = pyqtSignal(int)
+
+    # The zoom factor of one step of the mouse wheel
+    ZOOM_STEP = 1.25
+
+    # The largest scale the floor plan is fitted at
+    MAX_FIT_SCALE = 1.5
+
+    def __init__(self, floorPlan):
+        """
+        :param floorPlan: The FloorPlanScene to be displayed.
+        """
+        super().__init__(floorPlan)
+        self.setRenderHint(QPainter.Antialiasing)
+        self.setOptimizationFlag(QGraphicsView.DontSavePainterState)
+        self.setDragMode(QGraphicsView.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+        self.isZoomed = False
+        self.pressPosition = None
+
+    def fitFloorPlan(self):
+        """
+        Fits the whole floor plan in the view, without enlarging it past
+        MAX_FIT_SCALE.
+        """
+        rect = self.scene().itemsBoundingRect()
+        if rect.isEmpty():
+            return
+
+        margin = TableItem.SIDE / 2
+        self.fitInView(rect.adjusted(-margin, -margin, margin, margin),
+                       Qt.KeepAspectRatio)
+        if self.transform().m11() > self.MAX_FIT_SCALE:
+            self.setTransform(QTransform.fromScale(self.MAX_FIT_SCALE,
+                                                   self.MAX_FIT_SCALE))
+
+    def resizeEvent(self, event):
+        """
+        Refits the floor plan unless it was zoomed.
+
+        :param event: The QResizeEvent.
+        """
+        super().resizeEvent(event)
+        if not self.isZoomed:
+            self.fitFloorPlan()
+
+    def wheelEvent(self, event):
+        """
+        Zooms the floor plan in or out around the mouse.
+
+        :param event: The QWheelEvent.
+        """
+        factor = self.ZOOM_STEP ** (event.angleDelta().y() / 120)
+        self.scale(factor, factor)
+        self.isZoomed = True
+
+    def mousePressEvent(self, event):
+        """
+        Remembers where the mouse was pressed, to tell clicks from drags.
+
+        :param event: The QMouseEvent.
+        """
+        self.pressPosition = event.pos()
+        super().mousePressEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        """
+        Emits the number of the table clicked on, if any.
+
+        :param event: The QMouseEvent.
+        """
+        super().mouseReleaseEvent(event)
+        if (self.pressPosition is not None and
+                (event.pos() - self.pressPosition).manhattanLength() < 5):
+            number = self.scene().tableAt(self.mapToScene(event.pos()))
+            if number is not None:
+                self.clickedTable.emit(number)
+        self.pressPosition = None
 
 
 class MenuView(QWidget):
@@ -1126,10 +1673,10 @@ class SplashView(QWidget):
         :return: A QLabel image.
         """
         path = _getRelativePath('..', '..', 'asset', 'logo.png')
-        pixMap = QPixmap(path)
-        pixMap = pixMap.scaled(500, 500, Qt.KeepAspectRatio)
 
         image = QLabel()
+        pixMap = _loadPixmap(path, QSize(500, 500), image.devicePixelRatioF(),
+                             Qt.KeepAspectRatio)
         image.setPixmap(pixMap)
         return image
 
@@ -1177,12 +1724,13 @@ class MainView(QMainWindow):
     View class of the MVC pattern. Responsible for displaying the GUI.
     """
 
-    def __init__(self, menu, totalTables):
+    def __init__(self, menu, tables):
         """
         Main tab widget that constructs the client GUI.
 
         :param menu: An instantiated menu object.
-        :param totalTables: The total number of tables in the restaurant.
+        :param tables: A list of the table dictionaries of the floor plan
+                       (see Client.requestFloorPlan).
         """
         super().__init__()
         self.setCentralWidget(QStackedWidget())
@@ -1195,11 +1743,16 @@ class MainView(QMainWindow):
         # Set size, title and icon of main window
         self.initializeUI()
 
+        # The tables and floor plan shared by the order, booking and payment
+        # tabs
+        self.tables = TableListModel(tables)
+        self.floorPlan = FloorPlanScene(self.tables)
+
         # Create 5 widgets which will be used in 5 different tabs
-        self.tabOrder = OrderView(menu, totalTables)
+        self.tabOrder = OrderView(menu, self.tables, self.floorPlan)
         self.tabMenu = MenuView(menu)
-        self.tabBook = BookingView()
-        self.tabPayment = PaymentView(totalTables)
+        self.tabBook = BookingView(self.floorPlan)
+        self.tabPayment = PaymentView(self.tables, self.floorPlan)
         self.tabHelp = HelpView()
 
         # Wrap menu, help and book tabs in scroll widgets to allow scrolling
@@ -1257,6 +1810,21 @@ class MainView(QMainWindow):
         self.centralWidget().setContentsMargins(-1, -1, -1, -1)
 
 
+def _getTableState(table):
+    """
+    Gets the state of a table, its orders taking precedence over its
+    bookings.
+
+    :param table: The table dictionary of the floor plan.
+    :return: One of TableListModel.STATES.
+    """
+    if table["isOccupied"]:
+        return "occupied"
+    elif table["isBooked"]:
+        return "booked"
+    return "free"
+
+
 def _getRelativePath(*args):
     """
     Gets the relative path to a file.
@@ -1268,3 +1836,75 @@ def _getRelativePath(*args):
     """
     return os.path.abspath(os.path.join(os.path.dirname(__file__), *args))
 
+
+
+# The hashes of the image files read, keyed by path, size and modification
+# time (so that an edited file is hashed again)
+_fileToHash = {}
+
+
+def _hashFile(path):
+    """
+    Hashes the content of a file, once per version of the file.
+
+    :param path: The path to the file.
+    :return: The SHA-1 hex digest of the content of the file.
+    """
+    status = os.stat(path)
+    key = (path, status.st_size, status.st_mtime)
+    if key not in _fileToHash:
+        with open(path, "rb") as file:
+            _fileToHash[key] = hashlib.sha1(file.read()).hexdigest()
+    return _fileToHash[key]
+
+
+def _getAssetCachePath(key):
+    """
+    Gets the path of a pre-scaled image in the disk cache, creating the
+    cache folder if needed.
+
+    :param key: The cache key of the image.
+    :return: The absolute path to the cached image.
+    """
+    folder = os.path.join(QStandardPaths.writableLocation(
+        QStandardPaths.GenericCacheLocation), "aardvark", "asset")
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, key + ".png")
+
+
+def _loadPixmap(path, size, ratio=1.0, mode=Qt.KeepAspectRatio):
+    """
+    Loads an image pre-scaled to the size it is displayed at, so that it is
+    neither decoded at full size nor rescaled on every paint.
+
+    The scaled image is cached in memory (QPixmapCache) and on disk, keyed
+    by the hash of the image file and the scaled size in device pixels. On a
+    miss, the image is decoded directly at the scaled size.
+
+    :param path: The path to the image file.
+    :param size: The size (QSize) the image is displayed at, in device
+                 independent pixels.
+    :param ratio: The device pixel ratio of the screen displaying the image.
+    :param mode: How the aspect ratio of the image is kept when scaled.
+    :return: The scaled QPixmap.
+    """
+    width = round(size.width() * ratio)
+    height = round(size.height() * ratio)
+    key = "{}-{}x{}-{}".format(_hashFile(path), width, height, int(mode))
+
+    pixMap = QPixmapCache.find("{}@{}".format(key, ratio))
+    if pixMap is None or pixMap.isNull():
+        cachePath = _getAssetCachePath(key)
+        pixMap = QPixmap(cachePath)
+
+        if pixMap.isNull():
+            reader = QImageReader(path)
+            reader.setScaledSize(reader.size().scaled(width, height, mode))
+            pixMap = QPixmap.fromImage(reader.read())
+            # Stored uncompressed, as compressing costs more than it saves
+            # when reading the image back
+            pixMap.save(cachePath, "PNG", 100)
+
+        pixMap.setDevicePixelRatio(ratio)
+        QPixmapCache.insert("{}@{}".format(key, ratio), pixMap)
+    return pixMap
@@ -0,0 +1,117 @@
+import csv
+import datetime
+import itertools
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from booking.models import Booking
+from order.models import Order, ArchivedOrder
+
+
+# The amount of rows fetched from the database at once
+CHUNK_SIZE = 2000
+
+# The columns of every export, as <header, field lookup> pairs
+COLUMNS = {
+    "orders": [("id", "pk"),
+               ("table", "table__number"),
+               ("food", "food__name"),
+               ("quantity", "quantity"),
+               ("isPaid", "isPaid"),
+               ("state", "state"),
+               ("submitted", "submitted")],
+    "bookings": [("id", "pk"),
+                 ("reference", "reference"),
+                 ("name", "name"),
+                 ("email", "email"),
+                 ("phone", "phone"),
+                 ("date", "date"),
+                 ("time", "time"),
+                 ("table", "table__number")]
+}
+
+# The content type of every export format
+CONTENT_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+
+class _Echo:
+    """
+    A file-like object that returns what is written to it, so that a CSV
+    writer formats one row at a time.
+    """
+
+    def write(self, value):
+        """
+        :param value: The formatted row.
+        :return: The formatted row.
+        """
+        return value
+
+
+def _getQuerysets(kind, start, end):
+    """
+    :param kind: The history exported, either "orders" or "bookings".
+    :param start: The first date exported (a date object, or None).
+    :param end: The last date exported (a date object, or None).
+    :return: A list of the querysets of the history, in the order they are
+             exported.
+    """
+    if kind == "bookings":
+        bookings = Booking.objects.order_by("date", "time", "pk")
+        if start is not None:
+            bookings = bookings.filter(date__gte=start)
+        if end is not None:
+            bookings = bookings.filter(date__lte=end)
+        return [bookings]
+
+    # The archived orders are older than the settled ones still in the order
+    # table, so they are exported first
+    querysets = [ArchivedOrder.objects.order_by("submitted", "pk"),
+                 Order.objects.filter(isHistory=True)
+                              .order_by("submitted", "pk")]
+    if start is not None:
+        startTime = timezone.make_aware(datetime.datetime.combine(
+            start, datetime.time.min))
+        querysets = [orders.filter(submitted__gte=startTime)
+                     for orders in querysets]
+    if end is not None:
+        endTime = timezone.make_aware(datetime.datetime.combine(
+            end + datetime.timedelta(days=1), datetime.time.min))
+        querysets = [orders.filter(submitted__lt=endTime)
+                     for orders in querysets]
+    return querysets
+
+
+def iterExport(kind, format, start=None, end=None):
+    """
+    Exports the order history (the settled and archived orders) or the
+    booking history, one line at a time.
+
+    The rows are fetched from the database in chunks (with a server-side
+    cursor where the database supports it), so the memory used does not
+    grow with the size of the history.
+
+    :param kind: The history exported, either "orders" or "bookings".
+    :param format: The format of the lines, either "csv" (preceded by a
+                   header line) or "jsonl" (a JSON object per line).
+    :param start: The first date exported (a date object, or None for the
+                  whole history).
+    :param end: The last date exported (a date object, or None for the
+                whole history).
+    :return: An iterator of the lines as strings, each ending in a newline.
+    """
+    headers, lookups = zip(*COLUMNS[kind])
+    rows = itertools.chain.from_iterable(
+        queryset.values_list(*lookups).iterator(chunk_size=CHUNK_SIZE)
+        for queryset in _getQuerysets(kind, start, end))
+
+    if format == "csv":
+        writer = csv.writer(_Echo(), lineterminator="\n")
+        yield writer.writerow(headers)
+        for row in rows:
+            yield writer.writerow(row)
+    else:
+        encoder = DjangoJSONEncoder()
+        for row in rows:
+            yield encoder.encode(dict(zip(headers, row))) + "\n"
@@ -0,0 +1,50 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics.export import iterExport, COLUMNS, CONTENT_TYPES
+
+
+class Command(BaseCommand):
+    """
+    Exports the order or booking history as CSV or JSON Lines, writing the
+    rows as they are read from the database.
+    """
+    help = "Exports the order or booking history as CSV or JSON Lines."
+
+    def add_arguments(self, parser):
+        """
+        :param parser: The argument parser of the command.
+        """
+        parser.add_argument("kind", choices=sorted(COLUMNS))
+        parser.add_argument("--format",
+                            choices=sorted(CONTENT_TYPES),
+                            default="csv",
+                            help="The format of the export, csv by default.")
+        parser.add_argument("--start",
+                            help="The first date exported (YYYY-MM-DD).")
+        parser.add_argument("--end",
+                            help="The last date exported (YYYY-MM-DD).")
+        parser.add_argument("--output",
+                            help="The file exported to, stdout by default.")
+
+    def handle(self, *args, **options):
+        """
+        Runs the export.
+        """
+        try:
+            start, end = [datetime.datetime.strptime(options[name],
+                                                     "%Y-%m-%d").date()
+                          if options[name] else None
+                          for name in ["start", "end"]]
+        except ValueError:
+            raise CommandError("The dates must be YYYY-MM-DD.")
+
+        lines = iterExport(options["kind"], options["format"], start, end)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8",
+                      newline="") as file:
+                file.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
@@ -0,0 +1,219 @@
+import datetime
+import itertools
+
+import numpy as np
+from django.core.cache import cache
+from django.utils import timezone
+
+from order.models import Order, ArchivedOrder
+
+
+# The dimensions the sales are broken down by (besides the day), mapped to
+# the column they are keyed by
+DIMENSIONS = {"hours": "hour",
+              "types": "type",
+              "tables": "table",
+              "items": "item"}
+
+# The amount of orders fetched from the database at once
+CHUNK_SIZE = 2000
+
+
+def loadSales(start, end):
+    """
+    Loads the orders submitted between two dates (inclusive), including the
+    archived ones, joined with their food into columns.
+
+    Orders do not store the price they were sold at, so the revenue is
+    computed from the current price of the food.
+
+    :param start: The first date (a date object).
+    :param end: The last date (a date object).
+    :return: A dictionary that maps column name ("day", "hour", "type",
+             "table", "item", "quantity" and "revenue") to a NumPy array.
+    """
+    startTime = timezone.make_aware(datetime.datetime.combine(
+        start, datetime.time.min))
+    endTime = timezone.make_aware(datetime.datetime.combine(
+        end + datetime.timedelta(days=1), datetime.time.min))
+
+    rows = itertools.chain.from_iterable(
+        model.objects.filter(submitted__gte=startTime,
+                             submitted__lt=endTime,
+                             food__isnull=False)
+                     .values_list("submitted", "table__number",
+                                  "food__type", "food__name",
+                                  "food__price", "quantity")
+                     .iterator(chunk_size=CHUNK_SIZE)
+        for model in [Order, ArchivedOrder])
+
+    days, hours, tables, types, items, prices, quantities = \
+        [], [], [], [], [], [], []
+    for submitted, table, type, name, price, quantity in rows:
+        submitted = timezone.localtime(submitted)
+        days.append(submitted.toordinal())
+        hours.append(submitted.hour)
+        tables.append(str(table))
+        types.append(type)
+        items.append(name)
+        prices.append(price)
+        quantities.append(quantity)
+
+    quantity = np.array(quantities, dtype=np.int64)
+    return {"day": np.array(days, dtype=np.int64),
+            "hour": np.array(hours, dtype=np.int64),
+            "table": np.array(tables, dtype=str),
+            "type": np.array(types, dtype=str),
+            "item": np.array(items, dtype=str),
+            "quantity": quantity,
+            "revenue": np.array(prices, dtype=np.float64) * quantity}
+
+
+def _emptySummary():
+    """
+    :return: The summary of a day without any sales.
+    """
+    summary = {"quantity": 0, "revenue": 0.0}
+    for dimension in DIMENSIONS:
+        summary[dimension] = {}
+    return summary
+
+
+def summarizeDays(columns):
+    """
+    Sums up the quantity sold and the revenue of every day, broken down by
+    hour, food type, table and item. Every sum is computed for all the days
+    at once by counting the (day, key) pairs.
+
+    :param columns: The columns returned by loadSales.
+    :return: A dictionary that maps date to its summary, a dictionary of the
+             "quantity" and "revenue" of the day and of every dimension (a
+             dictionary that maps key to its "quantity" and "revenue").
+    """
+    if not len(columns["day"]):
+        return {}
+
+    dayLabels, dayIndex = np.unique(columns["day"], return_inverse=True)
+    dates = [datetime.date.fromordinal(int(day)) for day in dayLabels]
+    summaries = {date: _emptySummary() for date in dates}
+
+    quantity, revenue = _sumByCell(dayIndex, len(dates), 1,
+                                   columns["quantity"], columns["revenue"])
+    for i, date in enumerate(dates):
+        summaries[date]["quantity"] = int(quantity[i, 0])
+        summaries[date]["revenue"] = float(revenue[i, 0])
+
+    for dimension, column in DIMENSIONS.items():
+        labels, keyIndex = np.unique(columns[column], return_inverse=True)
+        cells = dayIndex * len(labels) + keyIndex
+        quantity, revenue = _sumByCell(cells, len(dates), len(labels),
+                                       columns["quantity"], columns["revenue"])
+
+        for i, date in enumerate(dates):
+            breakdown = summaries[date][dimension]
+            for j in np.flatnonzero(quantity[i]):
+                breakdown[str(labels[j])] = {"quantity": int(quantity[i, j]),
+                                             "revenue": float(revenue[i, j])}
+    return summaries
+
+
+def _sumByCell(cells, rows, columns, quantity, revenue):
+    """
+    Sums up the quantity and revenue of the orders that fall in the same
+    cell of a (rows x columns) table.
+
+    :param cells: The flat index of the cell of every order.
+    :param rows: The amount of rows of the table.
+    :param columns: The amount of columns of the table.
+    :param quantity: The quantity of every order.
+    :param revenue: The revenue of every order.
+    :return: The tables of the summed quantity and revenue.
+    """
+    size = rows * columns
+    quantity = np.bincount(cells, weights=quantity, minlength=size)
+    revenue = np.bincount(cells, weights=revenue, minlength=size)
+    return (quantity.reshape(rows, columns).round().astype(np.int64),
+            revenue.reshape(rows, columns))
+
+
+def _mergeSummaries(summaries):
+    """
+    Adds up the summaries of several days into a report.
+
+    :param summaries: A dictionary that maps date to its summary.
+    :return: The report, a summary of all the days with the additional
+             "days" breakdown.
+    """
+    report = _emptySummary()
+    report["days"] = {}
+
+    for day, summary in sorted(summaries.items()):
+        report["quantity"] += summary["quantity"]
+        report["revenue"] += summary["revenue"]
+        report["days"][day.isoformat()] = {"quantity": summary["quantity"],
+                                           "revenue": summary["revenue"]}
+
+        for dimension in DIMENSIONS:
+            breakdown = report[dimension]
+            for key, sales in summary[dimension].items():
+                total = breakdown.setdefault(key, {"quantity": 0,
+                                                   "revenue": 0.0})
+                total["quantity"] += sales["quantity"]
+                total["revenue"] += sales["revenue"]
+
+    _roundRevenue(report)
+    return report
+
+
+def _roundRevenue(sales):
+    """
+    Rounds the revenues of a report to pennies, in place.
+
+    :param sales: A report, or one of its breakdowns.
+    """
+    for key, value in sales.items():
+        if key == "revenue":
+            sales[key] = round(value, 2)
+        elif isinstance(value, dict):
+            _roundRevenue(value)
+
+
+def getSalesReport(start, end):
+    """
+    Reports the sales between two dates (inclusive).
+
+    The summary of every closed day (i.e. before today) is cached once it is
+    computed, so only the days never reported before (and today) are loaded
+    from the database, a run of consecutive days at a time.
+
+    :param start: The first date (a date object).
+    :param end: The last date (a date object).
+    :return: The report of the quantity sold and the revenue in total, and
+             broken down by day, hour, food type, table and item.
+    """
+    today = timezone.localdate()
+    days = [start + datetime.timedelta(days=i)
+            for i in range((end - start).days + 1)]
+    dayToKey = {day: "sales:{}".format(day.isoformat()) for day in days}
+
+    cached = cache.get_many([dayToKey[day] for day in days if day < today])
+    summaries = {day: cached[dayToKey[day]] for day in days
+                 if dayToKey[day] in cached}
+
+    missing = [day for day in days if day not in summaries]
+    # Only the runs of consecutive missing days are loaded, not the cached
+    # days between them
+    for run, runDays in itertools.groupby(
+            enumerate(missing), lambda pair: pair[1] - datetime.timedelta(
+                days=pair[0])):
+        runDays = [day for i, day in runDays]
+        computed = summarizeDays(loadSales(runDays[0], runDays[-1]))
+        for day in runDays:
+            summaries[day] = computed.get(day) or _emptySummary()
+
+    if missing:
+
+        cache.set_many({dayToKey[day]: summaries[day]
+                        for day in missing if day < today}, None)
+
+    return _mergeSummaries(summaries)
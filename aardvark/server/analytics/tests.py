@@ -0,0 +1,265 @@
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from django.core.urlresolvers import reverse
+from django.test import TestCase, Client
+from django.utils import timezone
+
+from .export import iterExport
+from .sales import loadSales, summarizeDays, getSalesReport
+from booking.models import Booking
+from menu.models import Food
+from order.models import Order
+from order.rollup import rollUpOrders
+from table.models import Table
+
+from unittest.mock import patch, call
+
+import csv
+import datetime
+import io
+import json
+
+################################ UNITTESTS TESTS ###############################
+
+
+class SalesTests(TestCase):
+    """
+    Unit tests for the sales module.
+    """
+
+    def setUp(self):
+        """
+        Clears the cached summaries and creates some orders over two days.
+        """
+        cache.clear()
+
+        table1 = Table.objects.create(number=1, size=2)
+        table2 = Table.objects.create(number=2, size=4)
+        soup = Food.objects.create(name="soup", type="starter",
+                                   description="hot", price="4.50")
+        steak = Food.objects.create(name="steak", type="main course",
+                                    description="rare", price="20.00")
+
+        self.day1 = datetime.date(2018, 3, 1)
+        self.day2 = datetime.date(2018, 3, 2)
+        for table, food, quantity, day, hour in [
+                (table1, soup, 2, self.day1, 12),
+                (table1, steak, 1, self.day1, 13),
+                (table2, steak, 3, self.day1, 13),
+                (table2, soup, 1, self.day2, 19)]:
+            submitted = timezone.make_aware(
+                datetime.datetime.combine(day, datetime.time(hour)))
+            Order.objects.create(table=table, food=food, quantity=quantity,
+                                 submitted=submitted)
+
+    def testLoadSales(self):
+        """
+        Tests whether the orders within the dates are loaded into columns.
+        """
+        columns = loadSales(self.day2, self.day2)
+
+        self.assertEqual(list(columns["item"]), ["soup"])
+        self.assertEqual(list(columns["hour"]), [19])
+        self.assertEqual(list(columns["revenue"]), [4.5])
+
+    def testLoadArchivedSales(self):
+        """
+        Tests whether the archived orders are loaded along with the orders.
+        """
+        Order.objects.update(isHistory=True)
+        rollUpOrders(datetime.date(2018, 3, 3), archive=True)
+
+        columns = loadSales(self.day1, self.day2)
+        self.assertEqual(sorted(columns["quantity"]), [1, 1, 2, 3])
+
+    def testSummarizeDays(self):
+        """
+        Tests whether the sales are summed up per day and dimension.
+        """
+        summaries = summarizeDays(loadSales(self.day1, self.day2))
+        day1 = summaries[self.day1]
+
+        self.assertEqual(day1["quantity"], 6)
+        self.assertEqual(day1["revenue"], 89.0)
+        self.assertEqual(day1["hours"]["13"], {"quantity": 4, "revenue": 80.0})
+        self.assertEqual(day1["tables"]["1"], {"quantity": 3, "revenue": 29.0})
+        self.assertEqual(day1["types"]["starter"],
+                         {"quantity": 2, "revenue": 9.0})
+        self.assertEqual(summaries[self.day2]["items"],
+                         {"soup": {"quantity": 1, "revenue": 4.5}})
+        self.assertEqual(summarizeDays(loadSales(self.day2 +
+                                                 datetime.timedelta(days=1),
+                                                 self.day2 +
+                                                 datetime.timedelta(days=1))),
+                         {})
+
+    def testGetSalesReport(self):
+        """
+        Tests whether the summaries of the days are merged into a report,
+        and whether closed days are then reported from the cache.
+        """
+        report = getSalesReport(self.day1, self.day2)
+
+        self.assertEqual(report["revenue"], 93.5)
+        self.assertEqual(report["days"]["2018-03-02"],
+                         {"quantity": 1, "revenue": 4.5})
+        self.assertEqual(report["items"]["soup"],
+                         {"quantity": 3, "revenue": 13.5})
+
+        with self.assertNumQueries(0):
+            self.assertEqual(getSalesReport(self.day1, self.day2), report)
+
+    def testGetYearSalesReport(self):
+        """
+        Tests whether a year of closed days stays cached, and whether only
+        the days missing from the cache are loaded.
+        """
+        start = datetime.date(2017, 3, 2)
+        report = getSalesReport(start, self.day1)
+        self.assertEqual(report["revenue"], 89.0)
+        with self.assertNumQueries(0):
+            self.assertEqual(getSalesReport(start, self.day1), report)
+
+        with patch("analytics.sales.loadSales",
+                   wraps=loadSales) as mockLoadSales:
+            getSalesReport(start - datetime.timedelta(days=1), self.day2)
+        self.assertEqual(mockLoadSales.call_args_list,
+                         [call(start - datetime.timedelta(days=1),
+                               start - datetime.timedelta(days=1)),
+                          call(self.day2, self.day2)])
+
+
+class ExportTests(TestCase):
+    """
+    Unit tests for the export module.
+    """
+
+    def setUp(self):
+        """
+        Creates a settled, an archived and an open order and a booking.
+        """
+        table = Table.objects.create(number=1, size=2)
+        soup = Food.objects.create(name="soup", type="starter",
+                                   description="hot", price="4.50")
+        for day, isHistory in [(1, True), (2, True), (3, False)]:
+            submitted = timezone.make_aware(
+                datetime.datetime(2018, 3, day, 12))
+            Order.objects.create(table=table, food=soup, quantity=day,
+                                 isHistory=isHistory, submitted=submitted)
+        rollUpOrders(datetime.date(2018, 3, 2), archive=True)
+
+        Booking.objects.create(name="Ann", email="ann@example.com",
+                               phone="0123", date=datetime.date(2018, 3, 4),
+                               time=datetime.time(9), table=table,
+                               reference="ABC1234567")
+
+    def testExportOrdersAsCsv(self):
+        """
+        Tests whether the archived and then the settled orders are exported,
+        leaving out the open ones.
+        """
+        lines = list(iterExport("orders", "csv"))
+        rows = list(csv.reader(lines))
+
+        self.assertEqual(rows[0], ["id", "table", "food", "quantity",
+                                   "isPaid", "state", "submitted"])
+        self.assertEqual([row[3] for row in rows[1:]], ["1", "2"])
+
+        lines = list(iterExport("orders", "csv",
+                                start=datetime.date(2018, 3, 2)))
+        self.assertEqual(len(lines), 2)
+
+    def testExportBookingsAsJsonLines(self):
+        """
+        Tests whether every booking is exported as a JSON object per line.
+        """
+        lines = list(iterExport("bookings", "jsonl"))
+
+        self.assertEqual(len(lines), 1)
+        booking = json.loads(lines[0])
+        self.assertEqual(booking["reference"], "ABC1234567")
+        self.assertEqual(booking["date"], "2018-03-04")
+        self.assertEqual(booking["table"], 1)
+        self.assertEqual(list(iterExport("bookings", "jsonl",
+                                         end=datetime.date(2018, 3, 3))),
+                         [])
+
+
+############################### INTEGRATION TESTS ##############################
+
+
+class IntegrationTests(TestCase):
+    """
+    Integration tests for the analytics app.
+    """
+
+    def setUp(self):
+        """
+        Clears the cached summaries and creates an order for today.
+        """
+        cache.clear()
+
+        table = Table.objects.create(number=1, size=2)
+        food = Food.objects.create(name="soup", type="starter",
+                                   description="hot", price="4.50")
+        Order.objects.create(table=table, food=food, quantity=2)
+
+    def testSendSalesReport(self):
+        """
+        Tests whether the report of the last 30 days includes today's
+        orders, which are never cached.
+        """
+        client = Client()
+        response = client.get(reverse("analytics-sales"))
+        report = json.loads(response.content.decode("utf-8"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(report["days"]), 30)
+        self.assertEqual(report["revenue"], 9.0)
+
+        Order.objects.create(table=Table.objects.get(number=1),
+                             food=Food.objects.get(name="soup"), quantity=1)
+        response = client.get(reverse("analytics-sales"))
+        report = json.loads(response.content.decode("utf-8"))
+        self.assertEqual(report["revenue"], 13.5)
+
+    def testExportHistory(self):
+        """
+        Tests whether the history is streamed as an attachment.
+        """
+        client = Client()
+        Order.objects.update(isHistory=True)
+        response = client.get(reverse("analytics-export",
+                                      args=["orders", "jsonl"]))
+        lines = b"".join(response.streaming_content).decode("utf-8")
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertIn("orders.jsonl", response["Content-Disposition"])
+        self.assertEqual(json.loads(lines)["food"], "soup")
+
+        response = client.get(reverse("analytics-export",
+                                      args=["orders", "csv"]),
+                              {"end": "today"})
+        self.assertEqual(response.status_code, 400)
+
+    def testExportHistoryCommand(self):
+        """
+        Tests whether the management command writes the history.
+        """
+        Order.objects.update(isHistory=True)
+        output = io.StringIO()
+        call_command("export_history", "orders", stdout=output)
+
+        self.assertEqual(len(output.getvalue().splitlines()), 2)
+        with self.assertRaises(CommandError):
+            call_command("export_history", "orders", "--start=today")
+
+    def testSendSalesReportWithInvalidDates(self):
+        """
+        Tests whether invalid dates are rejected.
+        """
+        client = Client()
+        for query in [{"start": "yesterday"},
+                      {"start": "2018-03-02", "end": "2018-03-01"}]:
+            response = client.get(reverse("analytics-sales"), query)
+            self.assertEqual(response.status_code, 400)
@@ -0,0 +1,9 @@
+from django.conf.urls import url
+
+from . import views
+
+urlpatterns = [
+    url(r'^sales$', views.sendSalesReport, name='analytics-sales'),
+    url(r'^export/(?P<kind>orders|bookings)\.(?P<format>csv|jsonl)$',
+        views.exportHistory, name='analytics-export'),
+]
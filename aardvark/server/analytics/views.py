@@ -0,0 +1,80 @@
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.utils import timezone
+from server.codec import encodeResponse
+from .export import iterExport, CONTENT_TYPES
+from .sales import getSalesReport
+
+import datetime
+
+
+def sendSalesReport(request):
+    """
+    Sends the quantity sold and the revenue between two dates, in total
+    and broken down by day, hour, food type, table and item, in the form:
+
+    {"quantity": number,
+     "revenue": number,
+     "days": {date: {"quantity": number, "revenue": number}, ...},
+     "hours": {hour: {"quantity": number, "revenue": number}, ...},
+     "types": {...}, "tables": {...}, "items": {...}}.
+
+    The dates are given by the "start" and "end" query parameters (in the
+    YYYY-MM-DD format, both inclusive), the last 30 days by default.
+
+    :param request: A django request object.
+    :return: An HTTP response object containing the report.
+    """
+    if request.method == "GET":
+        try:
+            end = _parseDate(request.GET.get("end"), timezone.localdate())
+            start = _parseDate(request.GET.get("start"),
+                               end - datetime.timedelta(days=29))
+        except ValueError:
+            return HttpResponseBadRequest("The dates must be YYYY-MM-DD.")
+
+        if start > end:
+            return HttpResponseBadRequest("The start is after the end.")
+
+        return encodeResponse(request, getSalesReport(start, end))
+
+
+def exportHistory(request, kind, format):
+    """
+    Streams the order or booking history as CSV or JSON Lines, e.g. from
+    "analytics/export/orders.csv". The rows are sent as they are read from
+    the database, so a history of any size is exported in flat memory.
+
+    The dates are given by the optional "start" and "end" query parameters
+    (in the YYYY-MM-DD format, both inclusive), the whole history by
+    default.
+
+    :param request: A django request object.
+    :param kind: The history exported, either "orders" or "bookings".
+    :param format: The format of the export, either "csv" or "jsonl".
+    :return: A streaming HTTP response object of the history.
+    """
+    if request.method == "GET":
+        try:
+            start = _parseDate(request.GET.get("start"), None)
+            end = _parseDate(request.GET.get("end"), None)
+        except ValueError:
+            return HttpResponseBadRequest("The dates must be YYYY-MM-DD.")
+
+        lines = (line.encode("utf-8")
+                 for line in iterExport(kind, format, start, end))
+        response = StreamingHttpResponse(lines,
+                                         content_type=CONTENT_TYPES[format])
+        response["Content-Disposition"] = \
+            'attachment; filename="{}.{}"'.format(kind, format)
+        return response
+
+
+def _parseDate(text, default):
+    """
+    :param text: A date in the YYYY-MM-DD format (or None).
+    :param default: The date returned when there is no text.
+    :return: The date object.
+    """
+    if text is None:
+        return default
+    return datetime.datetime.strptime(text, "%Y-%m-%d").date()
@@ -1,4 +1,5 @@
 from django.contrib import admin
-from .models import Booking, BookingAdmin
+from .models import Booking, BookingAdmin, Slot, SlotAdmin
 
 admin.site.register(Booking, BookingAdmin)
+admin.site.register(Slot, SlotAdmin)
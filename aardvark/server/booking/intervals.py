@@ -0,0 +1,125 @@
+import bisect
+import datetime
+from itertools import accumulate
+
+from django.db.models import Q
+
+from .models import Booking, MAX_DURATION
+
+
+def getInterval(date, time, duration):
+    """
+    :param date: The date of a booking.
+    :param time: The time of the booking.
+    :param duration: The amount of minutes the table is held for.
+    :return: A <start, end> tuple of the datetimes the table is held from
+             and until (the end excluded, so that back to back bookings do
+             not overlap).
+    """
+    start = datetime.datetime.combine(date, time)
+    return start, start + datetime.timedelta(minutes=duration)
+
+
+class IntervalIndex:
+    """
+    The intervals the tables are booked for. The intervals of a table are
+    kept sorted by start, along with the running maximum of their ends, so
+    that whether a table is free over a window is answered with a single
+    bisection in O(log n) time, even when some of its intervals overlap.
+    """
+
+    def __init__(self, intervals=()):
+        """
+        :param intervals: An iterable of <table id, start, end> tuples.
+        """
+        tableToIntervals = {}
+        for table, start, end in intervals:
+            tableToIntervals.setdefault(table, []).append((start, end))
+
+        self._starts = {}
+        self._ends = {}
+        self._reaches = {}
+        for table, tableIntervals in tableToIntervals.items():
+            tableIntervals.sort()
+            self._starts[table] = [start for start, end in tableIntervals]
+            self._ends[table] = [end for start, end in tableIntervals]
+            self._reaches[table] = list(accumulate(self._ends[table], max))
+
+    def add(self, table, start, end):
+        """
+        Adds an interval a table is booked for, in O(n) time at worst (the
+        running maximums after it are updated until one is unchanged).
+
+        :param table: The id of the table.
+        :param start: The start of the interval.
+        :param end: The end of the interval (excluded).
+        """
+        starts = self._starts.setdefault(table, [])
+        ends = self._ends.setdefault(table, [])
+        reaches = self._reaches.setdefault(table, [])
+
+        i = bisect.bisect_right(starts, start)
+        starts.insert(i, start)
+        ends.insert(i, end)
+        reaches.insert(i, max(reaches[i - 1], end) if i else end)
+        for j in range(i + 1, len(reaches)):
+            reach = max(reaches[j - 1], ends[j])
+            if reach == reaches[j]:
+                break
+            reaches[j] = reach
+
+    def isFree(self, table, start, end):
+        """
+        :param table: The id of the table.
+        :param start: The start of the window.
+        :param end: The end of the window (excluded).
+        :return: Whether no interval of the table overlaps the window.
+        """
+        starts = self._starts.get(table)
+        if not starts:
+            return True
+
+        # The intervals starting before the window ends overlap it unless
+        # they all end before it starts
+        i = bisect.bisect_left(starts, end)
+        return i == 0 or self._reaches[table][i - 1] <= start
+
+    def getFreeTables(self, tables, start, end):
+        """
+        :param tables: An iterable of the table ids.
+        :param start: The start of the window.
+        :param end: The end of the window (excluded).
+        :return: A list of the ids of the tables free over the window.
+        """
+        return [table for table in tables if self.isFree(table, start, end)]
+
+
+def getBookingIntervals(bookings):
+    """
+    :param bookings: A queryset of the bookings.
+    :return: A generator of the <table id, start, end> tuples of the
+             bookings of a table, fetched in a single query.
+    """
+    for table, date, time, duration in (bookings.exclude(table=None)
+                                                .values_list("table", "date",
+                                                             "time",
+                                                             "duration")):
+        yield (table,) + getInterval(date, time, duration)
+
+
+def getOverlappingBookings(start, end):
+    """
+    Filters the bookings overlapping a window in the database, those that
+    start before the window ends and end after it starts.
+
+    :param start: The start of the window.
+    :param end: The end of the window (excluded).
+    :return: A queryset of the bookings.
+    """
+    # Bounding the dates first lets the database narrow them down by index
+    earliest = start - datetime.timedelta(minutes=MAX_DURATION)
+    return Booking.objects.filter(
+        Q(date__lt=end.date()) | Q(date=end.date(), time__lt=end.time()),
+        Q(endDate__gt=start.date()) | Q(endDate=start.date(),
+                                        endTime__gt=start.time()),
+        date__range=(earliest.date(), end.date()))
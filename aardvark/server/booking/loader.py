@@ -0,0 +1,202 @@
+import datetime
+import itertools
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from events.broker import publish
+from table.models import Table
+from .intervals import IntervalIndex, getBookingIntervals, getInterval
+from .models import Booking, _generateID
+from .slots import getSchedule
+
+
+# The fields of a booking given by a row, in the order of a CSV row
+FIELDS = ("name", "email", "phone", "date", "time", "table")
+
+# The amount of rows validated and written at once (so that the tables of a
+# chunk stay below the limit of query parameters of SQLite)
+CHUNK_SIZE = 400
+
+# The amount of rejected rows whose errors are reported
+MAX_ERRORS = 100
+
+
+def cleanRow(row, numberToTable):
+    """
+    Validates a row against the fields of the Booking model and the slot
+    schedule, without querying the database.
+
+    :param row: A list of the fields (in the order of FIELDS) or a dictionary
+                that maps field name to value (other fields are ignored).
+    :param numberToTable: A dictionary that maps table number to Table.
+    :return: A dictionary that maps field name to its cleaned value (along
+             with the "duration" of the slot).
+    :raises ValidationError: If the row is malformed or a field is invalid.
+    """
+    if isinstance(row, dict):
+        row = [row.get(field, "") for field in FIELDS]
+    elif not isinstance(row, (list, tuple)) or len(row) != len(FIELDS):
+        raise ValidationError("Expected the {} fields: {}".format(
+            len(FIELDS), ", ".join(FIELDS)))
+
+    data = {}
+    errors = []
+    for name, value in zip(FIELDS[:-1], row):
+        try:
+            data[name] = Booking._meta.get_field(name).clean(value, None)
+        except ValidationError as error:
+            errors.extend("{}: {}".format(name, message)
+                          for message in error.messages)
+
+    if "date" in data and "time" in data:
+        schedule = getSchedule()
+        index = schedule.getIndex(data["date"], data["time"])
+        if index is None:
+            errors.append("time: There is no slot at {:%H:%M} on "
+                          "{:%A}s.".format(data["time"], data["date"]))
+        else:
+            data["duration"] = schedule.getDuration(data["date"], index)
+
+    try:
+        data["table"] = numberToTable[int(row[-1])]
+    except (KeyError, TypeError, ValueError):
+        errors.append("table: Table {} does not exist.".format(row[-1]))
+
+    if errors:
+        raise ValidationError(errors)
+    return data
+
+
+def loadBookings(rows):
+    """
+    Books tables from a stream of rows, in a single transaction. The rows
+    are validated and written a chunk at a time: the bookings of a chunk are
+    checked against the existing bookings in one query (and against the
+    earlier rows), their references are allocated together and they are
+    inserted with a bulk insert.
+
+    A row booking a table over a booking of the table (already made or from
+    an earlier row) is rejected, while the other rows are still booked.
+
+    :param rows: An iterable of <line number, row> tuples, where a row is
+                 accepted by cleanRow.
+    :return: The report of the load, a dictionary of the amount of bookings
+             "inserted" along with their "references" (a list of <line
+             number, reference> lists), the amount of "rejected" rows and
+             the "errors" of the first rejected rows (a list of <line number,
+             message> lists).
+    :raises IntegrityError: If a slot was booked by someone else during the
+                            load, in which case nothing is booked.
+    """
+    report = {"inserted": 0, "rejected": 0, "errors": [], "references": []}
+    numberToTable = {table.number: table for table in Table.objects.all()}
+    created = []
+
+    with transaction.atomic():
+        rows = iter(rows)
+        while True:
+            chunk = list(itertools.islice(rows, CHUNK_SIZE))
+            if not chunk:
+                break
+
+            lineToData = []
+            for line, row in chunk:
+                try:
+                    lineToData.append((line, cleanRow(row, numberToTable)))
+                except ValidationError as error:
+                    _reject(report, line, "; ".join(error.messages))
+
+            _insertChunk(lineToData, created, report)
+
+    # Published once the bookings are committed, in the form updateBooking
+    # publishes them (a subscriber falling behind a large load is resynced)
+    for event in created:
+        publish("booking-created", event)
+    return report
+
+
+def _insertChunk(lineToData, created, report):
+    """
+    Inserts the bookings of a chunk of validated rows whose table is free
+    over their slot.
+
+    The bookings of the earlier chunks are already in the database (in the
+    transaction of the load), and are checked along with the others.
+
+    :param lineToData: A list of <line number, cleaned fields> tuples.
+    :param created: The list of the booking-created events of the load,
+                    updated in place.
+    :param report: The report of the load, updated in place.
+    """
+    if not lineToData:
+        return
+
+    # The bookings of the day before may run past midnight
+    tables = {data["table"] for line, data in lineToData}
+    dates = [data["date"] for line, data in lineToData]
+    existing = Booking.objects.filter(
+        table__in=tables,
+        date__range=(min(dates) - datetime.timedelta(days=1), max(dates)))
+    index = IntervalIndex(getBookingIntervals(existing))
+
+    freeRows = []
+    for line, data in lineToData:
+        table = data["table"].pk
+        start, end = getInterval(data["date"], data["time"], data["duration"])
+        if not index.isFree(table, start, end):
+            _reject(report, line, "Table {} is already booked on {} at "
+                                  "{:%H:%M}.".format(data["table"].number,
+                                                     data["date"],
+                                                     data["time"]))
+        else:
+            index.add(table, start, end)
+            freeRows.append((line, data))
+
+    references = _allocateReferences(len(freeRows))
+    bookings = [Booking(reference=reference, **data)
+                for reference, (line, data) in zip(references, freeRows)]
+    for booking in bookings:
+        booking.updateEnd()
+    Booking.objects.bulk_create(bookings)
+
+    created.extend({"reference": reference,
+                    "table": data["table"].number,
+                    "date": data["date"].isoformat(),
+                    "time": "{:%H:%M}".format(data["time"])}
+                   for reference, (line, data) in zip(references, freeRows))
+    report["inserted"] += len(freeRows)
+    report["references"].extend(
+        [line, reference]
+        for reference, (line, data) in zip(references, freeRows))
+
+
+def _allocateReferences(amount):
+    """
+    Generates unique booking references, checking a whole batch of them
+    against the database at once rather than one at a time.
+
+    :param amount: The amount of references.
+    :return: A list of references not used by any booking.
+    """
+    references = set()
+    while len(references) < amount:
+        candidates = {_generateID()
+                      for i in range(amount - len(references))} - references
+        taken = Booking.objects.filter(reference__in=candidates)
+        references |= candidates - set(taken.values_list("reference",
+                                                         flat=True))
+    return list(references)
+
+
+def _reject(report, line, message):
+    """
+    Counts a rejected row, reporting its error unless enough were.
+
+    :param report: The report of the load, updated in place.
+    :param line: The line number of the row.
+    :param message: The error of the row.
+    """
+    report["rejected"] += 1
+    if len(report["errors"]) < MAX_ERRORS:
+        report["errors"].append([line, message])
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from booking.loader import loadBookings
+from menu.loader import iterCsvRows
+
+
+class Command(BaseCommand):
+    """
+    Books tables from a CSV spreadsheet of bookings (one "name, email, phone,
+    date, time, table" row per line), in a single transaction.
+    """
+    help = "Loads a CSV file of bookings, booking their tables in one go."
+
+    def add_arguments(self, parser):
+        """
+        :param parser: The argument parser of the command.
+        """
+        parser.add_argument("path", help="The CSV file of the bookings.")
+        parser.add_argument("--delimiter",
+                            default=",",
+                            help="The character that separates the fields, "
+                                 "',' by default.")
+
+    def handle(self, *args, **options):
+        """
+        Runs the load.
+        """
+        try:
+            with open(options["path"], encoding="utf-8", newline="") as file:
+                report = loadBookings(iterCsvRows(file,
+                                                  options["delimiter"]))
+        except OSError as error:
+            raise CommandError(error)
+        except IntegrityError:
+            raise CommandError("A table was booked during the load, so "
+                               "nothing was booked. Try again.")
+
+        for line, message in report["errors"]:
+            self.stderr.write("Line {}: {}".format(line, message))
+        for line, reference in report["references"]:
+            self.stdout.write("Line {}: {}".format(line, reference))
+        self.stdout.write("Booked {inserted} and rejected {rejected} "
+                          "bookings.".format(**report))
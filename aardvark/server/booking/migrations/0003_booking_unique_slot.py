@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+def unbookDuplicates(apps, schema_editor):
+    """
+    Detaches the table from every booking of an already booked slot but the
+    first one, so that the slots can be made unique. The bookings themselves
+    (and their reference numbers) are kept, to be seated again by hand.
+    """
+    Booking = apps.get_model("booking", "Booking")
+    bookedSlots = set()
+    for booking in (Booking.objects.exclude(table=None)
+                                   .order_by("table", "date", "time", "pk")):
+        slot = (booking.table_id, booking.date, booking.time)
+        if slot in bookedSlots:
+            booking.table = None
+            booking.save(update_fields=["table"])
+        bookedSlots.add(slot)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0002_auto_20160503_2136'),
+    ]
+
+    operations = [
+        migrations.RunPython(unbookDuplicates, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='booking',
+            unique_together=set([('table', 'date', 'time')]),
+        ),
+    ]
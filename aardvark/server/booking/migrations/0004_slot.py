@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import datetime
+
+from django.db import migrations, models
+
+
+def createSlots(apps, schema_editor):
+    """
+    Creates the slots that used to be fixed (09:00, 11:00, 13:00 and 15:00,
+    two hours each) on every day of the week.
+    """
+    Slot = apps.get_model("booking", "Slot")
+    Slot.objects.bulk_create([Slot(weekday=weekday,
+                                   time=datetime.time(hour, 0),
+                                   duration=120)
+                              for weekday in range(7)
+                              for hour in (9, 11, 13, 15)])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0003_booking_unique_slot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Slot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('time', models.TimeField()),
+                ('duration', models.PositiveIntegerField(default=120)),
+            ],
+            options={
+                'ordering': ('weekday', 'time'),
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='slot',
+            unique_together=set([('weekday', 'time')]),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='time',
+            field=models.TimeField(),
+        ),
+        migrations.RunPython(createSlots, migrations.RunPython.noop),
+    ]
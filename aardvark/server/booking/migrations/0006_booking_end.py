@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import datetime
+
+from django.db import migrations, models
+
+
+def setEnds(apps, schema_editor):
+    """
+    Sets the end of the existing bookings from their start and duration.
+    """
+    Booking = apps.get_model("booking", "Booking")
+    for booking in Booking.objects.all():
+        end = (datetime.datetime.combine(booking.date, booking.time) +
+               datetime.timedelta(minutes=booking.duration))
+        booking.endDate, booking.endTime = end.date(), end.time()
+        booking.save(update_fields=["endDate", "endTime"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0005_booking_duration'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='endDate',
+            field=models.DateField(default=datetime.date(2000, 1, 1), editable=False),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='endTime',
+            field=models.TimeField(default=datetime.time(0, 0), editable=False),
+            preserve_default=False,
+        ),
+        migrations.RunPython(setEnds, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 import datetime
 
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.contrib import admin
 from django.utils.crypto import get_random_string
@@ -7,6 +9,11 @@ from django.utils.crypto import get_random_string
 import string
 
 
+# The longest a table can be held for, in minutes (so that only the bookings
+# of the day before can reach into a day)
+MAX_DURATION = 24 * 60
+
+
 def _generateID():
     """
     Generates an id number using some random generation.
@@ -41,22 +48,25 @@ class Booking(models.Model):
         :phone:         The phone number of the customer
         :date:          The date of the booking.
         :time:          The time of the booking.
+        :duration:      The amount of minutes the table is held for.
+        :endDate:       The date the table is held until.
+        :endTime:       The time the table is held until (excluded).
         :table:         The table associated with the booking.
         :reference:     The reference number of the booking.
     """
-    TIMES = (
-        (datetime.time(9, 0), datetime.time(9, 0)),
-        (datetime.time(11, 0), datetime.time(11, 0)),
-        (datetime.time(13, 0), datetime.time(13, 0)),
-        (datetime.time(15, 0), datetime.time(15, 0)),
-    )
-
     name = models.CharField(max_length=50, blank=False)
     email = models.EmailField(blank=False)
     phone = models.CharField(max_length=13, blank=False)
 
     date = models.DateField(blank=False)
-    time = models.TimeField(blank=False, choices=TIMES)
+    time = models.TimeField(blank=False)
+    duration = models.PositiveIntegerField(
+        default=120, validators=[MinValueValidator(1),
+                                 MaxValueValidator(MAX_DURATION)])
+    # Derived from the start and duration upon saving, so that the bookings
+    # overlapping a window are filtered by the database
+    endDate = models.DateField(editable=False)
+    endTime = models.TimeField(editable=False)
     table = models.ForeignKey("table.Table",
                               blank=False,
                               null=True,
@@ -72,11 +82,94 @@ class Booking(models.Model):
         """
         return str(self.name)
 
+    def save(self, *args, **kwargs):
+        """
+        Saves the booking along with its end.
+        """
+        self.updateEnd()
+        super().save(*args, **kwargs)
+
+    def updateEnd(self):
+        """
+        Sets the end of the booking from its date, time and duration (the
+        bulk inserts, which do not save every booking, set it themselves).
+        """
+        start = datetime.datetime.combine(
+            self._meta.get_field("date").to_python(self.date),
+            self._meta.get_field("time").to_python(self.time))
+        end = start + datetime.timedelta(minutes=int(self.duration))
+        self.endDate, self.endTime = end.date(), end.time()
+
+    def clean(self):
+        """
+        Validates that the booking is at a slot of the schedule.
+        """
+        from .slots import getSchedule
+
+        if (isinstance(self.date, datetime.date) and
+                isinstance(self.time, datetime.time) and
+                getSchedule().getIndex(self.date, self.time) is None):
+            raise ValidationError({"time": "There is no slot at {:%H:%M} "
+                                           "on {:%A}s.".format(self.time,
+                                                                self.date)})
+
     class Meta:
         """
         Meta data for the booking model.
         """
         ordering = ("name",)
+        # A table can only be booked once per slot
+        unique_together = (("table", "date", "time"),)
+
+
+class Slot(models.Model):
+    """
+    Model that represents a service slot, a time tables can be booked at on
+    a day of the week.
+
+    Attributes:
+        :weekday:       The day of the week of the slot (0 being Monday).
+        :time:          The time the slot starts at.
+        :duration:      The amount of minutes a table is held for.
+    """
+    WEEKDAYS = (
+        (0, "Monday"),
+        (1, "Tuesday"),
+        (2, "Wednesday"),
+        (3, "Thursday"),
+        (4, "Friday"),
+        (5, "Saturday"),
+        (6, "Sunday"),
+    )
+
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAYS)
+    time = models.TimeField(blank=False)
+    duration = models.PositiveIntegerField(
+        default=120, validators=[MinValueValidator(1),
+                                 MaxValueValidator(MAX_DURATION)])
+
+    def __str__(self):
+        """
+        Overriding the built-in python convert to string magic method
+
+        :return: The weekday and time of the slot.
+        """
+        return "{} {:%H:%M}".format(self.get_weekday_display(), self.time)
+
+    class Meta:
+        """
+        Meta data for the slot model.
+        """
+        ordering = ("weekday", "time")
+        unique_together = (("weekday", "time"),)
+
+
+class SlotAdmin(admin.ModelAdmin):
+    list_display = ("weekday", "time", "duration")
+    ordering = ("weekday", "time")
+    list_per_page = 25
+
+    list_filter = ("weekday",)
 
 
 class BookingAdmin(admin.ModelAdmin):
@@ -0,0 +1,127 @@
+import bisect
+import itertools
+import math
+from collections import defaultdict
+
+from table.models import Table
+from .intervals import getInterval, getOverlappingBookings
+
+
+# The greatest distance between two tables of the same section for them to be
+# pushed together (a little over the spacing of the tables placed on a grid)
+ADJACENT_DISTANCE = 120
+
+
+def getFreeTables(date, time, duration, tables=None):
+    """
+    :param date: The date of a slot.
+    :param time: The time of a slot.
+    :param duration: The amount of minutes the slot lasts.
+    :param tables: A queryset of the tables to choose from (every table by
+                   default).
+    :return: A list of the tables (in the order of the queryset) no booking
+             overlaps the slot, fetched in a single query.
+    """
+    start, end = getInterval(date, time, duration)
+    # The unassigned bookings are left out, as NOT IN matches nothing once
+    # the subquery holds a NULL
+    booked = (getOverlappingBookings(start, end).exclude(table=None)
+                                                .values("table"))
+    if tables is None:
+        tables = Table.objects.all()
+    return list(tables.exclude(pk__in=booked))
+
+
+def findAdjacentTables(tables):
+    """
+    Finds the pairs of tables that can be pushed together, being placed
+    within ADJACENT_DISTANCE of each other in the same section.
+
+    The tables are bucketed into square cells of that side, so that a table
+    is only compared with the tables of its neighbouring cells rather than
+    with every table.
+
+    :param tables: An iterable of the tables (any objects with the number,
+                   size, x, y and section of a Table).
+    :return: A list of <table, table> tuples.
+    """
+    cells = defaultdict(list)
+    for table in tables:
+        if table.x is not None and table.y is not None:
+            cell = (table.section, int(table.x // ADJACENT_DISTANCE),
+                    int(table.y // ADJACENT_DISTANCE))
+            cells[cell].append(table)
+
+    pairs = []
+    for (section, column, row), cellTables in cells.items():
+        for dx, dy in itertools.product((-1, 0, 1), repeat=2):
+            neighbours = cells.get((section, column + dx, row + dy), ())
+            for table, other in itertools.product(cellTables, neighbours):
+                if (table.number < other.number and
+                        math.hypot(table.x - other.x, table.y - other.y)
+                        <= ADJACENT_DISTANCE):
+                    pairs.append((table, other))
+    return pairs
+
+
+def allocateSeating(tables, parties):
+    """
+    Seats parties at the free tables of a slot, maximising the covers (the
+    amount of guests seated) and then keeping the larger tables free.
+
+    The parties are seated from the largest to the smallest, each at the
+    smallest free table it fits at. As a party fits every table at least as
+    large as it, this is an optimal matching of the parties to single tables
+    (and takes O((p + t) log t) time rather than a general assignment's
+    cubic time). The parties too large for any table left are then seated
+    at the smallest pair of adjacent free tables they fit at.
+
+    :param tables: An iterable of the free tables (any objects with the
+                   number, size, x, y and section of a Table).
+    :param parties: A list of the party sizes.
+    :return: A list of the tables of every party (in the order of the
+             parties), each a tuple of the table numbers (empty when the
+             party could not be seated).
+    """
+    freeTables = sorted(tables, key=lambda table: (table.size, table.number))
+    sizes = [table.size for table in freeTables]
+    seating = [()] * len(parties)
+    unseated = []
+
+    for i in sorted(range(len(parties)), key=lambda i: -parties[i]):
+        j = bisect.bisect_left(sizes, parties[i])
+        if j < len(freeTables):
+            seating[i] = (freeTables.pop(j).number,)
+            del sizes[j]
+        else:
+            unseated.append(i)
+
+    if unseated:
+        pairs = sorted((table.size + other.size, table.number, other.number)
+                       for table, other in findAdjacentTables(freeTables))
+        capacities = [pair[0] for pair in pairs]
+        freeNumbers = {table.number for table in freeTables}
+
+        for i in unseated:
+            j = bisect.bisect_left(capacities, parties[i])
+            while j < len(pairs) and not freeNumbers.issuperset(pairs[j][1:]):
+                j += 1
+            if j < len(pairs):
+                seating[i] = pairs[j][1:]
+                freeNumbers.difference_update(pairs[j][1:])
+    return seating
+
+
+def suggestSeating(date, time, duration, parties):
+    """
+    Suggests where to seat parties at a slot, among the tables not booked.
+
+    :param date: The date of the slot.
+    :param time: The time of the slot.
+    :param duration: The amount of minutes the slot lasts.
+    :param parties: A list of the party sizes.
+    :return: A list of the tables of every party (see allocateSeating).
+    """
+    tables = Table.objects.only("number", "size", "x", "y", "section")
+    return allocateSeating(getFreeTables(date, time, duration, tables),
+                           parties)
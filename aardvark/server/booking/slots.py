@@ -0,0 +1,133 @@
+import datetime
+import threading
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from server.compression import invalidateCachedPayload
+from .intervals import getBookingIntervals, getInterval
+from .models import Booking, Slot
+
+
+class SlotSchedule:
+    """
+    The service slots of every day of the week, loaded once and kept in
+    compact arrays: the slots of a weekday are numbered by time, so that a
+    slot is looked up by its time in O(1) time and the bookings of a table
+    on a day are held as the bits of a single integer.
+    """
+
+    def __init__(self, slots):
+        """
+        :param slots: An iterable of the Slot objects.
+        """
+        self.times = [[] for weekday in Slot.WEEKDAYS]
+        self.durations = [[] for weekday in Slot.WEEKDAYS]
+        for slot in sorted(slots, key=lambda slot: (slot.weekday, slot.time)):
+            self.times[slot.weekday].append(slot.time)
+            self.durations[slot.weekday].append(slot.duration)
+
+        # Maps both the time and its "HH:MM" text to the index of the slot
+        self._indices = []
+        for times in self.times:
+            indices = {}
+            for index, time in enumerate(times):
+                indices[time] = indices["{:%H:%M}".format(time)] = index
+            self._indices.append(indices)
+
+    def getIndex(self, date, time):
+        """
+        :param date: The date of a booking.
+        :param time: The time of the booking, either a time or its "HH:MM"
+                     (or "H:MM") text.
+        :return: The index of the slot at the time on the weekday of the
+                 date, or None if there is none.
+        """
+        if isinstance(time, str):
+            time = time.zfill(5)
+        return self._indices[date.weekday()].get(time)
+
+    def getTime(self, date, index):
+        """
+        :param date: The date of a booking.
+        :param index: The index of a slot on the weekday of the date.
+        :return: The time of the slot.
+        """
+        return self.times[date.weekday()][index]
+
+    def getDuration(self, date, index):
+        """
+        :param date: The date of a booking.
+        :param index: The index of a slot on the weekday of the date.
+        :return: The amount of minutes a table is held for at the slot.
+        """
+        return self.durations[date.weekday()][index]
+
+    def getBookedSlots(self, date):
+        """
+        Gets the slots of a day every table is booked at, in a single query.
+        A table is booked at a slot when one of its bookings overlaps it
+        (including the bookings of the day before running past midnight).
+
+        :param date: The date of the bookings.
+        :return: A dictionary that maps table id to an integer whose bits
+                 are set at the indices of the booked slots.
+        """
+        weekday = date.weekday()
+        windows = [getInterval(date, time, duration) for time, duration
+                   in zip(self.times[weekday], self.durations[weekday])]
+
+        bookedSlots = {}
+        bookings = Booking.objects.filter(
+            date__range=(date - datetime.timedelta(days=1), date))
+        for table, start, end in getBookingIntervals(bookings):
+            for index, (slotStart, slotEnd) in enumerate(windows):
+                if start < slotEnd and slotStart < end:
+                    bookedSlots[table] = bookedSlots.get(table, 0) | 1 << index
+        return bookedSlots
+
+    def serialize(self):
+        """
+        :return: The schedule in the form sent to the clients, a list of the
+                 slots of every weekday (Monday first), each being a
+                 dictionary of its "time" ("HH:MM") and "duration" (in
+                 minutes).
+        """
+        return [[{"time": "{:%H:%M}".format(time), "duration": duration}
+                 for time, duration in zip(times, durations)]
+                for times, durations in zip(self.times, self.durations)]
+
+
+_schedule = None
+_lock = threading.Lock()
+
+
+def getSchedule():
+    """
+    Gets the slot schedule shared by the whole process, loading it from the
+    database upon first use.
+
+    :return: The shared SlotSchedule object.
+    """
+    global _schedule
+
+    schedule = _schedule
+    if schedule is None:
+        with _lock:
+            if _schedule is None:
+                _schedule = SlotSchedule(Slot.objects.all())
+            schedule = _schedule
+    return schedule
+
+
+@receiver(post_save, sender=Slot)
+@receiver(post_delete, sender=Slot)
+def resetSchedule(sender, **kwargs):
+    """
+    Reloads the schedule (and resends it to the clients) once a slot is
+    changed.
+    """
+    global _schedule
+
+    _schedule = None
+    invalidateCachedPayload("booking:slots")
@@ -1,8 +1,15 @@
 from django.core.urlresolvers import reverse
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client
 from django.core.exceptions import ValidationError
-
-from .models import Booking
+from django.core.management import call_command, CommandError
+from django.db import connection, IntegrityError
+from django.test.utils import CaptureQueriesContext
+
+from .intervals import IntervalIndex, getOverlappingBookings
+from .loader import cleanRow, loadBookings, CHUNK_SIZE
+from .models import Booking, Slot
+from .seating import allocateSeating, findAdjacentTables
+from .slots import SlotSchedule, getSchedule, resetSchedule
 from .views import updateBooking
 from table.models import Table
 
@@ -11,7 +18,10 @@ from model_mommy import mommy
 from copy import deepcopy
 
 import datetime
+import io
 import json
+import tempfile
+import threading
 
 ################################ UNITTESTS TESTS ###############################
 
@@ -81,6 +91,17 @@ class BookingModelTests(TestCase):
             invalidDate.clean_fields()
             invalidTimeChoice.clean_fields()
 
+    def testCleanSlot(self):
+        """
+        Tests whether a booking must be at a slot of the schedule.
+        """
+        self.validBooking.full_clean()
+
+        self.validBooking.time = "10:00"
+        with self.assertRaises(ValidationError) as context:
+            self.validBooking.full_clean()
+        self.assertIn("time", context.exception.message_dict)
+
     def testUniqueReferenceNumber(self):
         """
         Tests whether model instances have unique reference numbers
@@ -115,7 +136,7 @@ class ViewTests(TestCase):
                             "phone": "07472440699",
                             "email": "programmerK@gmail.com",
                             "date":  "2016-04-03",
-                            "time":  "23:15",
+                            "time":  "13:00",
                             "table": self.mockTable}
 
     @patch("booking.views.Booking")
@@ -128,7 +149,9 @@ class ViewTests(TestCase):
         mockRequest = MagicMock()
         mockRequest.method = "POST"
 
-        mockTable.objects.filter.return_value = [self.mockTable]
+        (mockTable.objects.select_for_update.return_value
+                          .filter.return_value
+                          .first.return_value) = self.mockTable
         mockBooking.objects.create.return_value = MagicMock(reference="112")
 
         with patch("booking.views.json.loads") as mockJsonLoad:
@@ -138,12 +161,342 @@ class ViewTests(TestCase):
         data = json.loads(response.content.decode("utf-8"))
         refNum = data["reference"]
 
-        createArgs = [call(**self.bookingData)]
+        createArgs = [call(**dict(self.bookingData,
+                                  date=datetime.date(2016, 4, 3),
+                                  time=datetime.time(13, 0),
+                                  duration=120))]
 
         self.assertEqual(mockBooking.objects.create.call_args_list, createArgs)
         self.assertEqual(refNum, "112")
 
 
+class SlotScheduleTests(TestCase):
+    """
+    Unit tests for the slots module.
+    """
+
+    def setUp(self):
+        """
+        Creates a schedule of two slots on Mondays and one on Sundays.
+        """
+        self.schedule = SlotSchedule(
+            [Slot(weekday=0, time=datetime.time(19, 0), duration=90),
+             Slot(weekday=6, time=datetime.time(12, 0)),
+             Slot(weekday=0, time=datetime.time(9, 30))])
+        self.monday = datetime.date(2030, 4, 29)
+
+    def testGetIndex(self):
+        """
+        Tests whether the slots of a day are numbered by time, and looked up
+        by both their time and its text.
+        """
+        self.assertEqual(self.schedule.getIndex(self.monday, "09:30"), 0)
+        self.assertEqual(self.schedule.getIndex(self.monday, "9:30"), 0)
+        self.assertEqual(self.schedule.getIndex(self.monday,
+                                                datetime.time(19, 0)), 1)
+        self.assertIsNone(self.schedule.getIndex(self.monday, "12:00"))
+        self.assertEqual(self.schedule.getTime(self.monday, 1),
+                         datetime.time(19, 0))
+
+    def testGetBookedSlots(self):
+        """
+        Tests whether the slots overlapped by the bookings of every table are
+        set as bits.
+        """
+        table1 = Table.objects.create(number=1, size=2)
+        table2 = Table.objects.create(number=2, size=2)
+        table3 = Table.objects.create(number=3, size=2)
+        for table, time in [(table1, "09:30"), (table1, "19:00"),
+                            (table2, "19:00")]:
+            mommy.make(Booking, table=table, date=self.monday, time=time)
+        # Overlapping the 09:30 slot from the night before
+        mommy.make(Booking, table=table3,
+                   date=self.monday - datetime.timedelta(1),
+                   time=datetime.time(23, 0), duration=720)
+
+        self.assertEqual(self.schedule.getBookedSlots(self.monday),
+                         {table1.pk: 0b11, table2.pk: 0b10,
+                          table3.pk: 0b01})
+        self.assertEqual(self.schedule.getBookedSlots(
+            self.monday + datetime.timedelta(1)), {})
+
+    def testSerialize(self):
+        """
+        Tests whether the schedule is serialized per weekday.
+        """
+        slots = self.schedule.serialize()
+        self.assertEqual(len(slots), 7)
+        self.assertEqual(slots[0], [{"time": "09:30", "duration": 120},
+                                    {"time": "19:00", "duration": 90}])
+        self.assertEqual(slots[1], [])
+
+    def testResetSchedule(self):
+        """
+        Tests whether the shared schedule is reloaded once a slot changes.
+        """
+        self.addCleanup(resetSchedule, Slot)
+        schedule = getSchedule()
+        self.assertIs(getSchedule(), schedule)
+
+        Slot.objects.create(weekday=0, time=datetime.time(21, 0))
+        self.assertIsNot(getSchedule(), schedule)
+        self.assertEqual(getSchedule().getIndex(self.monday, "21:00"), 4)
+
+
+class IntervalIndexTests(TestCase):
+    """
+    Unit tests for the intervals module.
+    """
+
+    def setUp(self):
+        """
+        Creates an index of two bookings of table 1 and two overlapping
+        bookings of table 2.
+        """
+        self.index = IntervalIndex([(1, self.hour(13), self.hour(15)),
+                                    (1, self.hour(9), self.hour(11)),
+                                    (2, self.hour(10), self.hour(18)),
+                                    (2, self.hour(11), self.hour(12))])
+
+    def hour(self, hour):
+        """
+        :return: The datetime of an hour of 2030-05-01.
+        """
+        return datetime.datetime(2030, 5, 1) + datetime.timedelta(hours=hour)
+
+    def testIsFree(self):
+        """
+        Tests whether a window is free unless a booking of the table
+        overlaps it, back to back bookings not overlapping.
+        """
+        for table, start, end, isFree in [(1, 11, 13, True),
+                                          (1, 10, 12, False),
+                                          (1, 14, 16, False),
+                                          (1, 8, 20, False),
+                                          (1, 15, 17, True),
+                                          (2, 12, 13, False),
+                                          (2, 18, 19, True),
+                                          (3, 12, 13, True)]:
+            self.assertEqual(self.index.isFree(table, self.hour(start),
+                                               self.hour(end)), isFree,
+                             (table, start, end))
+
+    def testAdd(self):
+        """
+        Tests whether the added bookings are found, including a long booking
+        overlapping later ones.
+        """
+        self.index.add(1, self.hour(11), self.hour(13))
+        self.assertFalse(self.index.isFree(1, self.hour(12), self.hour(14)))
+
+        self.index.add(3, self.hour(16), self.hour(17))
+        self.index.add(3, self.hour(8), self.hour(22))
+        self.assertFalse(self.index.isFree(3, self.hour(18), self.hour(19)))
+        self.assertTrue(self.index.isFree(3, self.hour(22), self.hour(23)))
+
+    def testGetFreeTables(self):
+        """
+        Tests whether the tables free over a window are found.
+        """
+        self.assertEqual(self.index.getFreeTables([1, 2, 3], self.hour(11),
+                                                  self.hour(13)), [1, 3])
+
+    def testGetOverlappingBookings(self):
+        """
+        Tests whether the database finds the bookings overlapping a window
+        as the index does, including a booking of the day before running
+        past midnight.
+        """
+        tables = {number: mommy.make("table.Table", number=number)
+                  for number in (1, 2, 3)}
+        for number, hour, duration in [(1, 13, 120), (1, 9, 120),
+                                       (2, 10, 480), (2, 11, 60),
+                                       (3, -1, 180)]:
+            start = self.hour(hour)
+            Booking.objects.create(name="sherlock", phone="07472440699",
+                                   email="programmerK@gmail.com",
+                                   date=start.date(), time=start.time(),
+                                   duration=duration, table=tables[number])
+
+        for start, end, numbers in [(11, 13, {2}), (10, 12, {1, 2}),
+                                    (14, 16, {1, 2}), (15, 17, {2}),
+                                    (18, 19, set()), (1, 2, {3}),
+                                    (2, 9, set())]:
+            bookings = getOverlappingBookings(self.hour(start),
+                                              self.hour(end))
+            self.assertEqual({booking.table.number for booking in bookings},
+                             numbers, (start, end))
+
+
+class LoaderTests(TestCase):
+    """
+    Unit tests for the loader module.
+    """
+
+    def setUp(self):
+        """
+        Creates some tables, one of them booked.
+        """
+        self.tables = {number: Table.objects.create(number=number, size=4)
+                       for number in range(1, 4)}
+        Booking.objects.create(name="sherlock", phone="07472440699",
+                               email="sherlock@bakers.com",
+                               date="2030-05-01", time="09:00",
+                               table=self.tables[1])
+
+    def createRow(self, table, time="11:00", name="watson"):
+        """
+        :return: A row booking a table on 2030-05-01.
+        """
+        return [name, name + "@bakers.com", "07472440699", "2030-05-01",
+                time, str(table)]
+
+    def testCleanRow(self):
+        """
+        Tests whether the fields of a row are validated.
+        """
+        data = cleanRow(self.createRow(2), self.tables)
+        self.assertEqual(data["time"], datetime.time(11, 0))
+        self.assertEqual(data["duration"], 120)
+        self.assertEqual(data["table"], self.tables[2])
+
+        for row in [self.createRow(2)[:-1],
+                    self.createRow(9),
+                    self.createRow(2, time="12:00"),
+                    dict(zip(["name", "email"], self.createRow(2)))]:
+            with self.assertRaises(ValidationError):
+                cleanRow(row, self.tables)
+
+    def testLoadBookings(self):
+        """
+        Tests whether the free slots are booked, while the invalid rows and
+        the slots booked already (or earlier in the load) are rejected.
+        """
+        rows = [(1, self.createRow(2)),
+                (2, self.createRow(1, time="09:00")),
+                (3, self.createRow(2, name="hudson")),
+                (4, self.createRow(3, time="noon")),
+                (5, self.createRow(1))]
+
+        with patch("booking.loader.publish") as mockPublish:
+            report = loadBookings(rows)
+
+        self.assertEqual(report["inserted"], 2)
+        self.assertEqual(report["rejected"], 3)
+        self.assertEqual([line for line, message in report["errors"]],
+                         [4, 2, 3])
+        self.assertIn("already booked", report["errors"][1][1])
+        self.assertEqual(
+            [(line, Booking.objects.get(reference=reference).table.number)
+             for line, reference in report["references"]], [(1, 2), (5, 1)])
+        self.assertEqual(
+            mockPublish.call_args_list,
+            [call("booking-created", {"reference": reference,
+                                      "table": table, "date": "2030-05-01",
+                                      "time": "11:00"})
+             for (line, reference), table in zip(report["references"],
+                                                 [2, 1])])
+
+    def testLoadOverlappingBookings(self):
+        """
+        Tests whether the rows overlapping a longer booking of the table are
+        rejected.
+        """
+        Booking.objects.create(name="sherlock", phone="07472440699",
+                               email="sherlock@bakers.com",
+                               date="2030-05-01", time="10:00",
+                               duration=120, table=self.tables[2])
+
+        with patch("booking.loader.publish"):
+            report = loadBookings([(1, self.createRow(2)),
+                                   (2, self.createRow(2, time="13:00"))])
+
+        self.assertEqual(report["inserted"], 1)
+        self.assertEqual([line for line, message in report["errors"]], [1])
+
+    def testLoadBookingsInChunks(self):
+        """
+        Tests whether thousands of bookings are loaded with an amount of
+        queries that grows with the amount of chunks rather than of rows,
+        each with its own reference.
+        """
+        for number in range(4, 501):
+            self.tables[number] = Table.objects.create(number=number, size=2)
+        rows = [(i, self.createRow(number, time))
+                for i, (number, time) in enumerate(
+                    (number, time) for number in range(1, 501)
+                    for time in ["09:00", "11:00", "13:00", "15:00"])]
+        chunks = -(-len(rows) // CHUNK_SIZE)
+
+        with CaptureQueriesContext(connection) as queries:
+            report = loadBookings(rows)
+
+        self.assertEqual(report["inserted"], len(rows) - 1)
+        self.assertEqual(report["rejected"], 1)
+        self.assertEqual(Booking.objects.count(), len(rows))
+        self.assertEqual(len(set(Booking.objects.values_list("reference",
+                                                             flat=True))),
+                         len(rows))
+        # The tables and a savepoint, then a select of the booked slots, a
+        # select of the references and a few bulk inserts (as many as the
+        # columns of the bookings take) per chunk
+        self.assertLessEqual(len(queries), 3 + 7 * chunks)
+
+
+class SeatingTests(TestCase):
+    """
+    Unit tests for the seating module.
+    """
+
+    def setUp(self):
+        """
+        Declares a row of tables (2, 4, 4 and 6 seats) in the main room and
+        a table of 8 seats on the terrace, next to the last one.
+        """
+        self.tables = [Table(number=number, size=size, x=x, y=0,
+                             section=section)
+                       for number, size, x, section in [
+                           (1, 2, 0, ""), (2, 4, 100, ""), (3, 4, 200, ""),
+                           (4, 6, 300, ""), (5, 8, 400, "Terrace")]]
+
+    def testFindAdjacentTables(self):
+        """
+        Tests whether the tables next to each other in the same section are
+        paired, and the unplaced tables ignored.
+        """
+        self.tables.append(Table(number=6, size=2, section=""))
+        pairs = findAdjacentTables(self.tables)
+
+        self.assertEqual(sorted((table.number, other.number)
+                                for table, other in pairs),
+                         [(1, 2), (2, 3), (3, 4)])
+
+    def testAllocateSeating(self):
+        """
+        Tests whether the parties are seated at the smallest tables they fit
+        at, the largest parties first.
+        """
+        self.assertEqual(allocateSeating(self.tables, [3, 7, 2, 3, 4]),
+                         [(3,), (5,), (1,), (4,), (2,)])
+        self.assertEqual(allocateSeating(self.tables, [2, 2, 2]),
+                         [(1,), (2,), (3,)])
+
+    def testAllocateSeatingCombined(self):
+        """
+        Tests whether the parties too large for a single table are seated at
+        two adjacent tables, and whether the parties that do not fit are
+        left unseated.
+        """
+        self.assertEqual(allocateSeating(self.tables, [10, 8, 2, 20]),
+                         [(3, 4), (5,), (1,), ()])
+
+    def testAllocateSeatingNoTables(self):
+        """
+        Tests whether no party is seated without tables.
+        """
+        self.assertEqual(allocateSeating([], [2, 4]), [(), ()])
+
+
 ############################### INTEGRATION TESTS ##############################
 
 
@@ -199,6 +552,18 @@ class IntegrationTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(validBooking.time, datetime.time(9, 0))
 
+    def testSendSlotsToClient(self):
+        """
+        Tests whether the server sends the slots of every weekday.
+        """
+        client = Client()
+        response = client.get(reverse("booking-slots"))
+        data = json.loads(response.content.decode("utf-8"))
+
+        self.assertEqual(len(data["slots"]), 7)
+        self.assertEqual([slot["time"] for slot in data["slots"][2]],
+                         ["09:00", "11:00", "13:00", "15:00"])
+
     def testSendBookingSizesToClient(self):
         """
         Tests whether the server is able to calculate booking sizes for a
@@ -210,6 +575,29 @@ class IntegrationTests(TestCase):
         data = json.loads(response.content.decode("utf-8"))
         self.assertListEqual(data["sizes"], self.sizesAvailable)
 
+        param["time"] = "10:00"
+        response = client.get(reverse("booking-sizes"), param)
+        self.assertEqual(response.status_code, 400)
+
+    def testSendSeatingToClient(self):
+        """
+        Tests whether the server suggests where to seat parties among the
+        tables not booked at a slot.
+        """
+        client = Client()
+        param = {"date": "2030-05-01", "time": "13:00", "parties": "2,4,3"}
+        response = client.get(reverse("booking-seating"), param)
+        data = json.loads(response.content.decode("utf-8"))
+
+        self.assertEqual(data["seating"], [{"party": 2, "tables": [1]},
+                                           {"party": 4, "tables": [3]},
+                                           {"party": 3, "tables": []}])
+        self.assertEqual(data["covers"], 6)
+
+        param["parties"] = "two"
+        response = client.get(reverse("booking-seating"), param)
+        self.assertEqual(response.status_code, 400)
+
     def testSendBookingTablesToClient(self):
         """
         Tests whether the server is able to calculate booking tables for a
@@ -221,3 +609,178 @@ class IntegrationTests(TestCase):
         data = json.loads(response.content.decode("utf-8"))
         self.assertListEqual(data["tables"], self.tablesAvailable)
 
+        param["size"] = "2"
+        response = client.get(reverse("booking-tables"), param)
+        data = json.loads(response.content.decode("utf-8"))
+        self.assertListEqual(data["tables"], ["2", "3"])
+
+    def testReceiveConflictingBooking(self):
+        """
+        Tests whether booking a table that is already booked at the slot is
+        refused, along with the free tables of the size or larger.
+        """
+        Table.objects.create(number=4, size=3)
+        client = Client()
+        bookingData = dict(self.bookingData, date="2030-05-01", time="13:00",
+                           table="2")
+
+        response = client.post(reverse("booking-update"),
+                               json.dumps(bookingData),
+                               content_type="application/json")
+        data = json.loads(response.content.decode("utf-8"))
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(data["reference"], "ERROR")
+        self.assertEqual(data["alternatives"], [{"number": 4, "size": 3},
+                                                {"number": 3, "size": 5}])
+        self.assertFalse(Booking.objects.filter(name="watson").exists())
+
+    def testReceiveOverlappingBooking(self):
+        """
+        Tests whether a table held over a slot by a longer booking is neither
+        offered nor booked, while a back to back booking is.
+        """
+        Booking.objects.create(name="hudson", phone="07472440699",
+                               email="programmerK@gmail.com",
+                               date="2030-05-01", time="10:00",
+                               duration=150, table=Table.objects.get(number=3))
+        client = Client()
+
+        param = {"date": "2030-05-01", "time": "11:00", "size": "2"}
+        response = client.get(reverse("booking-tables"), param)
+        data = json.loads(response.content.decode("utf-8"))
+        self.assertListEqual(data["tables"], ["1", "2"])
+
+        bookingData = dict(self.bookingData, date="2030-05-01")
+        response = client.post(reverse("booking-update"),
+                               json.dumps(bookingData),
+                               content_type="application/json")
+        self.assertEqual(response.status_code, 409)
+
+        response = client.post(reverse("booking-update"),
+                               json.dumps(dict(bookingData, table="1")),
+                               content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Booking.objects.get(name="watson").duration, 120)
+
+    def testReceiveInvalidBooking(self):
+        """
+        Tests whether bookings of an unknown table or at a time that is not
+        a slot are rejected.
+        """
+        client = Client()
+        for bookingData in [dict(self.bookingData, table="9"),
+                            dict(self.bookingData, time="noon"),
+                            dict(self.bookingData, time="10:00")]:
+            response = client.post(reverse("booking-update"),
+                                   json.dumps(bookingData),
+                                   content_type="application/json")
+            self.assertEqual(response.status_code, 400)
+
+
+    def testReceiveCsvBookingsFromClient(self):
+        """
+        Tests whether the server is able to receive a CSV batch of bookings
+        and report the bookings made.
+        """
+        csvBookings = ("watson,watson@bakers.com,07472440699,2030-05-01,"
+                       "09:00,3\n"
+                       "hudson,hudson@bakers.com,07472440699,2030-05-01,"
+                       "09:00,1\n")
+
+        client = Client()
+        response = client.post(reverse("booking-batch"), csvBookings,
+                               content_type="text/csv")
+        report = json.loads(response.content.decode("utf-8"))
+
+        self.assertEqual([report["inserted"], report["rejected"]], [1, 1])
+        self.assertEqual(Booking.objects.get(name="watson").reference,
+                         report["references"][0][1])
+
+    def testReceiveJsonBookingsFromClient(self):
+        """
+        Tests whether the server is able to receive a JSON batch of bookings,
+        and whether a slot booked during the load is reported as a conflict.
+        """
+        client = Client()
+        bookings = json.dumps({"bookings": [self.bookingData]})
+        response = client.post(reverse("booking-batch"), bookings,
+                               content_type="application/json")
+        self.assertEqual(json.loads(response.content.decode("utf-8"))
+                         ["inserted"], 1)
+
+        with patch("booking.views.loadBookings", side_effect=IntegrityError):
+            response = client.post(reverse("booking-batch"), bookings,
+                                   content_type="application/json")
+        self.assertEqual(response.status_code, 409)
+
+        response = client.post(reverse("booking-batch"), "[]",
+                               content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+    def testLoadBookingsCommand(self):
+        """
+        Tests whether the management command loads a CSV file of bookings.
+        """
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as file:
+            file.write("watson,watson@bakers.com,07472440699,2030-05-01,"
+                       "09:00,3\n")
+            file.flush()
+
+            output = io.StringIO()
+            call_command("load_bookings", file.name, stdout=output)
+
+        self.assertIn("Booked 1 and rejected 0", output.getvalue())
+        self.assertTrue(Booking.objects.filter(name="watson").exists())
+        with self.assertRaises(CommandError):
+            call_command("load_bookings", file.name)
+
+
+class ConcurrencyTests(TransactionTestCase):
+    """
+    Stress tests of booking the same slot from several clients at once.
+    """
+
+    # The amount of clients booking at once
+    CLIENTS = 8
+
+    def testConcurrentBookings(self):
+        """
+        Tests whether a single booking of a slot booked concurrently
+        succeeds, and whether the others are refused with an alternative.
+        """
+        Table.objects.create(number=1, size=2)
+        Table.objects.create(number=2, size=2)
+        bookingData = {"name": "watson",
+                       "phone": "07472440699",
+                       "email": "programmerK@gmail.com",
+                       "date": "2030-05-01",
+                       "time": "11:00",
+                       "table": "1"}
+
+        barrier = threading.Barrier(self.CLIENTS)
+        responses = []
+
+        def book():
+            try:
+                barrier.wait(5)
+                responses.append(Client().post(
+                    reverse("booking-update"), json.dumps(bookingData),
+                    content_type="application/json"))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book) for i in range(self.CLIENTS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        statuses = sorted(response.status_code for response in responses)
+        self.assertEqual(statuses, [200] + [409] * (self.CLIENTS - 1))
+        self.assertEqual(Booking.objects.count(), 1)
+        for response in responses:
+            if response.status_code == 409:
+                data = json.loads(response.content.decode("utf-8"))
+                self.assertEqual(data["alternatives"],
+                                 [{"number": 2, "size": 2}])
@@ -4,6 +4,9 @@ from . import views
 
 urlpatterns = [
     url(r'^update$', views.updateBooking, name='booking-update'),
+    url(r'^batch$', views.updateBookings, name='booking-batch'),
+    url(r'^slots$', views.sendSlots, name='booking-slots'),
     url(r'^sizes$', views.sendBookingSizes, name='booking-sizes'),
     url(r'^tables$', views.sendBookingTables, name='booking-tables'),
+    url(r'^seating$', views.sendSeating, name='booking-seating'),
 ]
@@ -1,9 +1,28 @@
-from django.http import HttpResponse
+from django.db import IntegrityError, OperationalError, transaction
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.utils.dateparse import parse_date
+from server.codec import encodeResponse
+from server.compression import sendCachedPayload
+from events.broker import publish
+from menu.loader import iterCsvRows
+from .intervals import getInterval, getOverlappingBookings
+from .loader import loadBookings
 from .models import Booking
+from .seating import getFreeTables, suggestSeating
+from .slots import getSchedule
 from table.models import Table
 
+import codecs
 import json
-from datetime import datetime
+import random
+from time import sleep
+
+
+# The amount of times a booking is attempted while the database is busy with
+# other bookings (e.g. SQLite lets a single transaction write at once), and
+# the longest delay in seconds before the first retry (doubled every retry)
+BOOKING_ATTEMPTS = 5
+BOOKING_RETRY_DELAY = 0.05
 
 
 def updateBooking(request):
@@ -19,6 +38,17 @@ def updateBooking(request):
                   "time": value5,
                   "table": value6}}.
 
+    The booking holds the table for the duration of its slot. It is made in
+    a transaction (retried while the database is busy with other bookings),
+    and is refused when another booking of the table overlaps it. When the
+    table was booked in the meantime (e.g. by another host), the response
+    has the status 409 and holds the tables still free over the slot,
+    computed in the same transaction, in the form:
+
+    {"reference": "ERROR",
+     "error": string,
+     "alternatives": [{"number": number, "size": number}, ...]}.
+
     :param request: A django request object.
     :return: An HTTP response object containing the reference number.
     """
@@ -27,17 +57,150 @@ def updateBooking(request):
     if request.method == "POST":
         data = json.loads(request.body.decode("utf-8"))
 
-        booking = {"name": data["name"],
-                   "email": data["email"],
-                   "phone": data["phone"],
-                   "date": data["date"],
-                   "time": data["time"],
-                   "table": Table.objects.filter(number=data["table"])[0] }
+        schedule = getSchedule()
+        try:
+            date, index = _parseSlot(schedule, data["date"], data["time"])
+        except ValueError:
+            return HttpResponseBadRequest("The date must be YYYY-MM-DD and "
+                                          "the time a slot of that day.")
+        time = schedule.getTime(date, index)
+        duration = schedule.getDuration(date, index)
+
+        for attempt in range(BOOKING_ATTEMPTS):
+            try:
+                return _createBooking(request, data, date, time, duration)
+            except OperationalError:
+                if attempt == BOOKING_ATTEMPTS - 1:
+                    raise
+                sleep(BOOKING_RETRY_DELAY * 2 ** attempt * random.random())
+
+    return encodeResponse(request, refNum)
 
-        booking = Booking.objects.create(**booking)
-        refNum["reference"] = booking.reference
 
-    return HttpResponse(json.dumps(refNum), content_type="application/json")
+def _createBooking(request, data, date, time, duration):
+    """
+    Books a table in a transaction, refusing it along with the tables still
+    free if a booking of the table overlaps it (see updateBooking).
+
+    :param request: A django request object.
+    :param data: The dictionary of the booking data.
+    :param date: The date of the booking.
+    :param time: The time of the booking.
+    :param duration: The amount of minutes the table is held for.
+    :return: An HTTP response object containing the reference number.
+    """
+    with transaction.atomic():
+        # Locking the table serialises the bookings of the table, so that
+        # no overlapping booking is made between the check and the insert
+        table = (Table.objects.select_for_update()
+                              .filter(number=data["table"]).first())
+        if table is None:
+            return HttpResponseBadRequest("The table does not exist.")
+
+        booking = None
+        start, end = getInterval(date, time, duration)
+        overlapping = getOverlappingBookings(start, end).filter(table=table)
+        if not overlapping.exists():
+            try:
+                # A savepoint, so that the transaction can still be queried
+                # after a conflict
+                with transaction.atomic():
+                    booking = Booking.objects.create(name=data["name"],
+                                                     email=data["email"],
+                                                     phone=data["phone"],
+                                                     date=date,
+                                                     time=time,
+                                                     duration=duration,
+                                                     table=table)
+            except IntegrityError:
+                pass
+
+        if booking is None:
+            freeTables = getFreeTables(
+                date, time, duration,
+                Table.objects.filter(size__gte=table.size)
+                             .order_by("size", "number"))
+            conflict = {"reference": "ERROR",
+                        "error": "The table is already booked.",
+                        "alternatives": [{"number": free.number,
+                                          "size": free.size}
+                                         for free in freeTables]}
+            return encodeResponse(request, conflict, status=409)
+
+    publish("booking-created", {"reference": booking.reference,
+                                "table": table.number,
+                                "date": data["date"],
+                                "time": data["time"]})
+    return encodeResponse(request, {"reference": booking.reference})
+
+def updateBookings(request):
+    """
+    Receives a batch of bookings (e.g. of a large party or an event) and
+    books them in a single transaction. The bookings received are either in
+    JSON formatting, specifically in the form:
+
+    {"bookings" : [{"name": name,
+                    "email": email,
+                    "phone": phone,
+                    "date": date,
+                    "time": time,
+                    "table": number},
+                   ...]},
+
+    or, when the content type is "text/csv", in CSV formatting (one
+    "name, email, phone, date, time, table" row per line) which is parsed as
+    it is read.
+
+    :param request: A django request object.
+    :return: An HTTP response object containing the report of the load, in
+             the form:
+
+             {"inserted": number,
+              "rejected": number,
+              "errors": [[line, message], ...],
+              "references": [[line, reference], ...]},
+
+             or with the status 409 if a slot was booked by someone else
+             during the load (in which case nothing is booked).
+    """
+    if request.method == "POST":
+        if request.content_type == "text/csv":
+            rows = iterCsvRows(codecs.iterdecode(request, "utf-8"), ",")
+        else:
+            try:
+                data = json.loads(request.body.decode("utf-8"))
+                rows = enumerate(data["bookings"], 1)
+            except (ValueError, KeyError, TypeError):
+                return HttpResponseBadRequest("The bookings must be JSON or "
+                                              "CSV.")
+
+        try:
+            report = loadBookings(rows)
+        except IntegrityError:
+            return encodeResponse(request, {"error": "A table was booked "
+                                                     "during the load."},
+                                  status=409)
+        return encodeResponse(request, report)
+
+    return HttpResponse()
+
+
+def sendSlots(request):
+    """
+    Sends the service slots of every day of the week, in the form:
+
+    {"slots": [[{"time": "HH:MM", "duration": minutes}, ...], ...]},
+
+    a list of the slots of every weekday (Monday first).
+
+    :param request: A django request object.
+    :return: An HTTP response object containing the slots.
+    """
+    if request.method == "GET":
+        return sendCachedPayload(
+            request, "booking:slots",
+            lambda codec: codec.encode({"slots": getSchedule().serialize()}))
+
 
 def sendBookingSizes(request):
     """
@@ -48,53 +211,105 @@ def sendBookingSizes(request):
     :return: An HTTP response object containing the booking slots.
     """
     if request.method == "GET":
-        date = datetime.strptime(request.GET["date"], "%Y-%m-%d").date()
-        time = datetime.strptime(request.GET["time"], "%H:%M").time()
-        bookings = Booking.objects.filter(date=date, time=time)
-
-        bookedTables = []
-        for booking in bookings:
-            bookedTables.append(booking.table)
+        schedule = getSchedule()
+        try:
+            date, index = _parseSlot(schedule, request.GET["date"],
+                                     request.GET["time"])
+        except (KeyError, ValueError):
+            return HttpResponseBadRequest("The date must be YYYY-MM-DD and "
+                                          "the time a slot of that day.")
 
-        sizes = []
-        for table in Table.objects.all():
-            if table not in bookedTables:
-                sizes.append(str(table.size))
+        bookedSlots = schedule.getBookedSlots(date)
+        sizes = [str(size) for pk, size
+                 in Table.objects.order_by("pk").values_list("pk", "size")
+                 if not bookedSlots.get(pk, 0) >> index & 1]
 
         freeSlots = {"sizes": sizes}
-        data = json.dumps(freeSlots)
-        return HttpResponse(data, content_type="application/json")
+        return encodeResponse(request, freeSlots)
 
 
 def sendBookingTables(request):
     """
     Searches the database by date, time and size for all available tables
-    then returns the results as an HTTP object.
+    the size fits at, smallest first, then returns the results as an HTTP
+    object.
 
     :param request: A django request object.
     :return: An HTTP response object containing the booking slots.
     """
     if request.method == "GET":
-        date = datetime.strptime(request.GET["date"], "%Y-%m-%d").date()
-        time = datetime.strptime(request.GET["time"], "%H:%M").time()
-        bookings = Booking.objects.filter(date=date, time=time)
+        schedule = getSchedule()
+        try:
+            date, index = _parseSlot(schedule, request.GET["date"],
+                                     request.GET["time"])
+            size = int(request.GET["size"])
+        except (KeyError, ValueError):
+            return HttpResponseBadRequest("The date must be YYYY-MM-DD, the "
+                                          "time a slot of that day and the "
+                                          "size a number.")
 
-        bookedTables = []
-        for booking in bookings:
-            bookedTables.append(booking.table)
+        bookedSlots = schedule.getBookedSlots(date)
+        tables = (Table.objects.filter(size__gte=size)
+                               .order_by("size", "number")
+                               .values_list("pk", "number"))
+        freeSlots = {"tables": [str(number) for pk, number in tables
+                                if not bookedSlots.get(pk, 0) >> index & 1]}
+        return encodeResponse(request, freeSlots)
 
-        tables = []
-        size = int(request.GET["size"])
-        for table in Table.objects.all():
-            if table not in bookedTables and table.size == size:
-                tables.append(str(table.number))
 
-        freeSlots = {"tables": tables}
-        data = json.dumps(freeSlots)
-        return HttpResponse(data, content_type="application/json")
+def sendSeating(request):
+    """
+    Suggests where to seat parties at a slot among the tables no booking
+    overlaps, seating as many guests as possible at the smallest tables they
+    fit at (or at two adjacent tables pushed together), and sends the
+    suggestion in the form:
 
+    {"seating": [{"party": size, "tables": [number, ...]}, ...],
+     "covers": number}.
 
+    The parties are given by the "parties" query parameter as a comma
+    separated list of sizes, and are sent back in the same order (with no
+    tables when they could not be seated).
 
+    :param request: A django request object.
+    :return: An HTTP response object containing the suggested seating.
+    """
+    if request.method == "GET":
+        schedule = getSchedule()
+        try:
+            date, index = _parseSlot(schedule, request.GET["date"],
+                                     request.GET["time"])
+            parties = [int(size) for size
+                       in request.GET["parties"].split(",") if size]
+        except (KeyError, ValueError):
+            return HttpResponseBadRequest("The date must be YYYY-MM-DD, the "
+                                          "time a slot of that day and the "
+                                          "parties a list of sizes.")
 
+        seating = suggestSeating(date, schedule.getTime(date, index),
+                                 schedule.getDuration(date, index), parties)
+        return encodeResponse(request, {
+            "seating": [{"party": size, "tables": list(tables)}
+                        for size, tables in zip(parties, seating)],
+            "covers": sum(size for size, tables in zip(parties, seating)
+                          if tables)})
 
 
+def _parseSlot(schedule, dateText, timeText):
+    """
+    Parses the date and time of a booking into a slot of the schedule,
+    without parsing the time (which is looked up by its text).
+
+    :param schedule: The SlotSchedule.
+    :param dateText: The date, in the form "YYYY-MM-DD".
+    :param timeText: The time, in the form "HH:MM".
+    :return: A <date, index of the slot on the day> tuple.
+    :raises ValueError: If the date is malformed or there is no slot at the
+                        time on the day.
+    """
+    date = parse_date(dateText) if isinstance(dateText, str) else None
+    index = schedule.getIndex(date, timeText) if date else None
+    if index is None:
+        raise ValueError("There is no slot at {} on {}.".format(timeText,
+                                                                dateText))
+    return date, index
@@ -0,0 +1,225 @@
+import itertools
+import json
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class Event:
+    """
+    A change published to the subscribers (e.g. an order being created).
+
+    Attributes:
+        :id:        The increasing number of the event.
+        :type:      The type of the event (e.g. "order-created").
+        :data:      The JSON serializable data of the event.
+    """
+
+    def __init__(self, id, type, data):
+        """
+        :param id: The increasing number of the event.
+        :param type: The type of the event.
+        :param data: The JSON serializable data of the event.
+        """
+        self.id = id
+        self.type = type
+        self.data = data
+
+    def encode(self):
+        """
+        :return: The event in the server-sent events format.
+        """
+        data = json.dumps(self.data, cls=DjangoJSONEncoder)
+        return "id: {}\nevent: {}\ndata: {}\n\n".format(self.id, self.type,
+                                                        data)
+
+
+class Subscription:
+    """
+    The events waiting to be sent to a single subscriber.
+
+    The buffer is bounded so that a slow (or stalled) subscriber can never
+    hold on to an unbounded amount of memory. When it overflows, the oldest
+    events are dropped and counted so that the subscriber can be told to
+    fetch the current state again.
+
+    Attributes:
+        :types:     The event types subscribed to (all types when empty).
+        :dropped:   The amount of events dropped since the last pull.
+        :listener:  A function called (from the publishing thread) after an
+                    event is buffered, for subscribers that can not block
+                    in pull (e.g. an event loop), or None.
+    """
+
+    def __init__(self, broker, types, bufferSize):
+        """
+        :param broker: The Broker the subscription belongs to.
+        :param types: The event types subscribed to (all types when empty).
+        :param bufferSize: The maximum amount of events waiting to be sent.
+        """
+        self.broker = broker
+        self.types = frozenset(types)
+        self.dropped = 0
+        self.listener = None
+        self._events = deque(maxlen=bufferSize)
+        self._condition = threading.Condition()
+
+    def accepts(self, event):
+        """
+        :param event: An Event object.
+        :return: Whether the event is of a type subscribed to.
+        """
+        return not self.types or event.type in self.types
+
+    def push(self, event):
+        """
+        Adds an event to the buffer, dropping the oldest one if it is full.
+
+        :param event: An Event object.
+        """
+        with self._condition:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+            self._condition.notify()
+
+        listener = self.listener
+        if listener is not None:
+            listener()
+
+    def pull(self, timeout):
+        """
+        Takes all the buffered events, waiting for one if there is none.
+
+        :param timeout: The maximum amount of seconds to wait for an event.
+        :return: A tuple of the list of events (possibly empty) and the
+                 amount of events dropped since the last pull.
+        """
+        with self._condition:
+            if not self._events and not self.dropped:
+                self._condition.wait(timeout)
+
+            events = list(self._events)
+            dropped = self.dropped
+            self._events.clear()
+            self.dropped = 0
+        return events, dropped
+
+    def close(self):
+        """
+        Stops receiving events.
+        """
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """
+    An in-process publish/subscribe hub of events.
+
+    The most recent events are kept so that a subscriber reconnecting with
+    the id of the last event it received does not miss any.
+    """
+
+    def __init__(self, history=100, bufferSize=100):
+        """
+        :param history: The amount of recent events kept for reconnections.
+        :param bufferSize: The maximum amount of events waiting to be sent to
+                           each subscriber.
+        """
+        self.bufferSize = bufferSize
+        self._history = deque(maxlen=history)
+        self._subscriptions = set()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def publish(self, type, data):
+        """
+        Sends an event to every subscriber of its type.
+
+        :param type: The type of the event (e.g. "order-created").
+        :param data: The JSON serializable data of the event.
+        :return: The published Event object.
+        """
+        with self._lock:
+            event = Event(next(self._ids), type, data)
+            self._history.append(event)
+            subscriptions = list(self._subscriptions)
+
+        for subscription in subscriptions:
+            if subscription.accepts(event):
+                subscription.push(event)
+        return event
+
+    def subscribe(self, types=(), lastEventId=None):
+        """
+        Starts receiving events.
+
+        :param types: The event types to receive (all types when empty).
+        :param lastEventId: The id of the last event received before
+                            reconnecting, the recent events after it are
+                            sent again (the subscription counting the older
+                            ones as dropped).
+        :return: A Subscription object.
+        """
+        subscription = Subscription(self, types, self.bufferSize)
+
+        with self._lock:
+            self._subscriptions.add(subscription)
+            if lastEventId is not None:
+                # The events between the last one received and the oldest
+                # one kept are lost, counted as dropped so that the
+                # subscriber is told to fetch the current state again
+                if self._history:
+                    subscription.dropped = max(
+                        self._history[0].id - lastEventId - 1, 0)
+                for event in self._history:
+                    if event.id > lastEventId and subscription.accepts(event):
+                        subscription.push(event)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """
+        Stops sending events to a subscription.
+
+        :param subscription: A Subscription object.
+        """
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    @property
+    def subscriberCount(self):
+        """
+        :return: The amount of current subscriptions.
+        """
+        return len(self._subscriptions)
+
+
+_broker = None
+
+
+def getBroker():
+    """
+    Gets the broker shared by the whole process, creating it from the
+    EVENTS_HISTORY and EVENTS_BUFFER_SIZE settings upon first use.
+
+    :return: The shared Broker object.
+    """
+    global _broker
+
+    if _broker is None:
+        _broker = Broker(getattr(settings, "EVENTS_HISTORY", 100),
+                         getattr(settings, "EVENTS_BUFFER_SIZE", 100))
+    return _broker
+
+
+def publish(type, data):
+    """
+    Sends an event to every subscriber of its type.
+
+    :param type: The type of the event (e.g. "order-created").
+    :param data: The JSON serializable data of the event.
+    :return: The published Event object.
+    """
+    return getBroker().publish(type, data)
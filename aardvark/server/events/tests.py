@@ -0,0 +1,189 @@
+from django.core.urlresolvers import reverse
+from django.test import TestCase, Client, override_settings
+
+from . import broker
+from .broker import Broker, getBroker
+from menu.models import Food
+from table.models import Table
+
+import json
+
+################################ UNITTESTS TESTS ###############################
+
+
+class BrokerTests(TestCase):
+    """
+    Unit tests for the Broker and Subscription classes.
+    """
+
+    def setUp(self):
+        """
+        Creates a broker with small buffers.
+        """
+        self.broker = Broker(history=3, bufferSize=2)
+
+    def testPublishToSubscribedTypes(self):
+        """
+        Tests whether events are only sent to the subscribers of their type.
+        """
+        kitchen = self.broker.subscribe(["order-created"])
+        till = self.broker.subscribe()
+
+        self.broker.publish("order-created", {"table": 1})
+        self.broker.publish("bill-settled", {"table": 1})
+
+        events, dropped = kitchen.pull(0)
+        self.assertEqual([event.type for event in events], ["order-created"])
+
+        events, dropped = till.pull(0)
+        self.assertEqual([event.type for event in events],
+                         ["order-created", "bill-settled"])
+        self.assertEqual(till.pull(0), ([], 0))
+
+    def testBoundedBuffer(self):
+        """
+        Tests whether the oldest events are dropped (and counted) when a
+        subscriber does not keep up.
+        """
+        subscription = self.broker.subscribe()
+        for table in range(5):
+            self.broker.publish("order-created", {"table": table})
+
+        events, dropped = subscription.pull(0)
+        self.assertEqual([event.data["table"] for event in events], [3, 4])
+        self.assertEqual(dropped, 3)
+
+    def testReplayAfterReconnecting(self):
+        """
+        Tests whether a subscriber reconnecting receives the recent events
+        published after the last one it received.
+        """
+        events = [self.broker.publish("order-created", {"table": table})
+                  for table in range(3)]
+
+        subscription = self.broker.subscribe(lastEventId=events[0].id)
+        replayed, dropped = subscription.pull(0)
+        self.assertEqual(replayed, events[1:])
+        self.assertEqual(dropped, 0)
+
+    def testResyncAfterReconnectingLate(self):
+        """
+        Tests whether a subscriber reconnecting after its last event left the
+        history is told that the events in between were dropped.
+        """
+        broker = Broker(history=2)
+        events = [broker.publish("order-created", {"table": table})
+                  for table in range(5)]
+
+        subscription = broker.subscribe(lastEventId=events[0].id)
+        replayed, dropped = subscription.pull(0)
+        self.assertEqual(replayed, events[3:])
+        self.assertEqual(dropped, 2)
+
+    def testClose(self):
+        """
+        Tests whether a closed subscription stops receiving events.
+        """
+        subscription = self.broker.subscribe()
+        subscription.close()
+        self.broker.publish("order-created", {"table": 1})
+
+        self.assertEqual(self.broker.subscriberCount, 0)
+        self.assertEqual(subscription.pull(0), ([], 0))
+
+    def testListener(self):
+        """
+        Tests whether the listener of a subscription is told of the events
+        it receives.
+        """
+        subscription = self.broker.subscribe(["order-created"])
+        received = []
+        subscription.listener = lambda: received.append(True)
+
+        self.broker.publish("order-created", {"table": 1})
+        self.broker.publish("bill-settled", {"table": 1})
+        self.assertEqual(received, [True])
+
+
+############################### INTEGRATION TESTS ##############################
+
+
+@override_settings(EVENTS_HEARTBEAT=0.01)
+class IntegrationTests(TestCase):
+    """
+    Integration tests for the events app.
+    """
+
+    def setUp(self):
+        """
+        Replaces the shared broker and creates some entries in a mock
+        database.
+        """
+        broker._broker = None
+        Table.objects.create(number=1, size=2)
+        Food.objects.create(name="potato",
+                            type="main course",
+                            description="rather squary...",
+                            price="50.00")
+
+    def readEvent(self, stream):
+        """
+        Reads the next event from a stream, skipping heartbeats.
+
+        :param stream: The iterator of a streaming response.
+        :return: A dictionary of the fields of the event.
+        """
+        for chunk in stream:
+            if not chunk.startswith(b":"):
+                lines = chunk.decode("utf-8").strip().split("\n")
+                return dict(line.split(": ", 1) for line in lines)
+
+    def testStreamEvents(self):
+        """
+        Tests whether the orders and payments are pushed to a subscriber.
+        """
+        client = Client()
+        response = client.get(reverse("events-stream"))
+        stream = iter(response.streaming_content)
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(self.readEvent(stream), {"retry": "10"})
+
+        orderData = {"order": [{"table": 1, "food": "potato", "quantity": 2}]}
+        client.post(reverse("order-update"),
+                    json.dumps(orderData),
+                    content_type="application/json")
+        client.post(reverse("order-payment"), {"table": 1, "paid": "100"})
+
+        event = self.readEvent(stream)
+        self.assertEqual(event["event"], "order-created")
+        self.assertEqual(json.loads(event["data"]),
+                         {"table": 1,
+                          "items": [{"food": "potato", "quantity": 2}]})
+
+        event = self.readEvent(stream)
+        self.assertEqual(event["event"], "bill-settled")
+        self.assertEqual(json.loads(event["data"]),
+                         {"table": 1, "paid": "100"})
+
+        response.close()
+        self.assertEqual(getBroker().subscriberCount, 0)
+
+    def testStreamEventsOfTypes(self):
+        """
+        Tests whether a subscriber only receives the types it asked for,
+        including the ones it missed before reconnecting.
+        """
+        getBroker().publish("bill-settled", {"table": 1})
+        getBroker().publish("order-created", {"table": 1})
+
+        client = Client(HTTP_LAST_EVENT_ID="0")
+        response = client.get(reverse("events-stream"),
+                              {"types": "order-created"})
+        stream = iter(response.streaming_content)
+        self.readEvent(stream)
+
+        event = self.readEvent(stream)
+        self.assertEqual(event["id"], "2")
+        self.assertEqual(event["event"], "order-created")
+        response.close()
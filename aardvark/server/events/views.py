@@ -0,0 +1,153 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from server.asgihandler import asyncVariantOf
+from .broker import getBroker
+
+import asyncio
+import json
+
+
+def streamEvents(request):
+    """
+    Streams the order-created, bill-settled and booking-created events as
+    server-sent events, as they are published.
+
+    The "types" query parameter restricts the stream to a comma separated
+    list of event types (e.g. a kitchen display only needs
+    "order-created"). A client that reconnects with the Last-Event-ID header
+    receives the recent events it missed. A subscriber too slow to keep up
+    (or reconnecting after the events it missed are no longer kept) receives
+    a "resync" event telling it to fetch the current state again.
+
+    :param request: A django request object.
+    :return: A streaming HTTP response object of the events.
+    """
+    subscription = getBroker().subscribe(*_parseSubscription(request))
+    response = StreamingHttpResponse(_encodeEvents(subscription),
+                                     content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Stops proxies (e.g. nginx) from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@asyncVariantOf(streamEvents)
+async def streamEventsAsync(request, receive, send):
+    """
+    Streams the events like streamEvents, as an ASGI application served on
+    the event loop (see server.asgihandler), so that a subscriber waiting
+    for events holds no thread.
+
+    :param request: A django request object.
+    :param receive: The ASGI receive awaitable, telling when the client
+                    disconnects.
+    :param send: The ASGI send awaitable.
+    """
+    heartbeat = getattr(settings, "EVENTS_HEARTBEAT", 15)
+    loop = asyncio.get_event_loop()
+    wakeup = asyncio.Event()
+    disconnect = asyncio.ensure_future(_waitForDisconnect(receive))
+
+    subscription = getBroker().subscribe(*_parseSubscription(request))
+    subscription.listener = lambda: loop.call_soon_threadsafe(wakeup.set)
+
+    try:
+        await send({"type": "http.response.start",
+                    "status": 200,
+                    "headers": [(b"content-type", b"text/event-stream"),
+                                (b"cache-control", b"no-cache"),
+                                (b"x-accel-buffering", b"no")]})
+        await _sendChunk(send, "retry: {}\n\n".format(int(heartbeat * 1000)))
+
+        while not disconnect.done():
+            # Cleared before pulling, so that an event published after the
+            # pull is waited for
+            wakeup.clear()
+            chunks = _encodeChunks(*subscription.pull(0))
+            if chunks:
+                for chunk in chunks:
+                    await _sendChunk(send, chunk)
+                continue
+
+            waiting = asyncio.ensure_future(wakeup.wait())
+            await asyncio.wait([waiting, disconnect], timeout=heartbeat,
+                               return_when=asyncio.FIRST_COMPLETED)
+            waiting.cancel()
+            if not wakeup.is_set() and not disconnect.done():
+                await _sendChunk(send, ": heartbeat\n\n")
+    finally:
+        disconnect.cancel()
+        subscription.close()
+
+
+def _parseSubscription(request):
+    """
+    :param request: A django request object of the event stream.
+    :return: A <types, last event id> tuple of the arguments of
+             Broker.subscribe.
+    """
+    types = [type for type in request.GET.get("types", "").split(",") if type]
+
+    try:
+        lastEventId = int(request.META["HTTP_LAST_EVENT_ID"])
+    except (KeyError, ValueError):
+        lastEventId = None
+    return types, lastEventId
+
+
+def _encodeChunks(events, dropped):
+    """
+    :param events: A list of the events pulled from a subscription.
+    :param dropped: The amount of events dropped since the last pull.
+    :return: A list of the events in the server-sent events format (along
+             with a "resync" event first if some were dropped).
+    """
+    chunks = []
+    if dropped:
+        chunks.append("event: resync\ndata: {}\n\n".format(
+            json.dumps({"dropped": dropped})))
+    chunks.extend(event.encode() for event in events)
+    return chunks
+
+
+def _encodeEvents(subscription):
+    """
+    Encodes the events of a subscription in the server-sent events format,
+    sending a comment as a heartbeat whenever there is none for a while.
+
+    :param subscription: A Subscription object.
+    :return: A generator of the encoded events.
+    """
+    heartbeat = getattr(settings, "EVENTS_HEARTBEAT", 15)
+
+    try:
+        yield "retry: {}\n\n".format(int(heartbeat * 1000))
+
+        while True:
+            chunks = _encodeChunks(*subscription.pull(heartbeat))
+            for chunk in chunks or [": heartbeat\n\n"]:
+                yield chunk
+    finally:
+        subscription.close()
+
+
+async def _sendChunk(send, chunk):
+    """
+    Sends a part of a streamed ASGI response.
+
+    :param send: The ASGI send awaitable.
+    :param chunk: The text to send.
+    """
+    await send({"type": "http.response.body",
+                "body": chunk.encode("utf-8"),
+                "more_body": True})
+
+
+async def _waitForDisconnect(receive):
+    """
+    Waits until the client of an ASGI request disconnects.
+
+    :param receive: The ASGI receive awaitable.
+    """
+    while (await receive())["type"] != "http.disconnect":
+        pass
@@ -0,0 +1,160 @@
+import csv
+import itertools
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+
+from server.compression import invalidateCachedPayload
+from .models import Food
+
+
+# The fields of a food item given by a row, in the order of a CSV row
+FIELDS = ("name", "type", "description", "price")
+
+# The amount of rows validated and written at once (below the limit of query
+# parameters of SQLite)
+CHUNK_SIZE = 500
+
+# The amount of rejected rows whose errors are reported
+MAX_ERRORS = 100
+
+
+def iterCsvRows(lines, delimiter=";"):
+    """
+    Parses the rows of a CSV menu (in the form "name; type; description;
+    price", like test/manual/mock_menu.csv) one line at a time, skipping the
+    blank lines.
+
+    :param lines: An iterable of the lines of the CSV menu.
+    :param delimiter: The character that separates the fields.
+    :return: An iterator of <line number, list of fields> tuples.
+    """
+    reader = csv.reader(lines, delimiter=delimiter)
+    for row in reader:
+        if any(field.strip() for field in row):
+            yield reader.line_num, [field.strip() for field in row]
+
+
+def cleanRow(row):
+    """
+    Validates a row against the fields of the Food model, without querying
+    the database.
+
+    :param row: A list of the fields (in the order of FIELDS) or a dictionary
+                that maps field name to value (other fields are ignored).
+    :return: A dictionary that maps field name to its cleaned value.
+    :raises ValidationError: If the row is malformed or a field is invalid.
+    """
+    if isinstance(row, dict):
+        # Other fields (e.g. the popularity of a serialized menu) are left
+        # to the server
+        row = [row.get(field, "") for field in FIELDS]
+    elif not isinstance(row, (list, tuple)) or len(row) != len(FIELDS):
+        raise ValidationError("Expected the {} fields: {}".format(
+            len(FIELDS), ", ".join(FIELDS)))
+
+    data = {}
+    errors = []
+    for name, value in zip(FIELDS, row):
+        try:
+            data[name] = Food._meta.get_field(name).clean(value, None)
+        except ValidationError as error:
+            errors.extend("{}: {}".format(name, message)
+                          for message in error.messages)
+    if errors:
+        raise ValidationError(errors)
+    return data
+
+
+def loadMenu(rows):
+    """
+    Upserts food items by name from a stream of rows, in a single
+    transaction. The rows are validated and written a chunk at a time: the
+    existing food items of a chunk are fetched in one query, the new ones
+    inserted with a bulk insert and the changed ones updated with a single
+    batch of parameterized statements (Django 2.0 has no bulk update).
+
+    When a name is given more than once, its last row wins.
+
+    :param rows: An iterable of <line number, row> tuples, where a row is
+                 accepted by cleanRow.
+    :return: The report of the load, a dictionary of the amount of food
+             items "inserted" and "updated" (including the ones that did not
+             change), the amount of "rejected" rows and the "errors" of the
+             first rejected rows (a list of <line number, message> lists).
+    """
+    report = {"inserted": 0, "updated": 0, "rejected": 0, "errors": []}
+
+    with transaction.atomic():
+        rows = iter(rows)
+        while True:
+            chunk = list(itertools.islice(rows, CHUNK_SIZE))
+            if not chunk:
+                break
+
+            nameToData = {}
+            for line, row in chunk:
+                try:
+                    data = cleanRow(row)
+                except ValidationError as error:
+                    report["rejected"] += 1
+                    if len(report["errors"]) < MAX_ERRORS:
+                        report["errors"].append([line,
+                                                 "; ".join(error.messages)])
+                else:
+                    nameToData[data["name"]] = data
+
+            _upsertChunk(nameToData, report)
+
+    invalidateCachedPayload("menu:compact", "menu:serialized")
+    return report
+
+
+def _upsertChunk(nameToData, report):
+    """
+    Inserts or updates the food items of a chunk of validated rows.
+
+    :param nameToData: A dictionary that maps name to the cleaned fields.
+    :param report: The report of the load, updated in place.
+    """
+    existing = list(Food.objects.filter(name__in=list(nameToData))
+                                .values_list("pk", *FIELDS))
+
+    pkToData = {}
+    for pk, *fields in existing:
+        data = nameToData[fields[0]]
+        if fields != [data[name] for name in FIELDS]:
+            pkToData[pk] = data
+
+    updatedNames = {fields[0] for pk, *fields in existing}
+    newFood = [Food(**data) for name, data in nameToData.items()
+               if name not in updatedNames]
+    Food.objects.bulk_create(newFood)
+
+    if pkToData:
+        _updateFood(pkToData)
+
+    report["inserted"] += len(newFood)
+    report["updated"] += len(updatedNames)
+
+
+def _updateFood(pkToData):
+    """
+    Updates food items with a single batch (executemany) of the same
+    parameterized UPDATE statement, which is much cheaper than compiling an
+    ORM update per item. Like a queryset update, no signals are sent.
+
+    :param pkToData: A dictionary that maps food id to its cleaned fields.
+    """
+    fields = [Food._meta.get_field(name) for name in FIELDS[1:]]
+    quote = connection.ops.quote_name
+    sql = "UPDATE {} SET {} WHERE {} = %s".format(
+        quote(Food._meta.db_table),
+        ", ".join("{} = %s".format(quote(field.column)) for field in fields),
+        quote(Food._meta.pk.column))
+
+    params = [[field.get_db_prep_save(data[field.name], connection)
+               for field in fields] + [pk]
+              for pk, data in sorted(pkToData.items())]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from menu.loader import iterCsvRows, loadMenu
+
+
+class Command(BaseCommand):
+    """
+    Loads a CSV menu (one "name; type; description; price" row per line)
+    into the database, inserting the new food items and updating the ones
+    whose name already exists.
+    """
+    help = "Loads a CSV menu, upserting its food items by name."
+
+    def add_arguments(self, parser):
+        """
+        :param parser: The argument parser of the command.
+        """
+        parser.add_argument("path", help="The CSV file of the menu.")
+        parser.add_argument("--delimiter",
+                            default=";",
+                            help="The character that separates the fields, "
+                                 "';' by default.")
+
+    def handle(self, *args, **options):
+        """
+        Runs the load.
+        """
+        try:
+            with open(options["path"], encoding="utf-8", newline="") as file:
+                report = loadMenu(iterCsvRows(file, options["delimiter"]))
+        except OSError as error:
+            raise CommandError(error)
+
+        for line, message in report["errors"]:
+            self.stderr.write("Line {}: {}".format(line, message))
+        self.stdout.write("Inserted {inserted}, updated {updated} and "
+                          "rejected {rejected} food items.".format(**report))
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0004_auto_20160430_0007'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PopularityBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(db_index=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('food', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='popularityBuckets', to='menu.Food')),
+            ],
+            options={
+                'unique_together': {('food', 'hour')},
+            },
+        ),
+    ]
@@ -1,7 +1,11 @@
 from decimal import Decimal
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.contrib import admin
 
+from server.compression import invalidateCachedPayload
+
 
 class Food(models.Model):
     """
@@ -49,6 +53,38 @@ class Food(models.Model):
         ordering = ("name",)
 
 
+class PopularityBucket(models.Model):
+    """
+    Model that counts how many times a food item was ordered within an hour,
+    so that the popularity over a recent window is summed over a few buckets
+    rather than over the whole order history.
+
+    Attributes:
+        :food:      The food item ordered.
+        :hour:      The start of the hour the food was ordered in.
+        :count:     The amount of food ordered within the hour.
+    """
+    food = models.ForeignKey("Food",
+                             on_delete=models.CASCADE,
+                             related_name="popularityBuckets")
+    hour = models.DateTimeField(db_index=True)
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        """
+        Overriding the built-in python convert to string magic method
+
+        :return: The name of the food and the hour of the bucket.
+        """
+        return "{} ({})".format(self.food.name, self.hour)
+
+    class Meta:
+        """
+        Meta data for the popularity bucket model.
+        """
+        unique_together = ("food", "hour")
+
+
 class FoodAdmin(admin.ModelAdmin):
     list_display = ("name", "type", "price", "popularity")
     ordering = ("type", "name")
@@ -57,3 +93,12 @@ class FoodAdmin(admin.ModelAdmin):
     search_fields = ("name", "type", "description", "price", "popularity")
     list_filter = ("type", "price", "popularity")
     readonly_fields = ("popularity",)
+
+
+@receiver(post_save, sender=Food)
+@receiver(post_delete, sender=Food)
+def invalidateMenu(sender, **kwargs):
+    """
+    Removes the cached menu whenever a food item changes.
+    """
+    invalidateCachedPayload("menu:compact", "menu:serialized")
@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.utils import timezone
+
+from server.compression import invalidateCachedPayload
+from .models import Food, PopularityBucket
+
+
+# The windows the popularity can be computed over (to the hour)
+WINDOWS = {"hour": timedelta(hours=1),
+           "day": timedelta(days=1),
+           "week": timedelta(weeks=1)}
+
+
+def _increment(field, key, foodToQuantity):
+    """
+    Builds an expression that increases a field by a different amount for
+    every food item, so that they are all updated in a single query.
+
+    :param field: The name of the field to be increased.
+    :param key: The name of the field that holds the food id.
+    :param foodToQuantity: A dictionary that maps food id to quantity.
+    :return: The expression of the increased field.
+    """
+    whens = [When(**{key: pk, "then": Value(quantity)})
+             for pk, quantity in foodToQuantity.items()]
+    return F(field) + Case(*whens, default=Value(0),
+                           output_field=IntegerField())
+
+
+def _floorHour(time):
+    """
+    :param time: A datetime object.
+    :return: The start of the hour of the datetime.
+    """
+    return time.replace(minute=0, second=0, microsecond=0)
+
+
+def recordOrders(foodToQuantity, submitted=None):
+    """
+    Adds the food ordered in a submission to the total popularity of the
+    food and to the popularity bucket of the hour, using atomic increments
+    so that concurrent submissions never lose an update.
+
+    :param foodToQuantity: A dictionary that maps food id to the quantity
+                           ordered.
+    :param submitted: The time the order was submitted at (now by default).
+    """
+    if not foodToQuantity:
+        return
+
+    hour = _floorHour(submitted or timezone.now())
+
+    with transaction.atomic():
+        Food.objects.filter(pk__in=foodToQuantity).update(
+            popularity=_increment("popularity", "pk", foodToQuantity))
+
+        buckets = PopularityBucket.objects.filter(hour=hour,
+                                                  food__in=foodToQuantity)
+        existing = set(buckets.values_list("food", flat=True))
+        missing = {pk: quantity for pk, quantity in foodToQuantity.items()
+                   if pk not in existing}
+
+        if existing:
+            _addToBuckets(hour, {pk: foodToQuantity[pk] for pk in existing})
+
+        if missing:
+            try:
+                with transaction.atomic():
+                    PopularityBucket.objects.bulk_create(
+                        PopularityBucket(food_id=pk, hour=hour, count=quantity)
+                        for pk, quantity in missing.items())
+            except IntegrityError:
+                # Another submission created some of the buckets meanwhile
+                for pk in missing:
+                    PopularityBucket.objects.get_or_create(food_id=pk,
+                                                           hour=hour)
+                _addToBuckets(hour, missing)
+
+            # A new hour has started, so the expired buckets are dropped
+            oldest = hour - max(WINDOWS.values())
+            PopularityBucket.objects.filter(hour__lt=oldest).delete()
+
+    # Only the serialized menu holds the popularity (updating in bulk skips
+    # the signals that invalidate the cached menu)
+    invalidateCachedPayload("menu:serialized")
+
+
+def _addToBuckets(hour, foodToQuantity):
+    """
+    Increases the counts of the popularity buckets of an hour.
+
+    :param hour: The start of the hour of the buckets.
+    :param foodToQuantity: A dictionary that maps food id to quantity.
+    """
+    buckets = PopularityBucket.objects.filter(hour=hour,
+                                              food__in=foodToQuantity)
+    buckets.update(count=_increment("count", "food", foodToQuantity))
+
+
+def getPopularity(window=None):
+    """
+    Gets the amount of times each food item was ordered.
+
+    :param window: The name of the window to be counted over ("hour", "day"
+                   or "week", counted to the hour) or None for all time.
+    :return: A dictionary that maps food name to its popularity.
+    """
+    if window is None:
+        return dict(Food.objects.values_list("name", "popularity"))
+
+    start = _floorHour(timezone.now() - WINDOWS[window])
+    totals = (PopularityBucket.objects.filter(hour__gte=start)
+                                      .values_list("food__name")
+                                      .annotate(total=Sum("count")))
+    return dict(totals)
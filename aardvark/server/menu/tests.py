@@ -1,14 +1,25 @@
 from django.core.urlresolvers import reverse
 from django.test import TestCase, Client
 from django.core.exceptions import ValidationError
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from django.conf import settings
 
-from .models import Food
+from .loader import iterCsvRows, cleanRow, loadMenu, CHUNK_SIZE
+from .models import Food, PopularityBucket
+from .popularity import recordOrders, getPopularity
 from .views import updateMenu, sendMenu
+from table.models import Table
 
 from unittest.mock import patch, MagicMock, call
 from copy import deepcopy
+from decimal import Decimal
+from datetime import timedelta
+from django.utils import timezone
 
+import io
 import json
+import os
 
 
 ################################ UNITTESTS TESTS ###############################
@@ -78,6 +89,55 @@ class FoodModelTests(TestCase):
         self.assertEqual(str(self.validFood), self.validFood.name)
 
 
+class PopularityTests(TestCase):
+    """
+    Unit tests for the popularity module.
+    """
+
+    def setUp(self):
+        """
+        Creates some food and the time of the current hour.
+        """
+        self.potato = Food.objects.create(name="potato", type="main course",
+                                          description="squary", price=5)
+        self.cabbage = Food.objects.create(name="cabbage", type="dessert",
+                                           description="roundish", price=2)
+        self.hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+
+    def testRecordOrders(self):
+        """
+        Tests whether the total popularity and the bucket of the hour are
+        increased, in a bounded amount of queries.
+        """
+        with self.assertNumQueries(8):
+            recordOrders({self.potato.pk: 2, self.cabbage.pk: 1}, self.hour)
+        with self.assertNumQueries(5):
+            recordOrders({self.potato.pk: 3}, self.hour + timedelta(minutes=5))
+
+        self.potato.refresh_from_db()
+        bucket = PopularityBucket.objects.get(food=self.potato)
+
+        self.assertEqual(self.potato.popularity, 5)
+        self.assertEqual(bucket.hour, self.hour)
+        self.assertEqual(bucket.count, 5)
+
+    def testGetPopularity(self):
+        """
+        Tests whether the popularity is only counted within the window and
+        whether the expired buckets are dropped.
+        """
+        recordOrders({self.potato.pk: 1}, self.hour - timedelta(weeks=2))
+        recordOrders({self.potato.pk: 2}, self.hour - timedelta(days=3))
+        recordOrders({self.cabbage.pk: 4}, self.hour - timedelta(hours=5))
+        recordOrders({self.potato.pk: 8}, self.hour)
+
+        self.assertEqual(getPopularity("hour"), {"potato": 8})
+        self.assertEqual(getPopularity("day"), {"potato": 8, "cabbage": 4})
+        self.assertEqual(getPopularity("week"), {"potato": 10, "cabbage": 4})
+        self.assertEqual(getPopularity(), {"potato": 11, "cabbage": 4})
+        self.assertEqual(PopularityBucket.objects.count(), 3)
+
+
 class ViewTests(TestCase):
     """
     Unit tests for the methods in the views file.
@@ -85,8 +145,10 @@ class ViewTests(TestCase):
 
     def setUp(self):
         """
-        Declares some food and menu data to be used for testing.
+        Declares some food and menu data to be used for testing (and clears
+        the cached menu).
         """
+        cache.clear()
         self.foodData = \
         {
             "name": "potato",
@@ -113,9 +175,9 @@ class ViewTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(menu, self.menuData)
 
-    @patch("menu.tests.Food.objects.create")
+    @patch("menu.views.loadMenu")
     @patch("json.loads")
-    def testReceiveMenu(self, mockJsonLoad, mockCreateMethod):
+    def testReceiveMenu(self, mockJsonLoad, mockLoadMethod):
         """
         Tests whether the server is able to receive a menu from the client
         and handle it correctly.
@@ -123,11 +185,96 @@ class ViewTests(TestCase):
         mockRequest = MagicMock()
         mockRequest.method = "POST"
         mockJsonLoad.return_value = self.menuData
+        mockLoadMethod.return_value = {"inserted": 2}
+
+        response = updateMenu(mockRequest)
+        rows = list(mockLoadMethod.call_args[0][0])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(rows, [(1, self.foodData), (2, self.foodData)])
+
+
+class LoaderTests(TestCase):
+    """
+    Unit tests for the loader module.
+    """
+
+    def setUp(self):
+        """
+        Creates a food item to be updated by the loads (and clears the
+        cached menu).
+        """
+        cache.clear()
+        Food.objects.create(name="olives", type="starter",
+                            description="green", price="2.00")
+
+    def testIterCsvRows(self):
+        """
+        Tests whether the rows are parsed with their line numbers, skipping
+        the blank lines.
+        """
+        lines = ["olives; starter; a plate of olives; 2.00 \n",
+                 "\n",
+                 "tea; beverage; hot; 1.20\n"]
+
+        self.assertEqual(list(iterCsvRows(lines)),
+                         [(1, ["olives", "starter", "a plate of olives",
+                               "2.00"]),
+                          (3, ["tea", "beverage", "hot", "1.20"])])
+
+    def testCleanRow(self):
+        """
+        Tests whether the fields of a row are validated.
+        """
+        data = cleanRow(["tea", "beverage", "hot", "1.2"])
+        self.assertEqual(data["price"], Decimal("1.20"))
+
+        for row in [["tea", "beverage", "hot"],
+                    ["tea", "snack", "hot", "1.20"],
+                    ["tea", "beverage", "hot", "cheap"],
+                    {"name": "tea"}]:
+            with self.assertRaises(ValidationError):
+                cleanRow(row)
 
-        updateMenu(mockRequest)
-        createArgs = [call(**self.foodData), call(**self.foodData)]
+    def testLoadMenu(self):
+        """
+        Tests whether the new food items are inserted, the existing ones
+        updated and the invalid rows rejected.
+        """
+        rows = [(1, ["tea", "beverage", "hot", "1.20"]),
+                (2, ["olives", "starter", "black", "2.50"]),
+                (3, ["cake", "dessert", "sweet", "free"]),
+                (4, ["coffee", "beverage", "strong", "1.80"])]
+        report = loadMenu(rows)
+
+        self.assertEqual(report["inserted"], 2)
+        self.assertEqual(report["updated"], 1)
+        self.assertEqual(report["rejected"], 1)
+        self.assertEqual(report["errors"][0][0], 3)
+        self.assertEqual(list(Food.objects.values_list("name", "description",
+                                                       "price")),
+                         [("coffee", "strong", Decimal("1.80")),
+                          ("olives", "black", Decimal("2.50")),
+                          ("tea", "hot", Decimal("1.20"))])
+
+    def testLoadMenuInChunks(self):
+        """
+        Tests whether the amount of queries grows with the amount of chunks
+        rather than with the amount of rows.
+        """
+        rows = [(i, ["food {}".format(i), "starter", "tasty", "1.00"])
+                for i in range(2 * CHUNK_SIZE)]
+        loadMenu(rows)
+
+        rows = [(i, ["food {}".format(i), "dessert", "tasty", "1.00"])
+                for i in range(2 * CHUNK_SIZE)]
+        # A savepoint, and a select and a batch of updates per chunk
+        with self.assertNumQueries(2 + 2 * 2):
+            report = loadMenu(rows)
 
-        self.assertEqual(mockCreateMethod.call_args_list, createArgs)
+        self.assertEqual(report["updated"], 2 * CHUNK_SIZE)
+        self.assertEqual(Food.objects.filter(type="dessert").count(),
+                         2 * CHUNK_SIZE)
 
 
 ############################### INTEGRATION TESTS ##############################
@@ -140,8 +287,10 @@ class IntegrationTests(TestCase):
 
     def setUp(self):
         """
-        Declares some food and menu data to be used for testing.
+        Declares some food and menu data to be used for testing (and clears
+        the cached menu).
         """
+        cache.clear()
         self.foodData1 = \
         {
             "name": "potato",
@@ -178,6 +327,24 @@ class IntegrationTests(TestCase):
         self.assertEqual(data[1]["fields"], self.foodData1)
 
 
+    def testSendCompactMenuToClient(self):
+        """
+        Tests whether the server is able to send the menu in the compact
+        format (rows of name, type, description and price).
+        """
+        Food.objects.create(**self.foodData1)
+        Food.objects.create(**self.foodData2)
+
+        client = Client()
+        response = client.get(reverse("menu-get"), {"format": "compact"})
+        data = json.loads(response.content.decode("utf-8"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data, [["cabbage", "dessert",
+                                 "rather roundish...", "10.00"],
+                                ["potato", "main course",
+                                 "rather squary...", "50.00"]])
+
     def testReceiveMenuFromClient(self):
         """
         Tests whether the server is able to receive a json menu from the
@@ -195,4 +362,62 @@ class IntegrationTests(TestCase):
         self.assertEqual(potato.name, "potato")
         self.assertEqual(cabbage.name, "cabbage")
 
+    def testReceiveCsvMenuFromClient(self):
+        """
+        Tests whether the server is able to receive a CSV menu and report
+        the amount of food items loaded.
+        """
+        Food.objects.create(**self.foodData1)
+        csvMenu = ("potato; main course; rather squary...; 45.00\n"
+                   "cabbage; dessert; rather roundish...; 10.00\n"
+                   "turnip; dessert; rather...\n")
+
+        client = Client()
+        response = client.post(reverse("menu-update"), csvMenu,
+                               content_type="text/csv")
+        report = json.loads(response.content.decode("utf-8"))
+
+        self.assertEqual([report[count] for count in
+                          ["inserted", "updated", "rejected"]], [1, 1, 1])
+        self.assertEqual(str(Food.objects.get(name="potato").price), "45.00")
+
+    def testLoadMenuCommand(self):
+        """
+        Tests whether the management command loads the mock menu.
+        """
+        path = os.path.join(settings.BASE_DIR, os.pardir, os.pardir, "test",
+                            "manual", "mock_menu.csv")
+        output = io.StringIO()
+        call_command("load_menu", path, stdout=output)
+
+        self.assertIn("rejected 0", output.getvalue())
+        self.assertEqual(Food.objects.count(), 16)
+        with self.assertRaises(CommandError):
+            call_command("load_menu", path + ".missing")
+
+    def testSendPopularityToClient(self):
+        """
+        Tests whether the popularity of the ordered food is sent to the
+        client, and whether unknown windows are rejected.
+        """
+        Table.objects.create(number=1, size=2)
+        Food.objects.create(**self.foodData1)
+        Food.objects.create(**self.foodData2)
+        orderData = {"order": [{"table": 1, "food": "potato", "quantity": 2},
+                               {"table": 1, "food": "potato", "quantity": 1}]}
+
+        client = Client()
+        client.post(reverse("order-update"),
+                    json.dumps(orderData),
+                    content_type="application/json")
+
+        response = client.get(reverse("menu-popularity"), {"window": "hour"})
+        data = json.loads(response.content.decode("utf-8"))
+        self.assertEqual(data, {"popularity": {"potato": 3}})
+
+        response = client.get(reverse("menu-popularity"))
+        data = json.loads(response.content.decode("utf-8"))
+        self.assertEqual(data, {"popularity": {"potato": 6, "cabbage": 3}})
 
+        response = client.get(reverse("menu-popularity"), {"window": "year"})
+        self.assertEqual(response.status_code, 400)
@@ -5,4 +5,5 @@ from . import views
 urlpatterns = [
     url(r'^get$', views.sendMenu, name='menu-get'),
     url(r'^update$', views.updateMenu, name='menu-update'),
+    url(r'^popularity$', views.sendPopularity, name='menu-popularity'),
 ]
@@ -1,28 +1,51 @@
 from django.core import serializers
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseBadRequest
+from server.codec import JSON, encodeResponse
+from server.compression import sendCachedPayload
+from .loader import iterCsvRows, loadMenu
 from .models import Food
+from .popularity import WINDOWS, getPopularity
 
+import codecs
 import json
 
 
 def updateMenu(request):
     """
-    Receives and stores a menu into the database.
-    The menu object received is in JSON formatting, specifically in
-    the form:
+    Receives a menu and upserts its food items by name into the database.
+    The menu received is either in JSON formatting, specifically in the
+    form:
 
-    {"menu" : [food1,
-               food2,
-               ...,
-               foodN]}.
+    {"menu" : [{"name": name,
+                "type": type,
+                "description": description,
+                "price": price},
+               ...]},
+
+    or, when the content type is "text/csv", in CSV formatting (one
+    "name; type; description; price" row per line) which is parsed as it
+    is read.
 
     :param request: A django request object.
-    :return: An empty HTTP response object.
+    :return: An HTTP response object containing the report of the load, in
+             the form:
+
+             {"inserted": number,
+              "updated": number,
+              "rejected": number,
+              "errors": [[line, message], ...]}.
     """
     if request.method == "POST":
-        data = json.loads(request.body.decode("utf-8"))
-        for foodData in data["menu"]:
-            Food.objects.create(**foodData)
+        if request.content_type == "text/csv":
+            rows = iterCsvRows(codecs.iterdecode(request, "utf-8"))
+        else:
+            try:
+                data = json.loads(request.body.decode("utf-8"))
+                rows = enumerate(data["menu"], 1)
+            except (ValueError, KeyError, TypeError):
+                return HttpResponseBadRequest("The menu must be JSON or CSV.")
+
+        return encodeResponse(request, loadMenu(rows))
 
     return HttpResponse()
 
@@ -31,9 +54,56 @@ def sendMenu(request):
     Serializes all the data in the Food model, and returns it in JSON
     formatting.
 
+    When the "format" query parameter is "compact", only the data needed by
+    the client is sent as a list of rows, specifically in the form:
+
+    [[name, type, description, price],
+     ...,
+     [name, type, description, price]].
+
+    The menu is sent in MessagePack formatting instead when the client
+    accepts it. The menu is cached (already compressed) until it changes.
+
     :param request: A django request object.
-    :return: The menu in JSON format.
+    :return: The menu in JSON (or MessagePack) format.
     """
     if request.method == "GET":
-        data = serializers.serialize("json", Food.objects.all())
-        return HttpResponse(data, content_type="application/json")
\ No newline at end of file
+        isCompact = request.GET.get("format") == "compact"
+        key = "menu:compact" if isCompact else "menu:serialized"
+        return sendCachedPayload(request, key,
+                                 lambda codec: renderMenu(codec, isCompact))
+
+def renderMenu(codec, isCompact):
+    """
+    Encodes all the data in the Food model.
+
+    :param codec: The codec to encode the menu with.
+    :param isCompact: Whether to encode the menu in the compact format.
+    :return: The encoded menu.
+    """
+    if isCompact:
+        rows = Food.objects.values_list("name", "type", "description", "price")
+        return codec.encode([list(row) for row in rows])
+    elif codec is JSON:
+        return serializers.serialize("json", Food.objects.all())
+    else:
+        return codec.encode(serializers.serialize("python", Food.objects.all()))
+
+def sendPopularity(request):
+    """
+    Sends the amount of times each food item was ordered, in the form:
+
+    {"popularity": {name: count, ...}}.
+
+    The "window" query parameter restricts the count to the last "hour",
+    "day" or "week" (to the hour), otherwise all orders are counted.
+
+    :param request: A django request object.
+    :return: An HTTP response object containing the popularity.
+    """
+    if request.method == "GET":
+        window = request.GET.get("window")
+        if window is not None and window not in WINDOWS:
+            return HttpResponseBadRequest("Unknown window: {}".format(window))
+
+        return encodeResponse(request, {"popularity": getPopularity(window)})
@@ -0,0 +1,355 @@
+import abc
+import bisect
+import copy
+import math
+import threading
+
+
+class Metric(abc.ABC):
+    """
+    Base class of the in-process metrics.
+
+    Attributes:
+        :name:          The name the metric is exposed under.
+        :description:   The help text of the metric.
+        :labels:        The names of the labels of the metric.
+    """
+    type = None
+
+    def __init__(self, name, description, labels=()):
+        """
+        :param name: The name the metric is exposed under.
+        :param description: The help text of the metric.
+        :param labels: The names of the labels of the metric.
+        """
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+
+    def clear(self):
+        """
+        Resets all the recorded values, a metric that records none (e.g. one
+        derived from another metric) has nothing to reset.
+        """
+
+    def expose(self):
+        """
+        :return: The metric in the Prometheus text exposition format.
+        """
+        lines = ["# HELP {} {}".format(self.name, self.description),
+                 "# TYPE {} {}".format(self.name, self.type)]
+        lines.extend(self._exposeSamples())
+        return "\n".join(lines)
+
+    @abc.abstractmethod
+    def _exposeSamples(self):
+        """
+        :return: An iterable of the sample lines of the metric in the
+                 Prometheus text exposition format.
+        """
+
+    def _formatLabels(self, values, extra=()):
+        """
+        :param values: The label values, ordered like the label names.
+        :param extra: Additional (name, value) label pairs.
+        :return: The labels in the Prometheus format (e.g. {view="menu-get"}).
+        """
+        pairs = list(zip(self.labels, values)) + list(extra)
+        if not pairs:
+            return ""
+
+        escaped = ['{}="{}"'.format(name, str(value).replace("\\", "\\\\")
+                                                    .replace('"', '\\"'))
+                   for name, value in pairs]
+        return "{" + ",".join(escaped) + "}"
+
+
+class ShardedMetric(Metric):
+    """
+    Base class of the metrics that record values.
+
+    Every thread updates its own shard of the metric values so that
+    recording never contends on a lock, the shards are only merged when the
+    metrics are scraped. A lock is only taken once per thread (to register
+    its shard) and once per scrape. The shards of finished threads are
+    folded together so that a thread per request server does not leak them.
+    """
+
+    # The amount of registered shards that triggers folding finished threads
+    COMPACT_THRESHOLD = 64
+
+    def __init__(self, name, description, labels=()):
+        """
+        :param name: The name the metric is exposed under.
+        :param description: The help text of the metric.
+        :param labels: The names of the labels of the metric.
+        """
+        super().__init__(name, description, labels)
+        self._shards = []
+        self._retired = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        """
+        :return: The dictionary of values owned by the calling thread.
+        """
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                if len(self._shards) >= self.COMPACT_THRESHOLD:
+                    self._compact()
+                self._shards.append((threading.current_thread(), shard))
+            return shard
+
+    def _compact(self):
+        """
+        Folds the shards of finished threads into the retired values.
+        Must be called while holding the lock.
+        """
+        liveShards = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                liveShards.append((thread, shard))
+            else:
+                self._merge(self._retired, shard)
+        self._shards = liveShards
+
+    def _merge(self, totals, shard):
+        """
+        Adds the values of a shard into a dictionary of totals.
+
+        :param totals: The dictionary that maps label values to totals.
+        :param shard: The dictionary that maps label values to values.
+        """
+        for labelValues, value in shard.items():
+            if labelValues in totals:
+                value = self._combine(totals[labelValues], value)
+            totals[labelValues] = value
+
+    @abc.abstractmethod
+    def _combine(self, total, value):
+        """
+        :param total: The value summed so far for some label values.
+        :param value: Another value for the same label values.
+        :return: The sum of both values (a new object, as the total must
+                 never alias the live values of a shard).
+        """
+
+    def _totals(self):
+        """
+        :return: A dictionary that maps label values to their value summed
+                 over every thread.
+        """
+        with self._lock:
+            self._compact()
+            # Copying a dictionary (or a list of counts) is atomic under
+            # the GIL, and the values are copied too so that the totals
+            # never alias (and the merge never mutates) a live value
+            shards = [{labelValues: copy.copy(value)
+                       for labelValues, value in shard.copy().items()}
+                      for thread, shard in self._shards]
+            totals = {labelValues: copy.copy(value)
+                      for labelValues, value in self._retired.items()}
+
+        for shard in shards:
+            self._merge(totals, shard)
+        return totals
+
+    def clear(self):
+        """
+        Resets all the recorded values.
+        """
+        with self._lock:
+            self._retired = {}
+            for thread, shard in self._shards:
+                shard.clear()
+
+
+class Counter(ShardedMetric):
+    """
+    A metric whose value only ever goes up (e.g. the amount of requests).
+    """
+    type = "counter"
+
+    def inc(self, *labelValues, amount=1):
+        """
+        Increases the counter.
+
+        :param labelValues: The label values, ordered like the label names.
+        :param amount: The amount to increase the counter by.
+        """
+        shard = self._shard()
+        shard[labelValues] = shard.get(labelValues, 0) + amount
+
+    def values(self):
+        """
+        :return: A dictionary that maps label values to the counter value.
+        """
+        return self._totals()
+
+    def _combine(self, total, value):
+        return total + value
+
+    def _exposeSamples(self):
+        for labelValues, value in sorted(self.values().items()):
+            yield "{}{} {}".format(self.name, self._formatLabels(labelValues),
+                                   value)
+
+
+class Histogram(ShardedMetric):
+    """
+    A metric that counts observations (e.g. request latencies) in buckets.
+    """
+    type = "histogram"
+
+    # Upper bounds of the buckets in seconds
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, name, description, labels=(), buckets=BUCKETS):
+        """
+        :param name: The name the metric is exposed under.
+        :param description: The help text of the metric.
+        :param labels: The names of the labels of the metric.
+        :param buckets: The sorted upper bounds of the buckets.
+        """
+        super().__init__(name, description, labels)
+        self.buckets = tuple(buckets) + (math.inf,)
+
+    def observe(self, value, *labelValues):
+        """
+        Records an observation.
+
+        :param value: The observed value.
+        :param labelValues: The label values, ordered like the label names.
+        """
+        shard = self._shard()
+        try:
+            counts = shard[labelValues]
+        except KeyError:
+            # Bucket counts followed by the sum of all observations
+            counts = shard[labelValues] = [0] * (len(self.buckets) + 1)
+
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def values(self):
+        """
+        :return: A dictionary that maps label values to a tuple of the
+                 (non-cumulative) bucket counts and the sum of observations.
+        """
+        return {labelValues: (counts[:-1], counts[-1])
+                for labelValues, counts in self._totals().items()}
+
+    def _combine(self, total, value):
+        # A new list so that totals never alias a shard's live counts
+        return [a + b for a, b in zip(total, value)]
+
+    def _exposeSamples(self):
+        for labelValues, (counts, total) in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                bound = "+Inf" if bound == math.inf else repr(float(bound))
+                labels = self._formatLabels(labelValues, [("le", bound)])
+                yield "{}_bucket{} {}".format(self.name, labels, cumulative)
+
+            labels = self._formatLabels(labelValues)
+            yield "{}_sum{} {}".format(self.name, labels, total)
+            yield "{}_count{} {}".format(self.name, labels, cumulative)
+
+
+class CacheRatio(Metric):
+    """
+    A gauge of the hit ratio of each cache, derived from a counter of the
+    cache lookups labelled by cache name and result ("hit" or "miss") when
+    scraped, so it records no values of its own.
+    """
+    type = "gauge"
+
+    def __init__(self, name, description, lookups):
+        """
+        :param name: The name the metric is exposed under.
+        :param description: The help text of the metric.
+        :param lookups: The Counter of the cache lookups.
+        """
+        super().__init__(name, description, ("cache",))
+        self.lookups = lookups
+
+    def values(self):
+        """
+        :return: A dictionary that maps cache name to its hit ratio.
+        """
+        hits = {}
+        totals = {}
+        for (cache, result), value in self.lookups.values().items():
+            totals[cache] = totals.get(cache, 0) + value
+            if result == "hit":
+                hits[cache] = hits.get(cache, 0) + value
+
+        return {cache: hits.get(cache, 0) / total
+                for cache, total in totals.items() if total}
+
+    def _exposeSamples(self):
+        for cache, ratio in sorted(self.values().items()):
+            yield "{}{} {}".format(self.name, self._formatLabels((cache,)),
+                                   ratio)
+
+
+requestCount = Counter("aardvark_requests_total",
+                       "Requests served by URL name, method and status.",
+                       ("view", "method", "status"))
+requestLatency = Histogram("aardvark_request_duration_seconds",
+                           "Request latency by URL name.",
+                           ("view",))
+queryCount = Counter("aardvark_db_queries_total",
+                     "Database queries executed by URL name.",
+                     ("view",))
+queryLatency = Counter("aardvark_db_query_seconds_total",
+                       "Time spent in the database by URL name.",
+                       ("view",))
+cacheLookups = Counter("aardvark_cache_lookups_total",
+                       "Cache lookups by cache name and result.",
+                       ("cache", "result"))
+cacheHitRatio = CacheRatio("aardvark_cache_hit_ratio",
+                           "Hit ratio of each cache.",
+                           cacheLookups)
+ordersIngested = Counter("aardvark_orders_ingested_total",
+                         "Order items stored (use rate() for items/second).")
+
+METRICS = [requestCount, requestLatency, queryCount, queryLatency,
+           cacheLookups, cacheHitRatio, ordersIngested]
+
+
+def observeRequest(profile):
+    """
+    Records a finished request into the request and database metrics.
+
+    :param profile: A RequestProfile object.
+    """
+    # Unmatched paths are grouped together to keep the label set bounded
+    view = profile.name or "unmatched"
+
+    requestCount.inc(view, profile.method, str(profile.status))
+    requestLatency.observe(profile.duration, view)
+    queryCount.inc(view, amount=profile.queryCount)
+    queryLatency.inc(view, amount=profile.queryTime)
+
+
+def recordCacheLookup(cache, isHit):
+    """
+    Records a lookup into a cache.
+
+    :param cache: The name of the cache.
+    :param isHit: Whether the value was found in the cache.
+    """
+    cacheLookups.inc(cache, "hit" if isHit else "miss")
+
+
+def exposeMetrics():
+    """
+    :return: All the metrics in the Prometheus text exposition format.
+    """
+    return "\n".join(metric.expose() for metric in METRICS) + "\n"
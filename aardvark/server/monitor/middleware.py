@@ -0,0 +1,60 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from .metrics import observeRequest
+from .profiling import RequestProfile, getProfileLog
+
+
+class ProfilingMiddleware:
+    """
+    Measures the wall time, database query count and database time of
+    every request.
+
+    The measurements are attached to the response in a Server-Timing header,
+    recorded into the shared profile log and into the request metrics.
+    """
+
+    def __init__(self, get_response):
+        """
+        :param get_response: The next middleware or view in the chain.
+        """
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """
+        Serves the request while timing it and every query it executes.
+
+        :param request: A django request object.
+        :return: The response with a Server-Timing header.
+        """
+        profile = RequestProfile(request.method, request.path)
+
+        def timeQuery(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                profile.queries.append((sql, time.perf_counter() - start))
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timeQuery))
+
+            start = time.perf_counter()
+            response = self.get_response(request)
+            profile.duration = time.perf_counter() - start
+
+        if request.resolver_match is not None:
+            profile.name = request.resolver_match.url_name
+        profile.status = response.status_code
+        getProfileLog().record(profile)
+        observeRequest(profile)
+
+        response["Server-Timing"] = \
+            'total;dur={:.3f}, db;dur={:.3f};desc="{} queries"'.format(
+                profile.duration * 1000,
+                profile.queryTime * 1000,
+                profile.queryCount)
+        return response
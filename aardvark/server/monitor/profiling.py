@@ -0,0 +1,174 @@
+import heapq
+import itertools
+import threading
+from collections import deque
+
+from django.conf import settings
+
+
+class RequestProfile:
+    """
+    The measurements taken while serving a single request.
+
+    Attributes:
+        :method:        The HTTP method of the request.
+        :path:          The path of the request.
+        :name:          The URL name of the matched view (or None).
+        :status:        The HTTP status code of the response.
+        :duration:      The wall time spent serving the request in seconds.
+        :queries:       A list of (sql, duration) tuples, one per query.
+    """
+
+    def __init__(self, method, path):
+        """
+        Creates an empty profile for a request.
+
+        :param method: The HTTP method of the request.
+        :param path: The path of the request.
+        """
+        self.method = method
+        self.path = path
+        self.name = None
+        self.status = None
+        self.duration = 0.0
+        self.queries = []
+
+    @property
+    def queryCount(self):
+        """
+        :return: The number of database queries executed.
+        """
+        return len(self.queries)
+
+    @property
+    def queryTime(self):
+        """
+        :return: The total time spent in the database in seconds.
+        """
+        return sum(duration for sql, duration in self.queries)
+
+    def toDict(self, includeSql=False):
+        """
+        Converts the profile into a JSON serializable dictionary.
+
+        :param includeSql: Whether to include the executed SQL statements.
+        :return: The profile as a dictionary (durations in milliseconds).
+        """
+        data = {"method": self.method,
+                "path": self.path,
+                "name": self.name,
+                "status": self.status,
+                "duration": round(self.duration * 1000, 3),
+                "queryCount": self.queryCount,
+                "queryTime": round(self.queryTime * 1000, 3)}
+
+        if includeSql:
+            data["sql"] = [{"sql": sql, "duration": round(duration * 1000, 3)}
+                           for sql, duration in self.queries]
+        return data
+
+
+class ProfileLog:
+    """
+    A thread safe, in-process store of recent request profiles.
+
+    The timings of the most recent profiles are kept in a rolling window
+    from which the latency histogram is computed, while the slowest profiles
+    seen so far (along with their SQL) are kept in a bounded min-heap. Only
+    the slowest profiles keep their SQL, the others are dropped once
+    recorded.
+    """
+
+    # Upper bounds of the latency histogram buckets in milliseconds
+    BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf"))
+
+    def __init__(self, history=1000, slowest=20):
+        """
+        Creates an empty log.
+
+        :param history: The amount of recent timings kept for the histogram.
+        :param slowest: The amount of slowest profiles kept.
+        """
+        self.slowestSize = slowest
+        self._recent = deque(maxlen=history)
+        self._slowest = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def record(self, profile):
+        """
+        Stores a finished request profile.
+
+        :param profile: A RequestProfile object.
+        """
+        # A (name, duration, query count, query time) tuple, so that the
+        # window does not hold on to the SQL of every profile
+        timing = (profile.name or profile.path, profile.duration,
+                  profile.queryCount, profile.queryTime)
+        # The counter breaks ties so that profiles are never compared
+        entry = (profile.duration, next(self._counter), profile)
+
+        with self._lock:
+            self._recent.append(timing)
+            if len(self._slowest) < self.slowestSize:
+                heapq.heappush(self._slowest, entry)
+            elif entry > self._slowest[0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def slowest(self):
+        """
+        :return: The slowest profiles recorded, slowest first.
+        """
+        with self._lock:
+            entries = list(self._slowest)
+        return [profile for duration, count, profile
+                in sorted(entries, reverse=True)]
+
+    def histogram(self):
+        """
+        Buckets the recent profiles by URL name (or path) and latency.
+
+        :return: A dictionary that maps URL name to a dictionary of bucket
+                 upper bound (in ms) to the amount of requests within it.
+        """
+        with self._lock:
+            timings = list(self._recent)
+
+        histogram = {}
+        for name, duration, queryCount, queryTime in timings:
+            if name not in histogram:
+                histogram[name] = {str(bound): 0 for bound in self.BUCKETS}
+
+            milliseconds = duration * 1000
+            for bound in self.BUCKETS:
+                if milliseconds <= bound:
+                    histogram[name][str(bound)] += 1
+                    break
+
+        return histogram
+
+    def clear(self):
+        """
+        Removes all recorded profiles.
+        """
+        with self._lock:
+            self._recent.clear()
+            self._slowest = []
+
+
+_profileLog = None
+
+
+def getProfileLog():
+    """
+    Gets the profile log shared by the whole process, creating it from the
+    PROFILING_HISTORY and PROFILING_SLOWEST settings upon first use.
+
+    :return: The shared ProfileLog object.
+    """
+    global _profileLog
+
+    if _profileLog is None:
+        _profileLog = ProfileLog(getattr(settings, "PROFILING_HISTORY", 1000),
+                                 getattr(settings, "PROFILING_SLOWEST", 20))
+    return _profileLog
@@ -0,0 +1,288 @@
+from django.core.urlresolvers import reverse
+from django.test import TestCase, Client, override_settings
+
+from .metrics import Counter, Histogram, CacheRatio, Metric, METRICS
+from .profiling import RequestProfile, ProfileLog, getProfileLog
+from menu.models import Food
+from table.models import Table
+
+import json
+import threading
+
+################################ UNITTESTS TESTS ###############################
+
+
+class RequestProfileTests(TestCase):
+    """
+    Unit tests for the RequestProfile class.
+    """
+
+    def setUp(self):
+        """
+        Creates a profile with a couple of queries.
+        """
+        self.profile = RequestProfile("GET", "/menu/get")
+        self.profile.duration = 0.5
+        self.profile.queries = [("SELECT 1", 0.1), ("SELECT 2", 0.2)]
+
+    def testQueryStatistics(self):
+        """
+        Tests whether the query count and time are summed up correctly.
+        """
+        self.assertEqual(self.profile.queryCount, 2)
+        self.assertAlmostEqual(self.profile.queryTime, 0.3)
+
+    def testToDict(self):
+        """
+        Tests whether the profile is converted to milliseconds and only
+        includes the SQL when asked to.
+        """
+        data = self.profile.toDict()
+        self.assertEqual(data["duration"], 500)
+        self.assertEqual(data["queryCount"], 2)
+        self.assertNotIn("sql", data)
+
+        data = self.profile.toDict(includeSql=True)
+        self.assertEqual(data["sql"][1], {"sql": "SELECT 2", "duration": 200})
+
+
+class ProfileLogTests(TestCase):
+    """
+    Unit tests for the ProfileLog class.
+    """
+
+    def createProfile(self, name, duration):
+        """
+        Creates a profile with the given URL name and duration.
+        """
+        profile = RequestProfile("GET", "/" + name)
+        profile.name = name
+        profile.duration = duration
+        return profile
+
+    def testSlowest(self):
+        """
+        Tests whether only the slowest profiles are kept, slowest first.
+        """
+        log = ProfileLog(history=10, slowest=2)
+        for duration in [0.3, 0.1, 0.5, 0.2]:
+            log.record(self.createProfile("menu-get", duration))
+
+        durations = [profile.duration for profile in log.slowest()]
+        self.assertEqual(durations, [0.5, 0.3])
+
+    def testRecentKeepsNoSql(self):
+        """
+        Tests whether the recent window only keeps the timings and query
+        counts of the profiles, not their SQL.
+        """
+        log = ProfileLog(history=10, slowest=1)
+        for duration in [0.3, 0.1]:
+            profile = self.createProfile("menu-get", duration)
+            profile.queries = [("SELECT 1", 0.1)]
+            log.record(profile)
+
+        self.assertEqual(list(log._recent), [("menu-get", 0.3, 1, 0.1),
+                                             ("menu-get", 0.1, 1, 0.1)])
+        self.assertEqual(log.slowest()[0].queries, [("SELECT 1", 0.1)])
+
+    def testHistogram(self):
+        """
+        Tests whether the recent profiles are bucketed by name and latency
+        and that older profiles roll out of the window.
+        """
+        log = ProfileLog(history=3, slowest=2)
+        log.record(self.createProfile("order-bill", 10))
+        log.record(self.createProfile("menu-get", 0.004))
+        log.record(self.createProfile("menu-get", 0.007))
+        log.record(self.createProfile("menu-get", 0.007))
+
+        histogram = log.histogram()
+        self.assertNotIn("order-bill", histogram)
+        self.assertEqual(histogram["menu-get"]["5"], 1)
+        self.assertEqual(histogram["menu-get"]["10"], 2)
+        self.assertEqual(histogram["menu-get"]["inf"], 0)
+
+
+class MetricTests(TestCase):
+    """
+    Unit tests for the metric classes.
+    """
+
+    def testCounter(self):
+        """
+        Tests whether increments from several threads are summed up and
+        exposed in the Prometheus format.
+        """
+        counter = Counter("test_total", "A test counter.", ("view",))
+
+        def increment():
+            for i in range(100):
+                counter.inc("menu-get")
+
+        threads = [threading.Thread(target=increment) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.inc("order-bill", amount=3)
+
+        self.assertEqual(counter.values(), {("menu-get",): 400,
+                                            ("order-bill",): 3})
+        self.assertIn('test_total{view="menu-get"} 400', counter.expose())
+
+    def testCounterFoldsFinishedThreads(self):
+        """
+        Tests whether the shards of finished threads are folded together
+        without losing their values.
+        """
+        counter = Counter("test_total", "A test counter.")
+        counter.COMPACT_THRESHOLD = 2
+
+        for i in range(5):
+            thread = threading.Thread(target=counter.inc)
+            thread.start()
+            thread.join()
+
+        self.assertEqual(counter.values(), {(): 5})
+        self.assertLessEqual(len(counter._shards), 2)
+
+    def testHistogram(self):
+        """
+        Tests whether observations are exposed in cumulative buckets.
+        """
+        histogram = Histogram("test_seconds", "A test histogram.", ("view",),
+                              buckets=(0.1, 1))
+        histogram.observe(0.05, "menu-get")
+        histogram.observe(0.5, "menu-get")
+        histogram.observe(5, "menu-get")
+
+        text = histogram.expose()
+        self.assertIn('test_seconds_bucket{view="menu-get",le="0.1"} 1', text)
+        self.assertIn('test_seconds_bucket{view="menu-get",le="1.0"} 2', text)
+        self.assertIn('test_seconds_bucket{view="menu-get",le="+Inf"} 3', text)
+        self.assertIn('test_seconds_count{view="menu-get"} 3', text)
+        self.assertIn('test_seconds_sum{view="menu-get"} 5.55', text)
+
+    def testHistogramTotalsAreCopies(self):
+        """
+        Tests whether the values of a scrape are not changed by the
+        observations recorded after it.
+        """
+        histogram = Histogram("test_seconds", "A test histogram.",
+                              buckets=(0.1, 1))
+        histogram.observe(0.05)
+        values = histogram.values()
+        totals = histogram._totals()
+        histogram.observe(0.05)
+
+        self.assertEqual(values, {(): ([1, 0, 0], 0.05)})
+        self.assertEqual(totals, {(): [1, 0, 0, 0.05]})
+        self.assertEqual(histogram.values(), {(): ([2, 0, 0], 0.1)})
+
+    def testCacheRatio(self):
+        """
+        Tests whether the hit ratio is derived from the cache lookups.
+        """
+        lookups = Counter("test_lookups_total", "Lookups.", ("cache", "result"))
+        ratio = CacheRatio("test_hit_ratio", "Hit ratio.", lookups)
+        lookups.inc("menu", "hit", amount=3)
+        lookups.inc("menu", "miss")
+
+        self.assertEqual(ratio.values(), {"menu": 0.75})
+        self.assertIn('test_hit_ratio{cache="menu"} 0.75', ratio.expose())
+
+    def testMetricWithoutSamples(self):
+        """
+        Tests whether a metric that does not expose its samples cannot be
+        created.
+        """
+        class Gauge(Metric):
+            type = "gauge"
+
+        with self.assertRaises(TypeError):
+            Gauge("test_gauge", "A test gauge.")
+
+
+############################### INTEGRATION TESTS ##############################
+
+
+class IntegrationTests(TestCase):
+    """
+    Integration tests for the monitor app.
+    """
+
+    def setUp(self):
+        """
+        Clears previously recorded profiles and creates some menu entries.
+        """
+        getProfileLog().clear()
+        for metric in METRICS:
+            metric.clear()
+
+        Table.objects.create(number=1, size=2)
+        Food.objects.create(name="potato",
+                            type="main course",
+                            description="rather squary...",
+                            price="50.00")
+
+    def testServerTimingHeader(self):
+        """
+        Tests whether responses carry the request and database timings.
+        """
+        client = Client()
+        response = client.get(reverse("menu-get"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("total;dur=", response["Server-Timing"])
+        self.assertIn('desc="1 queries"', response["Server-Timing"])
+
+    @override_settings(DEBUG=True)
+    def testSendSlowestRequests(self):
+        """
+        Tests whether the slowest requests are sent along with their SQL.
+        """
+        client = Client()
+        client.get(reverse("menu-get"))
+        response = client.get(reverse("monitor-slowest"))
+        data = json.loads(response.content.decode("utf-8"))
+
+        names = [profile["name"] for profile in data["slowest"]]
+        menuProfile = data["slowest"][names.index("menu-get")]
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(menuProfile["queryCount"], 1)
+        self.assertIn("menu_food", menuProfile["sql"][0]["sql"])
+        self.assertIn("menu-get", data["histogram"])
+
+    def testSendSlowestRequestsWithoutDebug(self):
+        """
+        Tests whether the profiling data is hidden when not in DEBUG mode.
+        """
+        client = Client()
+        response = client.get(reverse("monitor-slowest"))
+
+        self.assertEqual(response.status_code, 404)
+
+    def testSendMetrics(self):
+        """
+        Tests whether the request, database and order metrics are exposed
+        after serving some requests.
+        """
+        orderData = {"order": [{"table": 1, "food": "potato", "quantity": 2},
+                               {"table": 1, "food": "potato", "quantity": 1}]}
+        client = Client()
+        client.get(reverse("menu-get"))
+        client.post(reverse("order-update"),
+                    json.dumps(orderData),
+                    content_type="application/json")
+        response = client.get(reverse("monitor-metrics"))
+        text = response.content.decode("utf-8")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('aardvark_requests_total'
+                      '{view="menu-get",method="GET",status="200"} 1', text)
+        self.assertIn('aardvark_request_duration_seconds_count'
+                      '{view="order-update"} 1', text)
+        self.assertIn('aardvark_db_queries_total{view="menu-get"} 1', text)
+        self.assertIn("aardvark_orders_ingested_total 2", text)
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.http import HttpResponse, Http404
+from .metrics import exposeMetrics
+from .profiling import getProfileLog
+
+import json
+
+
+def sendSlowestRequests(request):
+    """
+    Sends the slowest requests served so far (along with the SQL they
+    executed) and the latency histogram of the recent requests in JSON
+    format. Only available when the server runs in DEBUG mode.
+
+    :param request: A django request object.
+    :return: An HTTP response object containing the profiling data.
+    """
+    if not settings.DEBUG:
+        raise Http404("Profiling data is only available in DEBUG mode.")
+
+    profileLog = getProfileLog()
+    data = {"slowest": [profile.toDict(includeSql=True)
+                        for profile in profileLog.slowest()],
+            "histogram": profileLog.histogram()}
+
+    return HttpResponse(json.dumps(data), content_type="application/json")
+
+
+def sendMetrics(request):
+    """
+    Sends the request, database, cache and order metrics in the Prometheus
+    text exposition format so that they can be scraped.
+
+    :param request: A django request object.
+    :return: An HTTP response object containing the metrics.
+    """
+    return HttpResponse(exposeMetrics(),
+                        content_type="text/plain; version=0.0.4")
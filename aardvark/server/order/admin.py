@@ -1,4 +1,7 @@
 from django.contrib import admin
-from .models import Order,OrderAdmin 
+from .models import (Order, OrderAdmin, ArchivedOrder, ArchivedOrderAdmin,
+                     DailySales, DailySalesAdmin)
 
 admin.site.register(Order, OrderAdmin)
+admin.site.register(ArchivedOrder, ArchivedOrderAdmin)
+admin.site.register(DailySales, DailySalesAdmin)
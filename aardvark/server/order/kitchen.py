@@ -0,0 +1,156 @@
+import heapq
+import itertools
+import threading
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Order
+
+
+# The order in which the courses of a submission are prepared
+COURSES = {"beverage": 0, "starter": 1, "main course": 2, "dessert": 3}
+
+
+class KitchenQueue:
+    """
+    The orders waiting for the kitchen, ordered by submission time and then
+    by course (so that the starters of a table come before its mains).
+
+    The orders are kept in a heap, so that adding or removing an order takes
+    O(log n) time and the top N orders are read in O(N log n) time, rather
+    than querying all the orders. Removed orders are only marked as such and
+    dropped once they reach the top of the heap.
+    """
+
+    def __init__(self):
+        """
+        Creates an empty queue.
+        """
+        self._heap = []
+        self._entries = {}
+        # Breaks the ties between the entries of an order updated in place
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """
+        :return: The amount of orders in the queue.
+        """
+        return len(self._entries)
+
+    def update(self, order):
+        """
+        Adds an order to the queue, or replaces it if it is already queued.
+
+        :param order: An Order object.
+        """
+        food = order.food
+        course = COURSES.get(food.type, len(COURSES)) if food else 0
+        item = {"id": order.pk,
+                "table": order.table.number if order.table else None,
+                "food": food.name if food else None,
+                "type": food.type if food else None,
+                "quantity": order.quantity,
+                "state": order.state,
+                "submitted": order.submitted}
+
+        with self._lock:
+            entry = [(order.submitted, course, order.pk), next(self._counter),
+                     item]
+            self._discard(order.pk)
+            self._entries[order.pk] = entry
+            heapq.heappush(self._heap, entry)
+
+    def remove(self, orderId):
+        """
+        Removes an order from the queue, if it is queued.
+
+        :param orderId: The primary key of the order.
+        """
+        with self._lock:
+            self._discard(orderId)
+
+    def _discard(self, orderId):
+        """
+        Marks the entry of an order as removed. Must be called while holding
+        the lock.
+
+        :param orderId: The primary key of the order.
+        """
+        entry = self._entries.pop(orderId, None)
+        if entry is not None:
+            entry[-1] = None
+
+    def top(self, amount):
+        """
+        :param amount: The maximum amount of orders.
+        :return: A list of the first orders in the queue, each being a
+                 dictionary of the order details.
+        """
+        with self._lock:
+            entries = []
+            while self._heap and len(entries) < amount:
+                entry = heapq.heappop(self._heap)
+                if entry[-1] is not None:
+                    entries.append(entry)
+
+            for entry in entries:
+                heapq.heappush(self._heap, entry)
+        return [entry[-1] for entry in entries]
+
+    def rebuild(self):
+        """
+        Fills the queue with the orders waiting for the kitchen in the
+        database.
+        """
+        orders = (Order.objects.filter(state__in=Order.KITCHEN_STATES)
+                               .select_related("table", "food"))
+        with self._lock:
+            self._heap = []
+            self._entries = {}
+        for order in orders:
+            self.update(order)
+
+
+_kitchenQueue = None
+
+
+def getKitchenQueue():
+    """
+    Gets the kitchen queue shared by the whole process, rebuilding it from
+    the database upon first use.
+
+    :return: The shared KitchenQueue object.
+    """
+    global _kitchenQueue
+
+    if _kitchenQueue is None:
+        kitchenQueue = KitchenQueue()
+        kitchenQueue.rebuild()
+        _kitchenQueue = kitchenQueue
+    return _kitchenQueue
+
+
+@receiver(post_save, sender=Order)
+def updateKitchenQueue(sender, instance, **kwargs):
+    """
+    Keeps the kitchen queue in step with the saved orders.
+    """
+    if _kitchenQueue is None:
+        # The queue is built from the database when it is first used
+        return
+
+    if instance.state in Order.KITCHEN_STATES:
+        _kitchenQueue.update(instance)
+    else:
+        _kitchenQueue.remove(instance.pk)
+
+
+@receiver(post_delete, sender=Order)
+def removeFromKitchenQueue(sender, instance, **kwargs):
+    """
+    Removes the deleted orders from the kitchen queue.
+    """
+    if _kitchenQueue is not None:
+        _kitchenQueue.remove(instance.pk)
@@ -0,0 +1,40 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from order.rollup import rollUpOrders
+
+
+class Command(BaseCommand):
+    """
+    Sums up the settled orders of the closed days into the daily sales, meant
+    to be run nightly (e.g. by cron).
+    """
+    help = "Sums up the settled orders of the closed days into daily sales."
+
+    def add_arguments(self, parser):
+        """
+        :param parser: The argument parser of the command.
+        """
+        parser.add_argument("--archive",
+                            action="store_true",
+                            help="Moves the settled orders into the archive.")
+        parser.add_argument("--before",
+                            help="Rolls up the days before this date "
+                                 "(YYYY-MM-DD), today by default.")
+
+    def handle(self, *args, **options):
+        """
+        Runs the rollup.
+        """
+        before = None
+        if options["before"]:
+            try:
+                before = datetime.datetime.strptime(options["before"],
+                                                    "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("The date must be YYYY-MM-DD.")
+
+        days, archived = rollUpOrders(before, options["archive"])
+        self.stdout.write("Rolled up {} days and archived {} orders."
+                          .format(days, archived))
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def serveHistory(apps, schema_editor):
+    """
+    Marks the orders from history as served so that they never reach the
+    kitchen queue.
+    """
+    Order = apps.get_model("order", "Order")
+    Order.objects.filter(isHistory=True).update(state="served")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0006_auto_20160505_0900'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='state',
+            field=models.CharField(choices=[('pending', 'pending'), ('preparing', 'preparing'), ('ready', 'ready'), ('served', 'served')], db_index=True, default='pending', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='submitted',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(serveHistory, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0005_popularitybucket'),
+        ('table', '0004_table_order'),
+        ('order', '0007_order_state_submitted'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('isPaid', models.BooleanField(default=False)),
+                ('state', models.CharField(choices=[('pending', 'pending'), ('preparing', 'preparing'), ('ready', 'ready'), ('served', 'served')], max_length=10)),
+                ('submitted', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+            ],
+            options={
+                'verbose_name_plural': 'daily sales',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['table', 'isHistory'], name='order_order_table_i_974fa4_idx'),
+        ),
+        migrations.AddField(
+            model_name='dailysales',
+            name='food',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='dailySales', to='menu.Food'),
+        ),
+        migrations.AddField(
+            model_name='archivedorder',
+            name='food',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archivedOrders', to='menu.Food'),
+        ),
+        migrations.AddField(
+            model_name='archivedorder',
+            name='table',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='TABLE_ARCHIVED', to='table.Table'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailysales',
+            unique_together={('date', 'food')},
+        ),
+    ]
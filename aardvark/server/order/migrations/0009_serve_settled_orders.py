@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+def serveHistory(apps, schema_editor):
+    """
+    Marks the orders settled while still waiting for the kitchen as served,
+    so that they leave the kitchen queue.
+    """
+    Order = apps.get_model("order", "Order")
+    Order.objects.filter(isHistory=True).exclude(
+        state="served").update(state="served")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0008_archivedorder_dailysales'),
+    ]
+
+    operations = [
+        migrations.RunPython(serveHistory, migrations.RunPython.noop),
+    ]
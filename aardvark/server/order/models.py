@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib import admin
+from django.utils import timezone
 
 
 class Order(models.Model):
@@ -14,7 +15,21 @@ class Order(models.Model):
         :isHistory:     Boolean that indicates whether the order has expired
                         (used for distinguishing between fresh orders and
                         orders from history)
+        :isPaid:        Boolean that indicates whether the order is paid.
+        :state:         The preparation state of the order limited to:
+                        "pending", "preparing", "ready" and "served".
+        :submitted:     The time the order was submitted at.
     """
+    STATES = (
+        ("pending", "pending"),
+        ("preparing", "preparing"),
+        ("ready", "ready"),
+        ("served", "served")
+    )
+
+    # The states of the orders still waiting for the kitchen
+    KITCHEN_STATES = ("pending", "preparing")
+
     table = models.ForeignKey("table.Table",
                               blank=False,
                               null=True,
@@ -29,6 +44,55 @@ class Order(models.Model):
     quantity = models.PositiveIntegerField(blank=False, null=False)
     isHistory = models.BooleanField(blank=False, null=False, default=False)
     isPaid = models.BooleanField(blank=False, null=False, default=False)
+    state = models.CharField(max_length=10,
+                             choices=STATES,
+                             default="pending",
+                             db_index=True)
+    submitted = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        """
+        Overriding the built-in python convert to string magic method
+
+        :return: The table number associated with the order.
+        """
+        return str(self.table.number)
+
+    class Meta:
+        """
+        Meta data for the order model.
+        """
+        # The bill of a table only reads its open orders
+        indexes = [models.Index(fields=["table", "isHistory"])]
+
+
+class ArchivedOrder(models.Model):
+    """
+    Model that represents a settled order moved out of the order table by
+    the nightly rollup, so that the queries of the open orders do not scan
+    the whole history. An archived order keeps the primary key it had as an
+    order.
+
+    Attributes:
+        :table:         The table associated with the order.
+        :food:          The food item ordered.
+        :quantity:      The amount of food ordered.
+        :isPaid:        Boolean that indicates whether the order was paid.
+        :state:         The preparation state the order was archived in.
+        :submitted:     The time the order was submitted at.
+    """
+    table = models.ForeignKey("table.Table",
+                              null=True,
+                              on_delete=models.SET_NULL,
+                              related_name="TABLE_ARCHIVED")
+    food = models.ForeignKey("menu.Food",
+                             null=True,
+                             on_delete=models.SET_NULL,
+                             related_name="archivedOrders")
+    quantity = models.PositiveIntegerField()
+    isPaid = models.BooleanField(default=False)
+    state = models.CharField(max_length=10, choices=Order.STATES)
+    submitted = models.DateTimeField(db_index=True)
 
     def __str__(self):
         """
@@ -39,10 +103,63 @@ class Order(models.Model):
         return str(self.table.number)
 
 
+class DailySales(models.Model):
+    """
+    Model that sums up the settled orders of a food item over a day.
+
+    Attributes:
+        :date:      The day the orders were submitted on.
+        :food:      The food item ordered.
+        :quantity:  The amount of food sold over the day.
+        :revenue:   The money made from the food over the day in GBP.
+    """
+    date = models.DateField(db_index=True)
+    food = models.ForeignKey("menu.Food",
+                             null=True,
+                             on_delete=models.SET_NULL,
+                             related_name="dailySales")
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=10,
+                                  decimal_places=2,
+                                  default=0)
+
+    def __str__(self):
+        """
+        Overriding the built-in python convert to string magic method
+
+        :return: The name of the food and the day of the sales.
+        """
+        return "{} ({})".format(self.food.name, self.date)
+
+    class Meta:
+        """
+        Meta data for the daily sales model.
+        """
+        unique_together = ("date", "food")
+        verbose_name_plural = "daily sales"
+
+
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ("table", "food", "quantity", "isHistory", "isPaid")
+    list_display = ("table", "food", "quantity", "isHistory", "isPaid",
+                    "state", "submitted")
     ordering = ("isHistory", "table")
     list_per_page = 25
 
     search_fields = ("table", "food", "quantity")
-    list_filter = ("table", "food", "quantity")
+    list_filter = ("table", "food", "quantity", "state")
+
+
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    list_display = ("table", "food", "quantity", "isPaid", "submitted")
+    ordering = ("-submitted",)
+    list_per_page = 25
+
+    list_filter = ("table", "food")
+
+
+class DailySalesAdmin(admin.ModelAdmin):
+    list_display = ("date", "food", "quantity", "revenue")
+    ordering = ("-date", "food")
+    list_per_page = 25
+
+    list_filter = ("date", "food")
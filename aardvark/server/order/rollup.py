@@ -0,0 +1,111 @@
+import datetime
+import itertools
+
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import Order, ArchivedOrder, DailySales
+
+
+# The amount of orders read, or archived, at once (below the limit of query
+# parameters of SQLite)
+CHUNK_SIZE = 500
+
+
+def rollUpOrders(before=None, archive=False):
+    """
+    Sums up the settled orders of every food item per day into the daily
+    sales, and optionally moves them into the archive so that the order
+    table only holds the open orders.
+
+    The sales of a day are always recomputed from both the settled and the
+    archived orders of that day, so rolling up twice (or after an order of
+    a past day is settled late) gives the same sums. Orders do not store the
+    price they were sold at, so the revenue is computed from the current
+    price of the food.
+
+    :param before: The day before which the orders are rolled up (a date
+                   object, today by default so that the open day is left
+                   alone).
+    :param archive: Boolean that indicates whether the settled orders are
+                    moved into the archive.
+    :return: A tuple of the amount of days rolled up and the amount of
+             orders archived.
+    """
+    before = before or timezone.localdate()
+    settled = Order.objects.filter(isHistory=True,
+                                   submitted__lt=_startOf(before))
+
+    firstSubmitted = settled.aggregate(first=Min("submitted"))["first"]
+    if firstSubmitted is None:
+        return 0, 0
+    first = timezone.localdate(firstSubmitted)
+    start, end = _startOf(first), _startOf(before)
+
+    with transaction.atomic():
+        totals = {}
+        orders = itertools.chain(
+            _iterSales(settled.filter(submitted__gte=start)),
+            _iterSales(ArchivedOrder.objects.filter(submitted__gte=start,
+                                                    submitted__lt=end)))
+        for submitted, food, price, quantity in orders:
+            sales = totals.setdefault((timezone.localdate(submitted), food),
+                                      [0, 0])
+            sales[0] += quantity
+            sales[1] += price * quantity
+
+        DailySales.objects.filter(date__gte=first, date__lt=before).delete()
+        DailySales.objects.bulk_create(
+            [DailySales(date=date, food_id=food, quantity=quantity,
+                        revenue=revenue)
+             for (date, food), (quantity, revenue) in sorted(totals.items())],
+            batch_size=CHUNK_SIZE)
+
+        archived = _archiveOrders(settled) if archive else 0
+
+    return (before - first).days, archived
+
+
+def _startOf(date):
+    """
+    :param date: A date object.
+    :return: The (aware) time the day starts at.
+    """
+    return timezone.make_aware(datetime.datetime.combine(date,
+                                                         datetime.time.min))
+
+
+def _iterSales(orders):
+    """
+    :param orders: A queryset of orders (or archived orders).
+    :return: An iterator of the <submitted, food id, price, quantity> of the
+             orders of a food item.
+    """
+    return (orders.filter(food__isnull=False)
+                  .values_list("submitted", "food_id", "food__price",
+                               "quantity")
+                  .iterator(chunk_size=CHUNK_SIZE))
+
+
+def _archiveOrders(orders):
+    """
+    Moves orders into the archive, a chunk at a time.
+
+    :param orders: A queryset of orders.
+    :return: The amount of orders archived.
+    """
+    archived = 0
+    while True:
+        chunk = list(orders.order_by("pk")[:CHUNK_SIZE])
+        if not chunk:
+            return archived
+
+        ArchivedOrder.objects.bulk_create(
+            [ArchivedOrder(pk=order.pk, table_id=order.table_id,
+                           food_id=order.food_id, quantity=order.quantity,
+                           isPaid=order.isPaid, state=order.state,
+                           submitted=order.submitted)
+             for order in chunk])
+        Order.objects.filter(pk__in=[order.pk for order in chunk]).delete()
+        archived += len(chunk)
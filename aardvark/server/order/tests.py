@@ -1,15 +1,23 @@
 import requests
+from django.core.management import call_command, CommandError
 from django.core.urlresolvers import reverse
 from django.test import TestCase, Client
+from django.utils import timezone
 
+from . import kitchen
+from .kitchen import KitchenQueue
 from .views import updateOrder, calculateBill, updateBill
-from .models import Order
+from .models import Order, ArchivedOrder, DailySales
+from .rollup import rollUpOrders
 from table.models import Table
 from menu.models import Food
 
+from decimal import Decimal
 from unittest.mock import patch, MagicMock, call
 from model_mommy import mommy
 
+import datetime
+import io
 import json
 
 ################################ UNITTESTS TESTS ###############################
@@ -36,6 +44,160 @@ class OrderModelTests(TestCase):
         self.assertEqual(self.validOrder.table, self.mockTable)
         self.assertEqual(self.validOrder.food, self.mockFood)
 
+class KitchenQueueTests(TestCase):
+    """
+    Unit tests for the KitchenQueue class.
+    """
+
+    def setUp(self):
+        """
+        Creates a queue and some orders of different courses.
+        """
+        self.queue = KitchenQueue()
+        self.now = timezone.now()
+
+        self.foods = {type: mommy.make("menu.Food", name=type, type=type)
+                      for type in ["starter", "main course", "dessert"]}
+
+    def createOrder(self, type, minutes):
+        """
+        Creates an order of a course submitted a few minutes from now.
+        """
+        submitted = self.now + timezone.timedelta(minutes=minutes)
+        return mommy.make(Order, food=self.foods[type], quantity=1,
+                          submitted=submitted)
+
+    def testTop(self):
+        """
+        Tests whether the orders are queued by submission time and then by
+        course.
+        """
+        orders = [self.createOrder("dessert", 0),
+                  self.createOrder("main course", 0),
+                  self.createOrder("starter", 5),
+                  self.createOrder("starter", 0)]
+        for order in orders:
+            self.queue.update(order)
+
+        foods = [item["food"] for item in self.queue.top(3)]
+        self.assertEqual(foods, ["starter", "main course", "dessert"])
+        self.assertEqual(len(self.queue.top(10)), 4)
+
+    def testUpdateAndRemove(self):
+        """
+        Tests whether updated orders replace their previous entry and
+        removed orders leave the queue.
+        """
+        main = self.createOrder("main course", 0)
+        dessert = self.createOrder("dessert", 1)
+        self.queue.update(main)
+        self.queue.update(dessert)
+
+        main.state = "preparing"
+        self.queue.update(main)
+        self.assertEqual([item["state"] for item in self.queue.top(10)],
+                         ["preparing", "pending"])
+
+        self.queue.remove(main.pk)
+        self.assertEqual([item["id"] for item in self.queue.top(10)],
+                         [dessert.pk])
+        self.assertEqual(len(self.queue), 1)
+
+
+class RollupTests(TestCase):
+    """
+    Unit tests for the rollup module.
+    """
+
+    def setUp(self):
+        """
+        Creates settled orders over two past days and an open order.
+        """
+        self.table = Table.objects.create(number=1, size=2)
+        self.soup = Food.objects.create(name="soup", type="starter",
+                                        description="hot", price="4.50")
+        self.day1 = datetime.date(2018, 3, 1)
+        self.day2 = datetime.date(2018, 3, 2)
+
+        self.createOrder(self.day1, 2, isHistory=True)
+        self.createOrder(self.day1, 1, isHistory=True)
+        self.createOrder(self.day2, 3, isHistory=True)
+        self.createOrder(self.day2, 5, isHistory=False)
+
+    def createOrder(self, day, quantity, isHistory):
+        """
+        Creates an order of soup submitted at noon of a day.
+        """
+        submitted = timezone.make_aware(
+            datetime.datetime.combine(day, datetime.time(12)))
+        return Order.objects.create(table=self.table, food=self.soup,
+                                    quantity=quantity, isHistory=isHistory,
+                                    isPaid=isHistory, state="served",
+                                    submitted=submitted)
+
+    def getSales(self):
+        """
+        :return: A list of the <date, quantity, revenue> of the daily sales.
+        """
+        return list(DailySales.objects.order_by("date")
+                                      .values_list("date", "quantity",
+                                                   "revenue"))
+
+    def testRollUpOrders(self):
+        """
+        Tests whether the settled orders are summed up per day, leaving the
+        open orders alone, and whether rolling up again changes nothing.
+        """
+        expected = [(self.day1, 3, Decimal("13.50")),
+                    (self.day2, 3, Decimal("13.50"))]
+
+        self.assertEqual(rollUpOrders(datetime.date(2018, 3, 3)), (2, 0))
+        self.assertEqual(self.getSales(), expected)
+        self.assertEqual(Order.objects.count(), 4)
+
+        rollUpOrders(datetime.date(2018, 3, 3))
+        self.assertEqual(self.getSales(), expected)
+
+    def testRollUpOrdersWithArchive(self):
+        """
+        Tests whether the settled orders are moved into the archive, and
+        whether an order settled late is added to the sums of its day.
+        """
+        self.assertEqual(rollUpOrders(datetime.date(2018, 3, 3), True),
+                         (2, 3))
+        self.assertEqual(list(Order.objects.values_list("isHistory",
+                                                        flat=True)),
+                         [False])
+        self.assertEqual(ArchivedOrder.objects.count(), 3)
+
+        Order.objects.update(isHistory=True, isPaid=True)
+        rollUpOrders(datetime.date(2018, 3, 3), True)
+        self.assertEqual(self.getSales(),
+                         [(self.day1, 3, Decimal("13.50")),
+                          (self.day2, 8, Decimal("36.00"))])
+        self.assertEqual(Order.objects.count(), 0)
+
+    def testRollUpOpenDay(self):
+        """
+        Tests whether the orders of the open day are left alone.
+        """
+        self.assertEqual(rollUpOrders(self.day2, True), (1, 2))
+        self.assertEqual(self.getSales(), [(self.day1, 3, Decimal("13.50"))])
+
+    def testRollUpCommand(self):
+        """
+        Tests whether the management command rolls up the orders.
+        """
+        output = io.StringIO()
+        call_command("rollup_orders", "--archive", "--before=2018-03-03",
+                     stdout=output)
+
+        self.assertIn("archived 3 orders", output.getvalue())
+        self.assertEqual(len(self.getSales()), 2)
+        with self.assertRaises(CommandError):
+            call_command("rollup_orders", "--before=tomorrow")
+
+
 class ViewTests(TestCase):
     """
     Unit tests for the methods in the views file.
@@ -72,16 +234,20 @@ class ViewTests(TestCase):
         mockTable.objects.get.return_value = self.mockTable
         mockOrder.objects.create.return_value = MagicMock()
 
-        response = updateOrder(mockRequest)
+        submitted = timezone.now()
+        with patch("order.views.timezone.now", return_value=submitted):
+            response = updateOrder(mockRequest)
 
         calls = [call(table=self.mockTable,
                       food=self.mockFood,
                       quantity=10,
-                      isHistory=False),
+                      isHistory=False,
+                      submitted=submitted),
                  call(table=self.mockTable,
                       food=self.mockFood,
                       quantity=1111,
-                      isHistory=False)]
+                      isHistory=False,
+                      submitted=submitted)]
 
         self.assertEqual(response.status_code, requests.codes.ok)
         mockOrder.objects.create.assert_has_calls(calls)
@@ -220,3 +386,88 @@ class IntegrationTests(TestCase):
         response = client.post(reverse("order-payment"), data)
 
         self.assertEqual(response.status_code, 200)
+
+
+class KitchenIntegrationTests(TestCase):
+    """
+    Integration tests for the kitchen queue.
+    """
+
+    def setUp(self):
+        """
+        Clears the shared kitchen queue and creates some entries in a mock
+        database.
+        """
+        kitchen._kitchenQueue = None
+
+        self.table = Table.objects.create(number=1, size=2)
+        Food.objects.create(name="soup", type="starter",
+                            description="hot", price=5.00)
+        Food.objects.create(name="steak", type="main course",
+                            description="rare", price=20.00)
+
+    def getQueue(self, client):
+        """
+        Fetches the food names of the kitchen queue.
+        """
+        response = client.get(reverse("order-kitchen"), {"limit": 5})
+        queue = json.loads(response.content.decode("utf-8"))["queue"]
+        return [item["food"] for item in queue]
+
+    def testKitchenQueue(self):
+        """
+        Tests whether submitted orders are queued course by course and leave
+        the queue once they are ready.
+        """
+        orderData = {"order": [{"table": 1, "food": "steak", "quantity": 1},
+                               {"table": 1, "food": "soup", "quantity": 2}]}
+        client = Client()
+        client.post(reverse("order-update"),
+                    json.dumps(orderData),
+                    content_type="application/json")
+
+        self.assertEqual(self.getQueue(client), ["soup", "steak"])
+
+        soup = Order.objects.get(food__name="soup")
+        response = client.post(reverse("order-state"),
+                               {"id": soup.pk, "state": "ready"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.getQueue(client), ["steak"])
+
+    def testSettledOrdersLeaveQueue(self):
+        """
+        Tests whether the orders of a table leave the queue once its bill is
+        paid.
+        """
+        steak = Food.objects.get(name="steak")
+        Order.objects.create(table=self.table, food=steak, quantity=1)
+        client = Client()
+        self.assertEqual(self.getQueue(client), ["steak"])
+
+        response = client.post(reverse("order-payment"),
+                               {"table": 1, "paid": 20})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.getQueue(client), [])
+        self.assertEqual(Order.objects.get().state, "served")
+
+    def testRebuildKitchenQueue(self):
+        """
+        Tests whether the queue is rebuilt from the orders in the database,
+        leaving out the ones that are served.
+        """
+        steak = Food.objects.get(name="steak")
+        Order.objects.create(table=self.table, food=steak, quantity=1)
+        Order.objects.create(table=self.table, food=steak, quantity=1,
+                             state="served")
+
+        self.assertEqual(self.getQueue(Client()), ["steak"])
+
+    def testUpdateUnknownState(self):
+        """
+        Tests whether an unknown state is rejected.
+        """
+        response = Client().post(reverse("order-state"),
+                                 {"id": 1, "state": "burnt"})
+        self.assertEqual(response.status_code, 400)
@@ -6,4 +6,6 @@ urlpatterns = [
     url(r'^update$', views.updateOrder, name='order-update'),
     url(r'^bill$', views.calculateBill, name='order-bill'),
     url(r'^payment$', views.updateBill, name='order-payment'),
+    url(r'^kitchen$', views.sendKitchenQueue, name='order-kitchen'),
+    url(r'^state$', views.updateOrderState, name='order-state'),
 ]
@@ -1,7 +1,13 @@
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.utils import timezone
 from .models import Order
+from .kitchen import getKitchenQueue
 from table.models import Table
 from menu.models import Food
+from menu.popularity import recordOrders
+from monitor.metrics import ordersIngested
+from server.codec import encodeResponse
+from events.broker import publish
 
 import json
 
@@ -20,11 +26,18 @@ def updateOrder(request):
                "food": name,
                "quantity": number}]}
 
+    All the items of an order share its submission time, so that the
+    kitchen prepares them course by course. The popularity of the ordered
+    food is increased once per submission.
+
     :param request: A django request object.
     :return: An empty HTTP response object.
     """
     if request.method == "POST":
         data = json.loads(request.body.decode("utf-8"))
+        submitted = timezone.now()
+        tableToItems = {}
+        foodToQuantity = {}
 
         for order in data["order"]:
             table = Table.objects.get(number=order["table"])
@@ -33,7 +46,18 @@ def updateOrder(request):
             Order.objects.create(table=table,
                                  food=food,
                                  quantity=quantity,
-                                 isHistory=False)
+                                 isHistory=False,
+                                 submitted=submitted)
+
+            items = tableToItems.setdefault(table.number, [])
+            items.append({"food": food.name, "quantity": quantity})
+            foodToQuantity[food.pk] = (foodToQuantity.get(food.pk, 0) +
+                                       int(quantity))
+
+        recordOrders(foodToQuantity, submitted)
+        ordersIngested.inc(amount=len(data["order"]))
+        for number, items in tableToItems.items():
+            publish("order-created", {"table": number, "items": items})
 
     return HttpResponse()
 
@@ -55,7 +79,7 @@ def calculateBill(request):
             bill += int(order.food.price) * int(order.quantity)
 
         billData["bill"] = bill
-        return HttpResponse(json.dumps(billData), content_type="application/json")
+        return encodeResponse(request, billData)
 
 def updateBill(request):
     """
@@ -71,6 +95,62 @@ def updateBill(request):
         for order in orders:
             order.isPaid = True
             order.isHistory = True
+            # A settled order is done with, so it leaves the kitchen queue
+            order.state = "served"
             order.save()
 
+        publish("bill-settled", {"table": table.number,
+                                 "paid": request.POST.get("paid")})
+        return HttpResponse()
+
+def sendKitchenQueue(request):
+    """
+    Sends the first orders waiting for the kitchen, ordered by submission
+    time and then by course, in the form:
+
+    {"queue": [{"id": number,
+                "table": number,
+                "food": name,
+                "type": type,
+                "quantity": number,
+                "state": state,
+                "submitted": time}, ...]}.
+
+    The amount of orders is given by the "limit" query parameter (10 by
+    default).
+
+    :param request: A django request object.
+    :return: An HTTP response object containing the queue.
+    """
+    if request.method == "GET":
+        try:
+            limit = int(request.GET.get("limit", 10))
+        except ValueError:
+            return HttpResponseBadRequest("The limit must be a number.")
+
+        queue = getKitchenQueue().top(limit)
+        return encodeResponse(request, {"queue": queue})
+
+def updateOrderState(request):
+    """
+    Changes the preparation state of an order (e.g. from "pending" to
+    "preparing"). Orders that are "ready" or "served" leave the kitchen
+    queue.
+
+    :param request: A django request object.
+    :return: An empty HTTP response object.
+    """
+    if request.method == "POST":
+        state = request.POST["state"]
+        if state not in dict(Order.STATES):
+            return HttpResponseBadRequest("Unknown state: {}".format(state))
+
+        order = Order.objects.select_related("table", "food") \
+                             .get(pk=request.POST["id"])
+        order.state = state
+        order.save(update_fields=["state"])
+
+        publish("order-state-changed", {"id": order.pk,
+                                        "table": order.table.number,
+                                        "state": state})
         return HttpResponse()
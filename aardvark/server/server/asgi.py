@@ -0,0 +1,20 @@
+"""
+ASGI config for server project.
+
+It exposes the ASGI callable as a module-level variable named
+``application``, to be served by an ASGI server such as uvicorn:
+
+    uvicorn server.asgi:application
+
+See server.asgihandler for how the requests are handled.
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+from server.asgihandler import AsgiHandler
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "server.settings")
+
+application = AsgiHandler(get_wsgi_application())
@@ -0,0 +1,260 @@
+"""
+An ASGI entry point for the server, for ASGI servers such as uvicorn.
+
+Django 2.0 predates Django's own ASGI support (and async views), so the
+requests are handled by the WSGI handler (and its middleware) in a bounded
+pool of threads, while the connections themselves are held by the event
+loop. An idle connection (kept alive between requests, or sending its
+request slowly) thus holds no thread, and a thread is only taken while a
+response is computed. The views that wait for long (e.g. the event stream)
+have an async variant served on the event loop itself.
+"""
+import asyncio
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.urls import Resolver404, resolve
+
+
+def asyncVariantOf(view):
+    """
+    Registers a coroutine as the variant of a view served by AsgiHandler,
+    for a view that would otherwise hold a thread while it waits (e.g. a
+    stream). The coroutine is called with the django request and the ASGI
+    receive and send awaitables, and sends the response itself (without
+    going through the middleware).
+
+    :param view: The view function.
+    :return: A decorator of the coroutine function.
+    """
+    def register(coroutine):
+        view.asyncVariant = coroutine
+        return coroutine
+    return register
+
+
+def buildEnviron(scope, body):
+    """
+    Converts the scope of an ASGI HTTP request into a WSGI environ.
+
+    :param scope: The ASGI scope of the request.
+    :param body: The bytes of the body of the request.
+    :return: The WSGI environ dictionary.
+    """
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {"REQUEST_METHOD": scope["method"],
+               "SCRIPT_NAME": scope.get("root_path", ""),
+               # WSGI strings are the bytes decoded as latin-1
+               "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+               "QUERY_STRING": scope.get("query_string",
+                                         b"").decode("latin-1"),
+               "SERVER_NAME": server[0],
+               "SERVER_PORT": str(server[1]),
+               "REMOTE_ADDR": client[0],
+               "SERVER_PROTOCOL": "HTTP/" + scope.get("http_version", "1.1"),
+               "wsgi.version": (1, 0),
+               "wsgi.url_scheme": scope.get("scheme", "http"),
+               "wsgi.input": io.BytesIO(body),
+               "wsgi.errors": sys.stderr,
+               "wsgi.multithread": True,
+               "wsgi.multiprocess": True,
+               "wsgi.run_once": False}
+
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = "HTTP_" + name
+        value = value.decode("latin-1")
+        environ[name] = (environ[name] + "," + value if name in environ
+                         else value)
+
+    # The body is read whole, even when it was sent in chunks
+    environ["CONTENT_LENGTH"] = str(len(body))
+    return environ
+
+
+class AsgiHandler:
+    """
+    An ASGI application (of the single callable form) serving the Django
+    project through its WSGI handler.
+    """
+
+    # The amount of chunks of a streaming response read ahead of the client
+    STREAM_BUFFER = 8
+
+    def __init__(self, wsgiApplication, threads=None):
+        """
+        :param wsgiApplication: The WSGI handler of the project.
+        :param threads: The amount of threads the requests are handled by
+                        (the ASGI_THREADS setting by default).
+        """
+        self.wsgiApplication = wsgiApplication
+        self.executor = ThreadPoolExecutor(
+            threads or getattr(settings, "ASGI_THREADS", 20))
+
+    async def __call__(self, scope, receive, send):
+        """
+        Handles an ASGI connection.
+
+        :param scope: The ASGI scope of the connection.
+        :param receive: The ASGI receive awaitable.
+        :param send: The ASGI send awaitable.
+        """
+        if scope["type"] == "lifespan":
+            await self._handleLifespan(receive, send)
+            return
+        elif scope["type"] != "http":
+            raise ValueError("Unsupported ASGI scope: " + scope["type"])
+
+        body = await _readBody(receive)
+        if body is None:
+            return
+
+        environ = buildEnviron(scope, body)
+        asyncView = _getAsyncVariant(scope["path"])
+        if asyncView is not None:
+            await asyncView(WSGIRequest(environ), receive, send)
+        else:
+            await self._handleWsgi(environ, send)
+
+    async def _handleWsgi(self, environ, send):
+        """
+        Handles a request with the WSGI handler in the thread pool. A
+        streaming response is read and closed on the thread that created it
+        (the database connections being per thread, e.g. the cursor of an
+        export), which passes its chunks to the event loop.
+
+        :param environ: The WSGI environ of the request.
+        :param send: The ASGI send awaitable.
+        """
+        loop = asyncio.get_event_loop()
+        queue = asyncio.Queue()
+        # The thread waits once STREAM_BUFFER chunks are left to send
+        slots = threading.Semaphore(self.STREAM_BUFFER)
+        isCancelled = threading.Event()
+
+        def put(item):
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+
+        job = loop.run_in_executor(self.executor, self._callWsgi, environ,
+                                   put, slots, isCancelled)
+        try:
+            start = await queue.get()
+            if start is None:
+                # The handler failed, its error is raised by the job
+                return
+
+            status, headers, body = start
+            await send({"type": "http.response.start",
+                        "status": status,
+                        "headers": headers})
+            if body is not None:
+                await send({"type": "http.response.body", "body": body})
+                return
+
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                slots.release()
+                await send({"type": "http.response.body",
+                            "body": chunk,
+                            "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            # Stops a stream that is no longer sent, and waits for the
+            # response to be closed
+            isCancelled.set()
+            slots.release()
+            await job
+
+    def _callWsgi(self, environ, put, slots, isCancelled):
+        """
+        Calls the WSGI handler, passing a <status, headers, body> tuple and
+        then the chunks of a streaming response (whose body is None) to put,
+        and then None once done (or failed).
+
+        :param environ: The WSGI environ of the request.
+        :param put: The function passing an item to the event loop.
+        :param slots: The semaphore acquired before passing every chunk.
+        :param isCancelled: The event set once the chunks are not sent
+                            anymore.
+        """
+        started = []
+
+        def startResponse(status, headers, exc_info=None):
+            started[:] = [int(status.split(" ", 1)[0]),
+                          [(name.lower().encode("latin-1"),
+                            value.encode("latin-1"))
+                           for name, value in headers]]
+
+        try:
+            response = self.wsgiApplication(environ, startResponse)
+            try:
+                if not getattr(response, "streaming", False):
+                    put((started[0], started[1], b"".join(response)))
+                    return
+
+                put((started[0], started[1], None))
+                for chunk in response:
+                    slots.acquire()
+                    if isCancelled.is_set():
+                        break
+                    put(chunk)
+            finally:
+                if hasattr(response, "close"):
+                    response.close()
+        finally:
+            put(None)
+
+    async def _handleLifespan(self, receive, send):
+        """
+        Acknowledges the startup and shutdown of the ASGI server, stopping
+        the thread pool on shutdown.
+
+        :param receive: The ASGI receive awaitable.
+        :param send: The ASGI send awaitable.
+        """
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+async def _readBody(receive):
+    """
+    Reads the body of an ASGI HTTP request.
+
+    :param receive: The ASGI receive awaitable.
+    :return: The bytes of the body, or None if the client disconnected.
+    """
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+def _getAsyncVariant(path):
+    """
+    :param path: The path of a request.
+    :return: The coroutine serving the view of the path under ASGI (see
+             asyncVariantOf), or None if the view has none.
+    """
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return None
+    return getattr(match.func, "asyncVariant", None)
@@ -0,0 +1,86 @@
+"""
+Content negotiation of the data sent by the views.
+
+JSON is sent by default, while MessagePack (a compact binary format) is sent
+to clients that accept it, provided that the msgpack package is installed.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class JsonCodec:
+    """
+    Encodes data in JSON formatting.
+    """
+    contentType = "application/json"
+
+    def encode(self, data):
+        """
+        :param data: The data to be encoded (decimals, dates and times are
+                     encoded as strings).
+        :return: The encoded data as a string.
+        """
+        return json.dumps(data, cls=DjangoJSONEncoder)
+
+
+class MsgPackCodec:
+    """
+    Encodes data in MessagePack formatting.
+    """
+    contentType = "application/msgpack"
+
+    def encode(self, data):
+        """
+        :param data: The data to be encoded (decimals, dates and times are
+                     encoded as strings, just like in JSON).
+        :return: The encoded data as bytes.
+        """
+        return msgpack.packb(data, use_bin_type=True,
+                             default=DjangoJSONEncoder().default)
+
+
+JSON = JsonCodec()
+MSGPACK = MsgPackCodec()
+
+# Every codec, e.g. to invalidate a cached payload in all its formats
+CODECS = [JSON, MSGPACK]
+
+
+def negotiateCodec(request):
+    """
+    Picks the codec to encode the response with from the Accept header of
+    the request.
+
+    :param request: A django request object.
+    :return: The MessagePack codec if the client accepts it (and msgpack is
+             installed) otherwise the JSON codec.
+    """
+    accept = request.META.get("HTTP_ACCEPT", "")
+    if msgpack is not None and MSGPACK.contentType in accept:
+        return MSGPACK
+    return JSON
+
+
+def encodeResponse(request, data, status=200):
+    """
+    Creates a response holding the data encoded in the format the client
+    accepts.
+
+    :param request: A django request object.
+    :param data: The data to be sent.
+    :param status: The HTTP status code of the response.
+    :return: An HTTP response object containing the encoded data.
+    """
+    codec = negotiateCodec(request)
+    response = HttpResponse(codec.encode(data), content_type=codec.contentType,
+                            status=status)
+    patch_vary_headers(response, ["Accept"])
+    return response
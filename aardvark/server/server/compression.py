@@ -0,0 +1,162 @@
+"""
+Compression of the responses sent by the server.
+
+Responses above a size threshold are compressed with the best encoding the
+client accepts (brotli if the brotli package is installed, otherwise gzip).
+Payloads that rarely change, such as the menu, are cached along with their
+compressed variants so that they are only compressed once.
+"""
+import gzip
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from monitor.metrics import recordCacheLookup
+from .codec import CODECS, negotiateCodec
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# The encodings the server can compress with
+COMPRESSORS = {"gzip": lambda content: gzip.compress(content, compresslevel=6)}
+if brotli is not None:
+    COMPRESSORS["br"] = brotli.compress
+
+
+def getEncodings():
+    """
+    :return: The encodings enabled in the settings (COMPRESSION_ENCODINGS)
+             that the server can compress with, in order of preference.
+    """
+    return [encoding for encoding in settings.COMPRESSION_ENCODINGS
+            if encoding in COMPRESSORS]
+
+
+def chooseEncoding(request):
+    """
+    Picks the encoding to compress the response with from the
+    Accept-Encoding header of the request.
+
+    :param request: A django request object.
+    :return: The accepted encoding with the highest quality (ties broken by
+             the server's preference) or None if no encoding is accepted.
+    """
+    qualities = {}
+    for item in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        encoding, *parameters = item.strip().split(";")
+        quality = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[encoding.strip().lower()] = quality
+
+    bestEncoding, bestQuality = None, 0.0
+    for encoding in getEncodings():
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > bestQuality:
+            bestEncoding, bestQuality = encoding, quality
+    return bestEncoding
+
+
+def compressResponse(request, response):
+    """
+    Compresses the content of a response in place if it is large enough
+    and the client accepts a compressed encoding.
+
+    :param request: A django request object.
+    :param response: The HTTP response to be compressed.
+    :return: The HTTP response.
+    """
+    patch_vary_headers(response, ["Accept-Encoding"])
+
+    if (response.streaming or response.has_header("Content-Encoding")
+            or len(response.content) < settings.COMPRESSION_MIN_SIZE):
+        return response
+
+    encoding = chooseEncoding(request)
+    if encoding is not None:
+        compressed = COMPRESSORS[encoding](response.content)
+        if len(compressed) < len(response.content):
+            response.content = compressed
+            response["Content-Encoding"] = encoding
+            response["Content-Length"] = str(len(compressed))
+    return response
+
+
+class CompressionMiddleware:
+    """
+    Compresses the responses above COMPRESSION_MIN_SIZE bytes, unless a view
+    already sent them compressed (e.g. from the cache).
+    """
+
+    def __init__(self, getResponse):
+        """
+        :param getResponse: The next middleware or view in the chain.
+        """
+        self.getResponse = getResponse
+
+    def __call__(self, request):
+        """
+        :param request: A django request object.
+        :return: The (possibly compressed) HTTP response.
+        """
+        return compressResponse(request, self.getResponse(request))
+
+
+def sendCachedPayload(request, key, render):
+    """
+    Sends a payload from the cache, in the format and encoding the client
+    accepts. On a cache miss, the payload is rendered and stored along with
+    all its compressed variants.
+
+    :param request: A django request object.
+    :param key: The cache key of the payload.
+    :param render: A function that takes a codec and returns the payload
+                   encoded with it.
+    :return: An HTTP response object containing the payload.
+    """
+    codec = negotiateCodec(request)
+    cacheKey = "{}:{}".format(key, codec.contentType)
+    variants = cache.get(cacheKey)
+    recordCacheLookup(key, variants is not None)
+
+    if variants is None:
+        content = render(codec)
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+
+        variants = {None: content}
+        if len(content) >= settings.COMPRESSION_MIN_SIZE:
+            for encoding in getEncodings():
+                variants[encoding] = COMPRESSORS[encoding](content)
+        cache.set(cacheKey, variants, None)
+
+    encoding = chooseEncoding(request)
+    if encoding not in variants:
+        encoding = None
+
+    response = HttpResponse(variants[encoding],
+                            content_type=codec.contentType)
+    if encoding is not None:
+        response["Content-Encoding"] = encoding
+    patch_vary_headers(response, ["Accept", "Accept-Encoding"])
+    return response
+
+
+def invalidateCachedPayload(*keys):
+    """
+    Removes payloads from the cache, in every format.
+
+    :param keys: The cache keys of the payloads.
+    """
+    cache.delete_many(["{}:{}".format(key, codec.contentType)
+                       for key in keys for codec in CODECS])
@@ -51,6 +51,9 @@ INSTALLED_APPS = [
     'table.apps.TableConfig',
     'booking.apps.BookingConfig',
     'menu.apps.MenuConfig',
+    'monitor.apps.MonitorConfig',
+    'events.apps.EventsConfig',
+    'analytics.apps.AnalyticsConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -59,13 +62,14 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 ]
 
-MIDDLEWARE_CLASSES = [
+MIDDLEWARE = [
+    'monitor.middleware.ProfilingMiddleware',
+    'server.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
 #    'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.auth.middleware.SessionAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -97,7 +101,22 @@ WSGI_APPLICATION = 'server.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'NAME': os.getenv('DJANGO_DB_NAME',
+                          os.path.join(BASE_DIR, 'db.sqlite3')),
+    }
+}
+
+
+# Cache
+# The summaries of the closed days of the sales reports are cached for good,
+# so the cache holds a few years of them besides the cached responses.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
     }
 }
 
@@ -139,3 +158,38 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/1.9/howto/static-files/
 
 STATIC_URL = '/static/'
+
+
+# Profiling
+# The amount of recent requests kept for the latency histogram and the
+# amount of slowest requests (along with their SQL) kept for debugging.
+
+PROFILING_HISTORY = 1000
+PROFILING_SLOWEST = 20
+
+
+# Compression
+# Responses of at least COMPRESSION_MIN_SIZE bytes are compressed with the
+# first of COMPRESSION_ENCODINGS that the client accepts (brotli is skipped
+# when the brotli package is not installed).
+
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_ENCODINGS = ["br", "gzip"]
+
+
+# Events
+# The amount of recent events kept for reconnecting subscribers, the
+# maximum amount of events waiting to be sent to each subscriber, and the
+# seconds of silence after which a heartbeat is sent.
+
+EVENTS_HISTORY = 100
+EVENTS_BUFFER_SIZE = 100
+EVENTS_HEARTBEAT = 15
+
+
+# ASGI
+# The amount of threads the requests are handled by when the server is
+# served through server.asgi (the connections themselves are held by the
+# event loop, without a thread).
+
+ASGI_THREADS = 20
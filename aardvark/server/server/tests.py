@@ -0,0 +1,419 @@
+from django.core.urlresolvers import reverse
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.core.wsgi import get_wsgi_application
+from django.test import (TestCase, TransactionTestCase, Client,
+                         RequestFactory, override_settings)
+
+from .asgihandler import AsgiHandler, buildEnviron
+from .codec import JSON, MSGPACK, negotiateCodec, encodeResponse, msgpack
+from .compression import chooseEncoding, compressResponse
+from booking.models import Slot
+from booking.slots import resetSchedule
+from events.broker import getBroker
+from monitor.metrics import cacheLookups
+from menu.models import Food
+from table.models import Table
+
+from decimal import Decimal
+import asyncio
+import datetime
+import gzip
+import io
+import threading
+from unittest import skipIf
+from unittest.mock import patch
+
+import json
+
+################################ UNITTESTS TESTS ###############################
+
+
+class CodecTests(TestCase):
+    """
+    Unit tests for the codec module.
+    """
+
+    def setUp(self):
+        """
+        Creates a request factory and some data to be encoded.
+        """
+        self.factory = RequestFactory()
+        self.data = {"bill": Decimal("10.50"), "tables": [1, 2]}
+
+    def testNegotiateJsonByDefault(self):
+        """
+        Tests whether JSON is picked when the client does not ask for
+        MessagePack or when msgpack is not installed.
+        """
+        request = self.factory.get("/", HTTP_ACCEPT="application/json")
+        self.assertIs(negotiateCodec(request), JSON)
+
+        request = self.factory.get("/", HTTP_ACCEPT="application/msgpack")
+        with patch("server.codec.msgpack", None):
+            self.assertIs(negotiateCodec(request), JSON)
+
+    def testEncodeJsonResponse(self):
+        """
+        Tests whether decimals are sent as strings in JSON formatting.
+        """
+        response = encodeResponse(self.factory.get("/"), self.data)
+
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response["Vary"], "Accept")
+        self.assertEqual(json.loads(response.content.decode("utf-8")),
+                         {"bill": "10.50", "tables": [1, 2]})
+
+    @skipIf(msgpack is None, "msgpack is not installed")
+    def testEncodeMsgPackResponse(self):
+        """
+        Tests whether the data is sent in MessagePack formatting when the
+        client accepts it.
+        """
+        request = self.factory.get("/", HTTP_ACCEPT="application/msgpack, "
+                                                    "application/json")
+        response = encodeResponse(request, self.data)
+
+        self.assertIs(negotiateCodec(request), MSGPACK)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content, raw=False),
+                         {"bill": "10.50", "tables": [1, 2]})
+
+
+@override_settings(COMPRESSION_ENCODINGS=["br", "gzip"],
+                   COMPRESSION_MIN_SIZE=100)
+class CompressionTests(TestCase):
+    """
+    Unit tests for the compression module.
+    """
+
+    def setUp(self):
+        """
+        Creates a request factory.
+        """
+        self.factory = RequestFactory()
+
+    def testChooseEncoding(self):
+        """
+        Tests whether the accepted encoding with the highest quality is
+        picked, ignoring the ones the server cannot compress with.
+        """
+        headers = {"gzip, deflate": "gzip",
+                   "deflate, gzip;q=0.5": "gzip",
+                   "gzip;q=0, deflate": None,
+                   "*": "gzip",
+                   "identity": None,
+                   "": None}
+
+        for header, encoding in headers.items():
+            request = self.factory.get("/", HTTP_ACCEPT_ENCODING=header)
+            with patch.dict("server.compression.COMPRESSORS",
+                            clear=True, gzip=gzip.compress):
+                self.assertEqual(chooseEncoding(request), encoding, header)
+
+    def testCompressResponse(self):
+        """
+        Tests whether only large responses are compressed.
+        """
+        request = self.factory.get("/", HTTP_ACCEPT_ENCODING="gzip")
+        content = b"potato " * 100
+
+        response = compressResponse(request, HttpResponse(content))
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(gzip.decompress(response.content), content)
+
+        response = compressResponse(request, HttpResponse(b"potato"))
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response.content, b"potato")
+
+
+class AsgiEnvironTests(TestCase):
+    """
+    Unit tests for the conversion of ASGI requests in the asgihandler module.
+    """
+
+    def testBuildEnviron(self):
+        """
+        Tests whether the path, query string and headers of an ASGI scope are
+        converted to their WSGI form.
+        """
+        scope = {"type": "http", "method": "POST", "path": "/menu/caf\u00e9",
+                 "query_string": b"format=compact", "server": ("host", 8000),
+                 "headers": [(b"content-type", b"application/json"),
+                             (b"accept", b"application/json"),
+                             (b"accept", b"text/plain")]}
+        environ = buildEnviron(scope, b"{}")
+
+        self.assertEqual(environ["REQUEST_METHOD"], "POST")
+        self.assertEqual(environ["PATH_INFO"], "/menu/caf\u00c3\u00a9")
+        self.assertEqual(environ["QUERY_STRING"], "format=compact")
+        self.assertEqual(environ["SERVER_PORT"], "8000")
+        self.assertEqual(environ["CONTENT_TYPE"], "application/json")
+        self.assertEqual(environ["CONTENT_LENGTH"], "2")
+        self.assertEqual(environ["HTTP_ACCEPT"],
+                         "application/json,text/plain")
+        self.assertEqual(environ["wsgi.input"].read(), b"{}")
+
+
+############################### INTEGRATION TESTS ##############################
+
+
+@override_settings(COMPRESSION_ENCODINGS=["gzip"], COMPRESSION_MIN_SIZE=100)
+class CompressionIntegrationTests(TestCase):
+    """
+    Integration tests for the compression of the views.
+    """
+
+    def setUp(self):
+        """
+        Clears the cache and creates a menu large enough to be compressed.
+        """
+        cache.clear()
+        cacheLookups.clear()
+        for i in range(10):
+            Food.objects.create(name="potato {}".format(i),
+                                type="main course",
+                                description="rather squary...",
+                                price="50.00")
+
+    def testSendCachedMenu(self):
+        """
+        Tests whether the menu is compressed once, sent from the cache
+        afterwards and rebuilt when the menu changes.
+        """
+        client = Client(HTTP_ACCEPT_ENCODING="gzip")
+
+        for i in range(2):
+            response = client.get(reverse("menu-get"), {"format": "compact"})
+            data = json.loads(gzip.decompress(response.content).decode())
+            self.assertEqual(response["Content-Encoding"], "gzip")
+            self.assertEqual(len(data), 10)
+
+        Food.objects.get(name="potato 0").delete()
+        response = client.get(reverse("menu-get"), {"format": "compact"})
+        data = json.loads(gzip.decompress(response.content).decode())
+        self.assertEqual(len(data), 9)
+
+        self.assertEqual(cacheLookups.values(), {("menu:compact", "hit"): 1,
+                                                 ("menu:compact", "miss"): 2})
+
+    def testSendUncompressedMenu(self):
+        """
+        Tests whether the menu is sent uncompressed to clients that do not
+        accept a compressed encoding.
+        """
+        client = Client()
+        response = client.get(reverse("menu-get"))
+        data = json.loads(response.content.decode("utf-8"))
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(len(data), 10)
+
+
+
+
+@skipIf(msgpack is None, "msgpack is not installed")
+class IntegrationTests(TestCase):
+    """
+    Integration tests for the content negotiation of the views.
+    """
+
+    def setUp(self):
+        """
+        Creates some entries in a mock database.
+        """
+        Table.objects.create(number=2, size=4)
+        Table.objects.create(number=1, size=2)
+        Food.objects.create(name="potato",
+                            type="main course",
+                            description="rather squary...",
+                            price="50.00")
+
+    def testSendMenuInMsgPack(self):
+        """
+        Tests whether the menu is sent in MessagePack formatting, in both
+        the serialized and compact formats.
+        """
+        client = Client(HTTP_ACCEPT="application/msgpack")
+
+        response = client.get(reverse("menu-get"))
+        data = msgpack.unpackb(response.content, raw=False)
+        self.assertEqual(data[0]["fields"]["price"], "50.00")
+
+        response = client.get(reverse("menu-get"), {"format": "compact"})
+        data = msgpack.unpackb(response.content, raw=False)
+        self.assertEqual(data, [["potato", "main course",
+                                 "rather squary...", "50.00"]])
+
+    def testSendTablesInMsgPack(self):
+        """
+        Tests whether the table numbers are sent in MessagePack formatting.
+        """
+        client = Client(HTTP_ACCEPT="application/msgpack")
+        response = client.get(reverse("table-total"))
+
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content, raw=False),
+                         {"tables": [1, 2]})
+
+
+class AsgiIntegrationTests(TransactionTestCase):
+    """
+    Integration tests for the ASGI entry point, whose requests are handled
+    by other threads (and database connections) than the tests.
+    """
+
+    def setUp(self):
+        """
+        Creates an ASGI handler, an event loop to run it, a table and the
+        slot it is booked at (the slots of the migrations being flushed by
+        the previous transaction tests).
+        """
+        self.handler = AsgiHandler(get_wsgi_application(), threads=2)
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.addCleanup(self.handler.executor.shutdown)
+        self.addCleanup(resetSchedule, Slot)
+        Table.objects.create(number=1, size=2)
+        Slot.objects.get_or_create(weekday=2, time=datetime.time(11, 0))
+
+    def request(self, path, method="GET", body=b"", headers=()):
+        """
+        Sends a request to the handler.
+
+        :return: The list of the ASGI messages sent back.
+        """
+        scope = {"type": "http", "method": method, "path": path,
+                 "query_string": b"", "server": ("testserver", 80),
+                 "headers": list(headers)}
+        messages = [{"type": "http.request", "body": body}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        self.loop.run_until_complete(self.handler(scope, receive, send))
+        return sent
+
+    def testGetRequest(self):
+        """
+        Tests whether a view is served through the handler.
+        """
+        start, body = self.request(reverse("table-total"),
+                                   headers=[(b"accept", b"application/json")])
+
+        self.assertEqual(start["status"], 200)
+        self.assertIn((b"content-type", b"application/json"),
+                      start["headers"])
+        self.assertEqual(json.loads(body["body"].decode("utf-8")),
+                         {"tables": [1]})
+
+    def testPostRequest(self):
+        """
+        Tests whether the body of a request reaches the view.
+        """
+        bookingData = {"name": "watson", "phone": "07472440699",
+                       "email": "programmerK@gmail.com",
+                       "date": "2030-05-01", "time": "11:00", "table": "1"}
+        start, body = self.request(
+            reverse("booking-update"), "POST",
+            json.dumps(bookingData).encode("utf-8"),
+            [(b"content-type", b"application/json"),
+             (b"accept", b"application/json")])
+
+        self.assertEqual(start["status"], 200)
+        self.assertEqual(len(json.loads(body["body"].decode("utf-8"))
+                             ["reference"]), 10)
+
+    def testStreamOnOneThread(self):
+        """
+        Tests whether a streaming response is read and closed on the thread
+        that created it.
+        """
+        threads = []
+
+        class Response:
+            streaming = True
+
+            def __iter__(self):
+                for i in range(20):
+                    threads.append(threading.get_ident())
+                    yield str(i).encode("ascii")
+
+            def close(self):
+                threads.append(threading.get_ident())
+
+        def application(environ, startResponse):
+            threads.append(threading.get_ident())
+            startResponse("200 OK", [])
+            return Response()
+
+        self.handler.wsgiApplication = application
+        sent = self.request("/")
+
+        self.assertEqual(b"".join(message.get("body", b"")
+                                  for message in sent[1:]),
+                         b"".join(str(i).encode("ascii") for i in range(20)))
+        self.assertEqual(len(threads), 22)
+        self.assertEqual(len(set(threads)), 1)
+
+    def testStreamEvents(self):
+        """
+        Tests whether the event stream is served on the event loop, receiving
+        the events published by other threads until the client disconnects.
+        """
+        scope = {"type": "http", "method": "GET",
+                 "path": reverse("events-stream"), "query_string": b"",
+                 "headers": []}
+        sent = []
+
+        async def stream():
+            disconnected = asyncio.Event()
+            messages = [{"type": "http.request", "body": b""}]
+
+            async def receive():
+                if messages:
+                    return messages.pop(0)
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                sent.append(message)
+                if len(sent) == 2:
+                    threading.Thread(target=getBroker().publish,
+                                     args=("order-created",
+                                           {"table": 1})).start()
+                elif len(sent) == 3:
+                    disconnected.set()
+
+            await asyncio.wait_for(self.handler(scope, receive, send), 10)
+
+        self.loop.run_until_complete(stream())
+
+        self.assertEqual(sent[0]["status"], 200)
+        self.assertIn(b"event: order-created", sent[2]["body"])
+        self.assertEqual(getBroker().subscriberCount, 0)
+
+    def testLifespan(self):
+        """
+        Tests whether the startup and shutdown of the server are
+        acknowledged.
+        """
+        messages = [{"type": "lifespan.startup"},
+                    {"type": "lifespan.shutdown"}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        self.loop.run_until_complete(self.handler({"type": "lifespan"},
+                                                  receive, send))
+        self.assertEqual(sent, ["lifespan.startup.complete",
+                                "lifespan.shutdown.complete"])
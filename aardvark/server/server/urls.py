@@ -16,10 +16,16 @@ Including another URLconf
 from django.conf.urls import url, include
 from django.contrib import admin
 
+from monitor.views import sendMetrics
+
 urlpatterns = [
     url(r'^menu/', include('menu.urls')),
     url(r'^booking/', include('booking.urls')),
     url(r'^table/', include('table.urls')),
     url(r'^order/', include('order.urls')),
+    url(r'^monitor/', include('monitor.urls')),
+    url(r'^events/', include('events.urls')),
+    url(r'^analytics/', include('analytics.urls')),
     url(r'^admin/', admin.site.urls),
+    url(r'^metrics$', sendMetrics, name='monitor-metrics'),
 ]
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def placeTables(apps, schema_editor):
+    """
+    Places the existing tables on the floor plan in rows of five, like the
+    grid of table buttons they were shown in before.
+    """
+    Table = apps.get_model("table", "Table")
+    for i, table in enumerate(Table.objects.order_by("number")):
+        table.x = 100 * (i % 5)
+        table.y = 100 * (i // 5)
+        table.save(update_fields=["x", "y"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('table', '0004_table_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='table',
+            name='x',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='table',
+            name='y',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(placeTables, migrations.RunPython.noop),
+    ]
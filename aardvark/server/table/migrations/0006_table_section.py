@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('table', '0005_table_position'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='table',
+            name='section',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+    ]
@@ -4,12 +4,18 @@ from django.contrib import admin
 
 class Table(models.Model):
     """
-    Model that represents a food item on the restaurant menu.
+    Model that represents a table of the restaurant.
 
     Attributes:
         :number:        The number of the table.
         :size:          The amount of chairs the table has.
         :order:         The order associated with the table.
+        :x:             The horizontal position of the table on the floor
+                        plan in pixels (null when the table is not placed).
+        :y:             The vertical position of the table on the floor plan
+                        in pixels (null when the table is not placed).
+        :section:       The section of the restaurant the table is in (e.g.
+                        "Terrace" or "First floor"), if any.
     """
     number = models.PositiveIntegerField(blank=False)
     size = models.PositiveIntegerField(blank=False)
@@ -18,6 +24,9 @@ class Table(models.Model):
                               null=True,
                               on_delete=models.SET_NULL,
                               related_name="ordered_table")
+    x = models.FloatField(blank=True, null=True)
+    y = models.FloatField(blank=True, null=True)
+    section = models.CharField(max_length=50, blank=True, default="")
 
     def __str__(self):
         """
@@ -28,10 +37,10 @@ class Table(models.Model):
         return str(self.number)
 
 class TableAdmin(admin.ModelAdmin):
-    list_display = ("number", "size",)
+    list_display = ("number", "size", "section", "x", "y")
     ordering = ("number",)
     list_per_page = 25
 
     search_fields = ("number", "size")
-    list_filter = ("number", "size")
-    readonly_fields = ("order",)
\ No newline at end of file
+    list_filter = ("section", "number", "size")
+    readonly_fields = ("order",)
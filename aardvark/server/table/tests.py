@@ -4,8 +4,11 @@ import json
 from django.core.urlresolvers import reverse
 from django.test import TestCase, Client
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
 from .models import Table
+from booking.models import Booking
+from order.models import Order
 from .views import sendTotalTables
 
 from unittest.mock import patch, MagicMock, call
@@ -102,3 +105,63 @@ class ViewTests(TestCase):
         response = sendTotalTables(mockRequest)
         data = json.loads(response.content.decode("utf-8"))
         self.assertEqual(data["tables"], tableNumbers)
+
+
+############################### INTEGRATION TESTS ##############################
+
+
+class IntegrationTests(TestCase):
+    """
+    Integration tests for the table app.
+    """
+
+    def setUp(self):
+        """
+        Creates a placed table with unpaid orders, a placed table booked
+        today and an unplaced table.
+        """
+        table1 = Table.objects.create(number=1, size=2, x=50, y=20,
+                                      section="Terrace")
+        table2 = Table.objects.create(number=2, size=4, x=150, y=220)
+        Table.objects.create(number=3, size=6)
+
+        Order.objects.create(table=table1, food=None, quantity=1)
+        Booking.objects.create(name="sherlock", email="sherlock@bakers.com",
+                               phone="07472440699",
+                               date=timezone.localdate(),
+                               time=datetime.time(13, 0), table=table2)
+
+    def getFloorPlan(self, query=None):
+        """
+        Fetches the floor plan from the server.
+        """
+        response = Client().get(reverse("table-floor"), query or {})
+        return json.loads(response.content.decode("utf-8"))["tables"]
+
+    def testSendFloorPlan(self):
+        """
+        Tests whether the tables are sent with their state in one query,
+        placing the unplaced tables below the others.
+        """
+        with self.assertNumQueries(1):
+            floorPlan = self.getFloorPlan()
+
+        self.assertEqual(
+            [(table["x"], table["y"], table["section"], table["isOccupied"],
+              table["isBooked"]) for table in floorPlan],
+            [(50, 20, "Terrace", True, False),
+             (150, 220, "", False, True),
+             (0, 320, "", False, False)])
+
+    def testSendPartialFloorPlan(self):
+        """
+        Tests whether the floor plan is restricted to the given tables, and
+        whether invalid table numbers are rejected.
+        """
+        Order.objects.update(isHistory=True)
+        floorPlan = self.getFloorPlan({"tables": "1,3"})
+
+        self.assertEqual([(table["number"], table["isOccupied"])
+                          for table in floorPlan], [(1, False), (3, False)])
+        response = Client().get(reverse("table-floor"), {"tables": "one"})
+        self.assertEqual(response.status_code, 400)
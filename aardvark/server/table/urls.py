@@ -4,4 +4,5 @@ from . import views
 
 urlpatterns = [
     url(r'^total$', views.sendTotalTables, name='table-total'),
+    url(r'^floor$', views.sendFloorPlan, name='table-floor'),
 ]
@@ -1,7 +1,15 @@
-from django.http import HttpResponse
+from django.db.models import Exists, OuterRef
+from django.http import HttpResponseBadRequest
+from django.utils import timezone
+from server.codec import encodeResponse
+from booking.models import Booking
+from order.models import Order
 from .models import Table
 
-import json
+
+# The distance between the tables placed on a grid of five per row, for the
+# tables without a position on the floor plan
+GRID_SPACING = 100
 
 
 def sendTotalTables(request):
@@ -20,4 +28,75 @@ def sendTotalTables(request):
 
         data["tables"] = sorted(data["tables"])
 
-    return HttpResponse(json.dumps(data), content_type="application/json")
\ No newline at end of file
+    return encodeResponse(request, data)
+
+
+def sendFloorPlan(request):
+    """
+    Sends the tables of the floor plan along with their state, in the form:
+
+    {"tables": [{"number": number,
+                 "size": number,
+                 "x": number,
+                 "y": number,
+                 "section": string,
+                 "isOccupied": boolean,
+                 "isBooked": boolean}, ...]}.
+
+    A table is occupied while it has unpaid orders, and booked when it has a
+    booking today. The tables without a position are placed on a grid below
+    the others.
+
+    The "tables" query parameter restricts the floor plan to a comma
+    separated list of table numbers, so that the client refreshes only the
+    state of the tables an event is about (the tables without a position are
+    then left unplaced).
+
+    :param request: A django request object.
+    :return: An HTTP response object containing the floor plan.
+    """
+    if request.method == "GET":
+        openOrders = Order.objects.filter(table=OuterRef("pk"),
+                                          isHistory=False)
+        bookings = Booking.objects.filter(table=OuterRef("pk"),
+                                          date=timezone.localdate())
+        tables = (Table.objects.annotate(isOccupied=Exists(openOrders),
+                                         isBooked=Exists(bookings))
+                               .order_by("number"))
+
+        isPartial = "tables" in request.GET
+        if isPartial:
+            try:
+                numbers = [int(number) for number
+                           in request.GET["tables"].split(",") if number]
+            except ValueError:
+                return HttpResponseBadRequest("The tables must be numbers.")
+            tables = tables.filter(number__in=numbers)
+
+        floorPlan = [{"number": table.number,
+                      "size": table.size,
+                      "x": table.x,
+                      "y": table.y,
+                      "section": table.section,
+                      "isOccupied": table.isOccupied,
+                      "isBooked": table.isBooked} for table in tables]
+        if not isPartial:
+            _placeTables(floorPlan)
+        return encodeResponse(request, {"tables": floorPlan})
+
+
+def _placeTables(floorPlan):
+    """
+    Places the tables without a position on a grid of five per row, below
+    the placed tables, in place.
+
+    :param floorPlan: A list of the table dictionaries of the floor plan.
+    """
+    bottom = max([table["y"] for table in floorPlan
+                  if table["y"] is not None], default=-GRID_SPACING)
+    unplaced = [table for table in floorPlan
+                if table["x"] is None or table["y"] is None]
+
+    for i, table in enumerate(unplaced):
+        table["x"] = GRID_SPACING * (i % 5)
+        table["y"] = bottom + GRID_SPACING * (1 + i // 5)
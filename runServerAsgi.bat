@@ -0,0 +1,3 @@
+@echo off
+activate aardvark-venv &&^
+python setup.py runServer --asgi
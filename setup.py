@@ -86,13 +86,17 @@ class RunServerCommand(Command):
     A command class to runs the django server.
     """
     description = "runs django server"
-    user_options = []
+    user_options = [
+        ("asgi", "a", "serves the ASGI entry point with uvicorn instead of "
+                      "the development server"),
+    ]
+    boolean_options = ["asgi"]
 
     def initialize_options(self):
         """
-        Overriding a required abstract method.
+        Sets the default values of the options.
         """
-        pass
+        self.asgi = False
 
     def finalize_options(self):
         """
@@ -102,10 +106,17 @@ class RunServerCommand(Command):
     def run(self):
         """
         Semantically, runs 'python aardvark/server/manage.py runserver'
-        on the command line.
-        """
-        path = os.path.join("aardvark", "server", "manage.py")
-        errno = subprocess.call([sys.executable, path, "runserver"])
+        on the command line, or with --asgi 'uvicorn server.asgi:application'
+        from the server folder.
+        """
+        if self.asgi:
+            errno = subprocess.call([sys.executable, "-m", "uvicorn",
+                                     "server.asgi:application",
+                                     "--host", "127.0.0.1", "--port", "8000"],
+                                    cwd=os.path.join("aardvark", "server"))
+        else:
+            path = os.path.join("aardvark", "server", "manage.py")
+            errno = subprocess.call([sys.executable, path, "runserver"])
         if errno != 0:
             raise SystemExit("Unable to run the django server!")
 
@@ -181,6 +192,92 @@ class ManualTestCommand(test):
             raise SystemExit("Unable to run manual test!")
 
 
+class BenchmarkCommand(Command):
+    """
+    A command class to run the micro-benchmarks.
+    """
+    description = "runs all micro-benchmarks and stores the results"
+    user_options = [
+        ("compare=", "c", "id of stored results to compare against "
+                          "(e.g. 0001), 'last' for the latest run"),
+    ]
+
+    def initialize_options(self):
+        """
+        Sets the default values of the options.
+        """
+        self.compare = None
+
+    def finalize_options(self):
+        """
+        Overriding a required abstract method.
+        """
+        pass
+
+    def run(self):
+        """
+        Runs the benchmarks, storing the results in the .benchmarks folder
+        so that regressions can be compared between commits.
+        """
+        # Not at top level to prevent initial dependency errors
+        import pytest
+
+        args = [os.path.join("test", "benchmark"), "--benchmark-autosave"]
+        if self.compare == "last":
+            args.append("--benchmark-compare")
+        elif self.compare:
+            args.append("--benchmark-compare=" + self.compare)
+
+        errno = pytest.main(args)
+        if errno != 0:
+            raise SystemExit("Unable to run benchmarks or they failed!")
+
+
+class LoadTestCommand(Command):
+    """
+    A command class to simulate a restaurant shift against the server.
+    """
+    description = "runs a load test that simulates a full restaurant shift"
+    user_options = [
+        ("tills=", "t", "amount of concurrent tills (default: 30)"),
+        ("duration=", "d", "length of the shift in seconds (default: 60)"),
+        ("rates=", "r", "actions per till per minute overrides "
+                        "(e.g. order=12,bill=4)"),
+        ("server=", "s", "socket of a running server to target instead of "
+                         "spawning one"),
+    ]
+
+    def initialize_options(self):
+        """
+        Sets the default values of the options.
+        """
+        self.tills = None
+        self.duration = None
+        self.rates = None
+        self.server = None
+
+    def finalize_options(self):
+        """
+        Overriding a required abstract method.
+        """
+        pass
+
+    def run(self):
+        """
+        Semantically, runs 'python test/load/shift.py' on the command line.
+        """
+        args = []
+        for option in ["tills", "duration", "rates", "server"]:
+            if getattr(self, option) is not None:
+                args += ["--" + option, str(getattr(self, option))]
+
+        path = os.path.join("test", "load", "shift.py")
+        env = dict(os.environ, PYTHONPATH=os.getcwd())
+        errno = subprocess.call([sys.executable, path] + args, env=env)
+        if errno != 0:
+            raise SystemExit("Load test failed or exceeded the error rate!")
+
+
 class CleanCommand(Command):
     """
     A command class to clean the current directory (removes folders).
@@ -204,11 +301,12 @@ class CleanCommand(Command):
         """
         Deletes some folders that can be generated (cross-platform).
         """
-        ignoreDirs = ["aardvark", "test", "doc", ".git", ".idea", "asset"]
+        ignoreDirs = ["aardvark", "test", "doc", ".git", ".idea", "asset",
+                      ".benchmarks"]
         ignoreFiles = [".gitignore", ".gitlab-ci.yml", "README.md",
                        "setup.py", "settings.ini", "pytest.ini", "LICENSE",
                        "install.bat", "runClient.bat", "runServer.bat",
-                       "requirements.txt"]
+                       "runServerAsgi.bat", "requirements.txt"]
 
 
         deleteDirs = [dir for dir in os.listdir(".")
@@ -322,7 +420,8 @@ setup(
     packages=find_packages(),
 
     install_requires=['requests', 'Sphinx', 'Django',
-                      'pytest', "model_mommy"],
+                      'pytest', "model_mommy", "pytest-benchmark",
+                      "numpy"],
 
     cmdclass={
         # 'runInstall': InstallInVirtualEnv,
@@ -330,6 +429,8 @@ setup(
         'runServer': RunServerCommand,
         'runTest': PyTestCommand,
         'runManualTest': ManualTestCommand,
+        'runLoadTest': LoadTestCommand,
+        'runBenchmark': BenchmarkCommand,
         'runClean': CleanCommand,
         'generateDoc': GenerateDocCommand,
         'runDoc': RunDocCommand,
@@ -0,0 +1,36 @@
+"""
+The fixtures shared by the micro-benchmarks.
+"""
+
+__docformat__ = 'reStructuredText'
+
+import os
+import sys
+
+import pytest
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                      os.pardir, os.pardir, "aardvark", "server")
+
+
+@pytest.fixture(scope="session")
+def server():
+    """
+    Sets up the server against a test database, torn down at the end of the
+    session.
+    """
+    pytest.importorskip("django")
+    sys.path.insert(0, SERVER)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "server.settings")
+
+    import django
+    from django.db import connection
+    from django.test.utils import (setup_test_environment,
+                                   teardown_test_environment)
+
+    django.setup()
+    setup_test_environment()
+    name = connection.creation.create_test_db(verbosity=0)
+    yield
+    connection.creation.destroy_test_db(name, verbosity=0)
+    teardown_test_environment()
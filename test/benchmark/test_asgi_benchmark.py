@@ -0,0 +1,180 @@
+"""
+A set of micro-benchmarks for the throughput of the server while idle
+connections are held open (the event streams of the tills, or kept alive
+connections).
+
+Every benchmark holds IDLE event streams open and then sends REQUESTS menu
+requests at once, with WORKERS threads handling requests: either served by
+the WSGI handler on a fixed pool of WORKERS threads (as a threaded WSGI
+server does, a connection holding a thread for as long as it is open) as a
+baseline, or by the ASGI handler on an event loop. The amount of requests
+served within WINDOW seconds is kept in the extra info of the benchmarks.
+"""
+
+__docformat__ = 'reStructuredText'
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("django")
+
+# The amount of threads handling requests
+WORKERS = 8
+
+# The amounts of idle connections: none, as many as the threads and many
+IDLE = [0, WORKERS, 8 * WORKERS]
+
+# The amount of requests sent at once, and the seconds they are waited for
+REQUESTS = 200
+WINDOW = 3
+
+STREAM = {"type": "http", "method": "GET", "path": "/events/stream",
+          "query_string": b"", "server": ("testserver", 80), "headers": []}
+MENU = {"type": "http", "method": "GET", "path": "/menu/get",
+        "query_string": b"", "server": ("testserver", 80),
+        "headers": [(b"accept", b"application/json")]}
+
+
+@pytest.fixture(scope="module")
+def application(server):
+    """
+    Fills the test database with a menu (replacing the menu of the other
+    benchmarks) and sets the heartbeats of the event streams to every 50ms,
+    both undone afterwards.
+
+    :return: The WSGI handler of the server.
+    """
+    from django.conf import settings
+    from django.core.wsgi import get_wsgi_application
+
+    heartbeat = settings.EVENTS_HEARTBEAT
+    settings.EVENTS_HEARTBEAT = 0.05
+
+    from menu.models import Food
+    Food.objects.all().delete()
+    Food.objects.bulk_create([Food(name="food {}".format(i),
+                                   type="main course",
+                                   description="rather squary...",
+                                   price="5.00") for i in range(100)])
+
+    yield get_wsgi_application()
+    settings.EVENTS_HEARTBEAT = heartbeat
+    Food.objects.all().delete()
+
+
+def serveThreaded(application, idle):
+    """
+    Serves the requests with the WSGI handler on a fixed pool of threads,
+    the idle streams holding a thread each until the requests are served
+    (or WINDOW seconds passed).
+
+    :param application: The WSGI handler.
+    :param idle: The amount of idle connections.
+    :return: The amount of requests served.
+    """
+    from server.asgihandler import buildEnviron
+
+    executor = ThreadPoolExecutor(WORKERS)
+    isDone = threading.Event()
+
+    def holdStream():
+        response = application(buildEnviron(STREAM, b""), lambda *args: None)
+        try:
+            for chunk in response:
+                if isDone.is_set():
+                    break
+        finally:
+            response.close()
+
+    def request():
+        response = application(buildEnviron(MENU, b""), lambda *args: None)
+        try:
+            return b"".join(response)
+        finally:
+            response.close()
+
+    for i in range(idle):
+        executor.submit(holdStream)
+    requests = [executor.submit(request) for i in range(REQUESTS)]
+    served, pending = wait(requests, timeout=WINDOW)
+
+    isDone.set()
+    for future in pending:
+        future.cancel()
+    executor.shutdown(wait=True)
+    return len(served)
+
+
+def serveAsgi(application, idle):
+    """
+    Serves the requests with the ASGI handler, the idle streams being held
+    by the event loop.
+
+    :param application: The WSGI handler.
+    :param idle: The amount of idle connections.
+    :return: The amount of requests served.
+    """
+    from server.asgihandler import AsgiHandler
+
+    handler = AsgiHandler(application, threads=WORKERS)
+    loop = asyncio.new_event_loop()
+
+    async def send(message):
+        pass
+
+    async def serve():
+        isDone = asyncio.Event()
+
+        def connect():
+            messages = [{"type": "http.request", "body": b""}]
+
+            async def receive():
+                if messages:
+                    return messages.pop(0)
+                await isDone.wait()
+                return {"type": "http.disconnect"}
+            return receive
+
+        streams = [asyncio.ensure_future(handler(STREAM, connect(), send))
+                   for i in range(idle)]
+        await asyncio.sleep(0)
+
+        requests = [asyncio.ensure_future(handler(MENU, connect(), send))
+                    for i in range(REQUESTS)]
+        served, pending = await asyncio.wait(requests, timeout=WINDOW)
+
+        isDone.set()
+        for future in pending:
+            future.cancel()
+        if streams:
+            await asyncio.wait(streams)
+        return len(served)
+
+    try:
+        return loop.run_until_complete(serve())
+    finally:
+        loop.close()
+        handler.executor.shutdown(wait=True)
+
+
+@pytest.mark.parametrize("idle", IDLE, ids=lambda idle: "idle{}".format(idle))
+@pytest.mark.parametrize("isAsgi", [False, True], ids=["threaded", "asgi"])
+def testServeWhileIdle(benchmark, application, isAsgi, idle):
+    """
+    Benchmarks serving menu requests while idle connections are open.
+    """
+    serve = serveAsgi if isAsgi else serveThreaded
+    started = time.perf_counter()
+    served = benchmark.pedantic(serve, args=(application, idle), rounds=1,
+                                iterations=1)
+    elapsed = time.perf_counter() - started
+
+    benchmark.extra_info["served"] = served
+    benchmark.extra_info["throughput"] = round(served / elapsed, 1)
+    if isAsgi or idle < WORKERS:
+        assert served == REQUESTS
@@ -0,0 +1,97 @@
+"""
+A set of micro-benchmarks comparing the Json and MessagePack wire formats
+of the responses sent by the server.
+
+Every benchmark measures the encoding (done by the server) or the decoding
+(done by the client) of the menu, bill and availability responses, and
+records the payload size in the benchmark's extra info.
+"""
+
+__docformat__ = 'reStructuredText'
+
+import json
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+msgpack = pytest.importorskip("msgpack")
+
+from aardvark.client.model import Client, JSON, MSGPACK
+
+from test_model_benchmark import (
+    MENU_SIZES, createJsonMenu, createCompactMenu, MenuResponse
+)
+
+
+def createPayloads(menuSize):
+    """
+    Creates the decoded responses of the server, shaped like the data the
+    views encode (decimals are already sent as strings).
+
+    :param menuSize: The amount of food items on the menu.
+    :return: A dictionary that maps response name to its data.
+    """
+    return {"menu": createJsonMenu(menuSize),
+            "compactMenu": createCompactMenu(menuSize),
+            "bill": {"bill": "123.45"},
+            "availability": {"tables": list(range(1, menuSize + 1))}}
+
+
+# Encoders equivalent to the server's codecs
+ENCODERS = {"json": lambda data: json.dumps(data).encode("utf-8"),
+            "msgpack": lambda data: msgpack.packb(data, use_bin_type=True)}
+DECODERS = {"json": JSON, "msgpack": MSGPACK}
+
+PAYLOADS = ["menu", "compactMenu", "bill", "availability"]
+
+
+@pytest.fixture(params=MENU_SIZES, ids=lambda size: "menu{}".format(size))
+def payloads(request):
+    """
+    The decoded responses of the server.
+    """
+    return createPayloads(request.param)
+
+
+@pytest.mark.parametrize("payload", PAYLOADS)
+@pytest.mark.parametrize("format", sorted(ENCODERS))
+def testEncode(benchmark, payloads, payload, format):
+    """
+    Benchmarks encoding a response and records its size.
+    """
+    encode = ENCODERS[format]
+    content = benchmark(encode, payloads[payload])
+    benchmark.extra_info["payloadSize"] = len(content)
+
+
+@pytest.mark.parametrize("payload", PAYLOADS)
+@pytest.mark.parametrize("format", sorted(DECODERS))
+def testDecode(benchmark, payloads, payload, format):
+    """
+    Benchmarks decoding a whole response with the client's codecs.
+    """
+    data = payloads[payload]
+    content = ENCODERS[format](data)
+    benchmark.extra_info["payloadSize"] = len(content)
+
+    assert benchmark(DECODERS[format].decode, content) == data
+
+
+@pytest.mark.parametrize("format", sorted(DECODERS))
+def testStreamCompactMenu(benchmark, payloads, format):
+    """
+    Benchmarks loading the compact menu streamed by requestMenu.
+    """
+    codec = DECODERS[format]
+    response = MenuResponse(ENCODERS[format](payloads["compactMenu"]),
+                            codec.contentType)
+
+    class Session:
+        def get(self, url, *args, **kwargs):
+            return response
+
+    client = Client(session=Session())
+    benchmark.extra_info["payloadSize"] = len(response.content)
+
+    menu = benchmark(client.requestMenu)
+    assert len(menu.items) == len(payloads["compactMenu"])
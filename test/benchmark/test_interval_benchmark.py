@@ -0,0 +1,147 @@
+"""
+A set of micro-benchmarks for finding whether tables are free over a window
+among a year of bookings.
+
+Every benchmark answers the same windows, either by scanning the bookings of
+the tables (as a baseline) or with the interval index. The bookings are
+those of TABLES tables at every slot of every day of a year, with some
+bookings held longer than their slot.
+"""
+
+__docformat__ = 'reStructuredText'
+
+import datetime
+import random
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("django")
+
+# The amount of tables booked
+TABLES = 100
+
+# The slots of a day, the durations of the bookings and how often a table is
+# booked at a slot
+SLOTS = [datetime.time(hour, 0) for hour in (9, 11, 13, 15, 18, 20)]
+DURATIONS = [90, 120, 120, 120, 150, 180]
+OCCUPANCY = 0.7
+
+# The amount of windows looked up per benchmark
+WINDOWS = 1000
+
+
+@pytest.fixture(scope="module")
+def intervals(server):
+    """
+    Gets the intervals module of the server.
+    """
+    from booking import intervals
+    return intervals
+
+
+@pytest.fixture(scope="module")
+def year(intervals):
+    """
+    Creates a year of bookings, skipping the slots still held by the
+    previous booking of the table, and random windows of a slot.
+
+    :return: A <list of <table, start, end> tuples, list of <start, end>
+             windows> tuple.
+    """
+    generator = random.Random(0)
+    first = datetime.date(2030, 1, 1)
+
+    bookings = []
+    for table in range(TABLES):
+        heldUntil = datetime.datetime.min
+        for day in range(365):
+            for time in SLOTS:
+                start, end = intervals.getInterval(
+                    first + datetime.timedelta(day), time,
+                    generator.choice(DURATIONS))
+                if start >= heldUntil and generator.random() < OCCUPANCY:
+                    bookings.append((table, start, end))
+                    heldUntil = end
+
+    windows = [intervals.getInterval(
+                   first + datetime.timedelta(generator.randrange(365)),
+                   generator.choice(SLOTS), 120)
+               for i in range(WINDOWS)]
+    return bookings, windows
+
+
+class ScanIndex:
+    """
+    Finds whether a table is free by scanning all of its bookings.
+    """
+
+    def __init__(self, bookings):
+        """
+        :param bookings: A list of <table, start, end> tuples.
+        """
+        self.tableToIntervals = {}
+        for table, start, end in bookings:
+            self.tableToIntervals.setdefault(table, []).append((start, end))
+
+    def isFree(self, table, start, end):
+        """
+        :return: Whether no booking of the table overlaps the window.
+        """
+        return all(bookingEnd <= start or end <= bookingStart
+                   for bookingStart, bookingEnd
+                   in self.tableToIntervals.get(table, ()))
+
+    def getFreeTables(self, tables, start, end):
+        """
+        :return: A list of the tables free over the window.
+        """
+        return [table for table in tables if self.isFree(table, start, end)]
+
+
+def testBuildIndex(benchmark, intervals, year):
+    """
+    Benchmarks indexing a year of bookings.
+    """
+    bookings, windows = year
+    benchmark.extra_info["bookings"] = len(bookings)
+    benchmark(intervals.IntervalIndex, bookings)
+
+
+@pytest.mark.parametrize("isIndexed", [False, True],
+                         ids=["baseline", "indexed"])
+def testIsFree(benchmark, intervals, year, isIndexed):
+    """
+    Benchmarks finding whether a table is free over every window.
+    """
+    bookings, windows = year
+    index = (intervals.IntervalIndex if isIndexed else ScanIndex)(bookings)
+    expected = ScanIndex(bookings)
+    tables = [i % TABLES for i in range(WINDOWS)]
+
+    def isFree():
+        return [index.isFree(table, start, end)
+                for table, (start, end) in zip(tables, windows)]
+
+    result = benchmark(isFree)
+    assert result == [expected.isFree(table, start, end)
+                      for table, (start, end) in zip(tables, windows)]
+
+
+@pytest.mark.parametrize("isIndexed", [False, True],
+                         ids=["baseline", "indexed"])
+def testGetFreeTables(benchmark, intervals, year, isIndexed):
+    """
+    Benchmarks finding the tables free over the first hundred windows.
+    """
+    bookings, windows = year
+    index = (intervals.IntervalIndex if isIndexed else ScanIndex)(bookings)
+    tables = range(TABLES)
+
+    def getFreeTables():
+        return [index.getFreeTables(tables, start, end)
+                for start, end in windows[:100]]
+
+    freeTables = benchmark(getFreeTables)
+    benchmark.extra_info["free"] = sum(map(len, freeTables))
+    assert 0 < benchmark.extra_info["free"] < 100 * TABLES
@@ -0,0 +1,128 @@
+"""
+A set of micro-benchmarks for the bulk imports of the server.
+
+The server is set up against a throwaway test database. The menu benchmarks
+load a CSV menu at a realistic size and at an extreme size (10k rows), both
+into an empty menu (inserts) and over itself (updates). The booking
+benchmarks load the bookings of an event at a realistic size and at an
+extreme size (5k rows), compared to booking them one at a time as before.
+"""
+
+__docformat__ = 'reStructuredText'
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("django")
+
+from test_model_benchmark import MENU_SIZES, createFoodData
+
+# Amount of bookings loaded at once: realistic and extreme
+BOOKING_SIZES = [100, 5000]
+
+# Amount of tables the bookings are spread over
+TABLES = 250
+
+TIMES = ["09:00", "11:00", "13:00", "15:00"]
+
+
+def createCsvMenu(size):
+    """
+    Creates the lines of a CSV menu in the form load_menu expects.
+
+    :param size: The amount of food items.
+    :return: A list of "name; type; description; price" lines.
+    """
+    return ["{}; {}; {}; {:.2f}\n".format(*data)
+            for data in createFoodData(size)]
+
+
+@pytest.mark.parametrize("isUpdate", [False, True],
+                         ids=["insert", "update"])
+@pytest.mark.parametrize("menuSize", MENU_SIZES,
+                         ids=lambda size: "menu{}".format(size))
+def testLoadMenu(benchmark, server, menuSize, isUpdate):
+    """
+    Benchmarks loading a CSV menu, either into an empty menu or over the
+    same menu with every price changed.
+    """
+    from menu.loader import iterCsvRows, loadMenu
+    from menu.models import Food
+
+    lines = createCsvMenu(menuSize)
+    changedLines = [line.replace(".00\n", ".50\n") for line in lines]
+
+    def setup():
+        Food.objects.all().delete()
+        if isUpdate:
+            loadMenu(iterCsvRows(lines))
+        return (iterCsvRows(changedLines),), {}
+
+    report = benchmark.pedantic(loadMenu, setup=setup, rounds=5)
+    assert report["rejected"] == 0
+    assert report["updated" if isUpdate else "inserted"] == menuSize
+
+
+def createBookingRows(size):
+    """
+    Creates the rows of the bookings of an event in the form load_bookings
+    expects, spread over the tables, times and then days.
+
+    :param size: The amount of bookings.
+    :return: A list of <line number, row> tuples.
+    """
+    rows = []
+    for i in range(size):
+        table, slot = i % TABLES + 1, i // TABLES
+        date = "2030-05-{:02d}".format(slot // len(TIMES) + 1)
+        rows.append((i + 1, ["guest {}".format(i), "guest@bakers.com",
+                             "07472440699", date, TIMES[slot % len(TIMES)],
+                             str(table)]))
+    return rows
+
+
+@pytest.fixture(scope="module")
+def tables(server):
+    """
+    Creates the tables booked by the benchmarks, removed along with their
+    bookings afterwards.
+    """
+    from booking.models import Booking
+    from table.models import Table
+
+    Table.objects.bulk_create([Table(number=number, size=4)
+                               for number in range(1, TABLES + 1)])
+    yield
+    Booking.objects.all().delete()
+    Table.objects.all().delete()
+
+
+@pytest.mark.parametrize("isBatch", [False, True],
+                         ids=["baseline", "batch"])
+@pytest.mark.parametrize("bookingSize", BOOKING_SIZES,
+                         ids=lambda size: "bookings{}".format(size))
+def testLoadBookings(benchmark, tables, bookingSize, isBatch):
+    """
+    Benchmarks loading the bookings of an event, either in one batch or one
+    booking at a time (a table lookup, a reference probe and an insert
+    each).
+    """
+    from booking.loader import loadBookings
+    from booking.models import Booking
+    from table.models import Table
+
+    rows = createBookingRows(bookingSize)
+
+    def bookOneByOne(rows):
+        for line, (name, email, phone, date, time, table) in rows:
+            Booking.objects.create(
+                name=name, email=email, phone=phone, date=date, time=time,
+                table=Table.objects.filter(number=table)[0])
+
+    def setup():
+        Booking.objects.all().delete()
+        return (rows,), {}
+
+    benchmark.pedantic(loadBookings if isBatch else bookOneByOne,
+                       setup=setup, rounds=3)
+    assert Booking.objects.count() == bookingSize
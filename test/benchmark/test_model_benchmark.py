@@ -0,0 +1,257 @@
+"""
+A set of micro-benchmarks for the hot paths of the model module in the
+client package.
+
+Every benchmark runs at a realistic size (a restaurant menu and a table's
+order) and at an extreme size to expose the asymptotic behaviour. Run them
+through 'python setup.py runBenchmark' which stores the results in the
+.benchmarks folder so that they can be compared between commits.
+"""
+
+__docformat__ = 'reStructuredText'
+
+import json
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from aardvark.client.model import Client, Menu, Table, Food
+
+
+TYPES = ["starter", "main course", "dessert", "beverage"]
+
+# Amount of food items on the menu: realistic and extreme
+MENU_SIZES = [50, 10000]
+
+# Amount of distinct food items ordered at once: realistic and extreme
+ORDER_SIZES = [10, 1000]
+
+
+def createFoodData(size):
+    """
+    Creates food data in the form the Food constructor expects.
+
+    :param size: The amount of food items.
+    :return: A list of <name, type, description, price> lists.
+    """
+    return [["food {}".format(i),
+             TYPES[i % len(TYPES)],
+             "description of food {}".format(i),
+             float(1 + i % 20)]
+            for i in range(size)]
+
+
+def createJsonMenu(size):
+    """
+    Creates a menu shaped like the one sent by the server (Django's json
+    serializer format, already decoded).
+
+    :param size: The amount of food items.
+    :return: A list of serialized food dictionaries.
+    """
+    return [{"model": "menu.food",
+             "pk": i,
+             "fields": {"name": name,
+                        "type": type,
+                        "description": description,
+                        "price": "{:.2f}".format(price),
+                        "popularity": 0}}
+            for i, (name, type, description, price)
+            in enumerate(createFoodData(size))]
+
+
+def createCompactMenu(size):
+    """
+    Creates a menu shaped like the compact format sent by the server.
+
+    :param size: The amount of food items.
+    :return: A list of <name, type, description, price> rows.
+    """
+    return [[name, type, description, "{:.2f}".format(price)]
+            for name, type, description, price in createFoodData(size)]
+
+
+class MenuResponse:
+    """
+    A successful response whose body is streamed in chunks.
+    """
+    status_code = 200
+
+    def __init__(self, content, contentType="application/json"):
+        """
+        :param content: The bytes of the response body.
+        :param contentType: The format of the response body.
+        """
+        self.content = content
+        self.headers = {"Content-Type": contentType}
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+
+class MenuSession:
+    """
+    A session that answers every request with the same menu.
+    """
+
+    def __init__(self, jsonMenu):
+        """
+        :param jsonMenu: The menu to be sent (before Json encoding).
+        """
+        self.response = MenuResponse(json.dumps(jsonMenu).encode("utf-8"))
+
+    def get(self, url, *args, **kwargs):
+        return self.response
+
+
+class NullSession:
+    """
+    A session that drops every request, isolating the client's encoding.
+    """
+
+    def post(self, url, *args, **kwargs):
+        return None
+
+    def get(self, url, *args, **kwargs):
+        return None
+
+
+@pytest.fixture(params=MENU_SIZES, ids=lambda size: "menu{}".format(size))
+def menuSize(request):
+    """
+    The amount of food items on the menu.
+    """
+    return request.param
+
+
+@pytest.fixture
+def foodItems(menuSize):
+    """
+    A list of Food objects.
+    """
+    return [Food(data) for data in createFoodData(menuSize)]
+
+
+@pytest.fixture
+def menu(foodItems):
+    """
+    A Menu object of all the food items.
+    """
+    return Menu(foodItems)
+
+
+def testMenuConstruction(benchmark, foodItems):
+    """
+    Benchmarks constructing a menu from food objects.
+    """
+    menu = benchmark(Menu, foodItems)
+    assert len(menu.items) == len(foodItems)
+
+
+def testFindItem(benchmark, menu, menuSize):
+    """
+    Benchmarks looking up a food item on the menu by name.
+    """
+    # The last item is the worst case of a linear search
+    name = "food {}".format(menuSize - 1)
+    food = benchmark(menu.findItem, name)
+    assert food.name == name
+
+
+def testCategorizeFood(benchmark, menu):
+    """
+    Benchmarks separating the menu into food types.
+    """
+    foodType = benchmark(menu.categorizeFood)
+    assert sorted(foodType) == sorted(TYPES)
+
+
+def testTableOrderAndComputeBill(benchmark, menu):
+    """
+    Benchmarks ordering ten items for a table and computing its bill.
+    """
+    names = ["food {}".format(i) for i in range(10)]
+
+    def orderAndComputeBill():
+        table = Table(1, menu)
+        for name in names:
+            table.order(name)
+        return table.computeBill()
+
+    bill = benchmark(orderAndComputeBill)
+    assert bill
+
+
+def testParseJsonMenu(benchmark, menuSize):
+    """
+    Benchmarks parsing the decoded menu sent by the server.
+    """
+    client = Client()
+    jsonMenu = createJsonMenu(menuSize)
+    foodList = benchmark(client._parseJsonMenu, jsonMenu)
+    assert len(foodList) == menuSize
+
+
+@pytest.mark.parametrize("orderSize", ORDER_SIZES,
+                         ids=lambda size: "order{}".format(size))
+def testSubmitOrderEncoding(benchmark, orderSize):
+    """
+    Benchmarks building and encoding the order payload of submitOrder.
+    """
+    client = Client(session=NullSession())
+    orderedItems = {"food {}".format(i): 1 + i % 5 for i in range(orderSize)}
+    benchmark(client.submitOrder, orderedItems, 1)
+
+
+def measurePeakMemory(benchmark, function, *args):
+    """
+    Records the peak memory allocated by a function into the benchmark's
+    extra info (stored along with the timings).
+
+    :param benchmark: The benchmark fixture.
+    :param function: The function to be measured.
+    :param args: The arguments of the function.
+    """
+    tracemalloc.start()
+    function(*args)
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    benchmark.extra_info["peakMemory"] = peak
+
+
+def testLoadMenuDecoded(benchmark, menuSize):
+    """
+    Benchmarks loading the menu by decoding the whole serialized response
+    before parsing it (the previous requestMenu behaviour) as a baseline.
+    """
+    client = Client()
+    content = MenuSession(createJsonMenu(menuSize)).response.content
+
+    def loadMenu():
+        jsonData = json.loads(content.decode("utf-8"))
+        return Menu(client._parseJsonMenu(jsonData))
+
+    measurePeakMemory(benchmark, loadMenu)
+    menu = benchmark(loadMenu)
+    assert len(menu.items) == menuSize
+
+
+@pytest.mark.parametrize("isCompact", [False, True],
+                         ids=["serialized", "compact"])
+def testLoadMenuStreamed(benchmark, menuSize, isCompact):
+    """
+    Benchmarks loading the menu with requestMenu, which streams the
+    response, in both the serialized and the compact format.
+    """
+    if isCompact:
+        session = MenuSession(createCompactMenu(menuSize))
+    else:
+        session = MenuSession(createJsonMenu(menuSize))
+    client = Client(session=session)
+
+    measurePeakMemory(benchmark, client.requestMenu, isCompact)
+    menu = benchmark(client.requestMenu, isCompact)
+    assert len(menu.items) == menuSize
@@ -0,0 +1,102 @@
+"""
+A set of micro-benchmarks for the seating of the parties booked at a slot.
+
+Every benchmark seats a full evening (the parties of every slot) at a floor
+plan of 500 tables, either at the tables of exactly their size (as before)
+as a baseline, or with the seating allocation. The covers seated are kept
+in the extra info of the benchmarks.
+"""
+
+__docformat__ = 'reStructuredText'
+
+import random
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("django")
+
+# The amount of tables of the floor plan
+TABLES = 500
+
+# The amount of slots of an evening
+SLOTS = 4
+
+# The sizes of the tables, and of the parties along with how often they come
+TABLE_SIZES = [2, 4, 4, 6, 8]
+PARTY_SIZES = [1, 2, 2, 2, 3, 4, 4, 5, 6, 7, 9, 12]
+
+
+@pytest.fixture(scope="module")
+def seating(server):
+    """
+    Gets the seating module of the server.
+    """
+    from booking import seating
+    return seating
+
+
+@pytest.fixture(scope="module")
+def evening(seating):
+    """
+    Creates a floor plan of TABLES tables in four sections, and the parties
+    of every slot of an evening (as many guests as the restaurant has
+    seats).
+
+    :return: A <tables, list of the party sizes of every slot> tuple.
+    """
+    from table.models import Table
+
+    generator = random.Random(0)
+    tables = [Table(number=number, size=generator.choice(TABLE_SIZES),
+                    x=100 * (number % 25), y=100 * (number // 25),
+                    section="Section {}".format(number // 125))
+              for number in range(TABLES)]
+    seats = sum(table.size for table in tables)
+
+    slots = []
+    for slot in range(SLOTS):
+        parties = []
+        while sum(parties) < seats:
+            parties.append(generator.choice(PARTY_SIZES))
+        slots.append(parties)
+    return tables, slots
+
+
+def seatExactly(tables, parties):
+    """
+    Seats every party at a free table of exactly its size, as the tables
+    offered for a size used to be.
+
+    :param tables: The free tables.
+    :param parties: A list of the party sizes.
+    :return: A list of the tables of every party.
+    """
+    sizeToTables = {}
+    for table in tables:
+        sizeToTables.setdefault(table.size, []).append(table.number)
+
+    seating = []
+    for size in parties:
+        freeTables = sizeToTables.get(size)
+        seating.append((freeTables.pop(),) if freeTables else ())
+    return seating
+
+
+@pytest.mark.parametrize("isAllocated", [False, True],
+                         ids=["baseline", "allocated"])
+def testSeatEvening(benchmark, seating, evening, isAllocated):
+    """
+    Benchmarks seating the parties of every slot of an evening.
+    """
+    tables, slots = evening
+    seat = seating.allocateSeating if isAllocated else seatExactly
+
+    def seatEvening():
+        return [seat(tables, parties) for parties in slots]
+
+    evenings = benchmark(seatEvening)
+    covers = sum(size for parties, slot in zip(slots, evenings)
+                 for size, seated in zip(parties, slot) if seated)
+    benchmark.extra_info["covers"] = covers
+    assert covers <= SLOTS * sum(table.size for table in tables)
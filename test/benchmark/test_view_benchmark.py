@@ -0,0 +1,184 @@
+"""
+A set of micro-benchmarks for the client views.
+
+The floor plan benchmarks build the vector floor plan of TABLES tables, and
+repaint and zoom it at each level of detail of the tables. The splash screen
+benchmarks compare loading the logo the previous way (decoding it at full
+size and then scaling it) as a baseline against the pre-scaled and cached
+pixmaps, both from a cold cache (decoded at the scaled size) and from a warm
+one. The views are rendered offscreen, and the disk cache of the images is
+kept in a temporary folder.
+"""
+
+__docformat__ = 'reStructuredText'
+
+import os
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("PyQt5")
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPixmap, QPixmapCache, QTransform
+from PyQt5.QtWidgets import QApplication, QLabel
+
+from aardvark.client import view
+from aardvark.client.view import (FloorPlanScene, FloorPlanView, SplashView,
+                                  TableItem, TableListModel, _getRelativePath)
+
+
+LOGO = _getRelativePath('..', '..', 'asset', 'logo.png')
+
+# The amount of tables of the floor plan
+TABLES = 500
+
+# A scale within every level of detail of the tables: plain blocks, their
+# numbers, then their numbers and seats
+DETAILS = {"blocks": TableItem.NUMBER_DETAIL / 2,
+           "numbers": (TableItem.NUMBER_DETAIL + TableItem.SEATS_DETAIL) / 2,
+           "seats": TableItem.SEATS_DETAIL * 1.5}
+
+
+@pytest.fixture(scope="module")
+def app():
+    """
+    The application the widgets are created in.
+    """
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture(autouse=True)
+def assetCache(tmpdir, monkeypatch):
+    """
+    Points the disk cache of the images at an empty temporary folder, so
+    that no benchmark writes to the cache of the user.
+
+    :return: The path to the folder.
+    """
+    def getAssetCachePath(key):
+        return os.path.join(str(tmpdir), key + ".png")
+
+    monkeypatch.setattr(view, "_getAssetCachePath", getAssetCachePath)
+    return str(tmpdir)
+
+
+@pytest.fixture
+def coldCache(assetCache):
+    """
+    Empties the memory cache and the disk cache before every round.
+    """
+    def clear():
+        QPixmapCache.clear()
+        for name in os.listdir(assetCache):
+            os.remove(os.path.join(assetCache, name))
+    return clear
+
+
+def createFloorPlan():
+    """
+    Creates the table dictionaries of a floor plan of TABLES tables, on a
+    grid of 25 tables per row in four sections.
+
+    :return: A list of the table dictionaries.
+    """
+    return [{"number": number,
+             "size": 2 * (1 + number % 4),
+             "x": 100 * (number % 25),
+             "y": 100 * (number // 25),
+             "section": "Section {}".format(number // 125),
+             "isOccupied": number % 3 == 0,
+             "isBooked": number % 5 == 0}
+            for number in range(1, TABLES + 1)]
+
+
+def createFloorPlanView(tables):
+    """
+    Builds the floor plan view of some tables, as the main window does.
+
+    :param tables: A list of the table dictionaries.
+    :return: The FloorPlanView.
+    """
+    floorPlanView = FloorPlanView(FloorPlanScene(TableListModel(tables)))
+    floorPlanView.resize(800, 600)
+    return floorPlanView
+
+
+def testBuildFloorPlan(benchmark, app):
+    """
+    Benchmarks building the floor plan model, scene and view.
+    """
+    tables = createFloorPlan()
+    floorPlanView = benchmark(createFloorPlanView, tables)
+    assert len(floorPlanView.scene().tableItems) == TABLES
+
+
+@pytest.mark.parametrize("detail", sorted(DETAILS))
+def testRepaintFloorPlan(benchmark, app, detail):
+    """
+    Benchmarks repainting the floor plan at a level of detail.
+    """
+    floorPlanView = createFloorPlanView(createFloorPlan())
+    floorPlanView.setTransform(QTransform.fromScale(DETAILS[detail],
+                                                    DETAILS[detail]))
+    assert not benchmark(floorPlanView.grab).isNull()
+
+
+@pytest.mark.parametrize("detail", sorted(DETAILS))
+def testZoomFloorPlan(benchmark, app, detail):
+    """
+    Benchmarks zooming the floor plan in and out by a step of the mouse
+    wheel within a level of detail, repainting it at each step.
+    """
+    floorPlanView = createFloorPlanView(createFloorPlan())
+    scale = DETAILS[detail]
+    steps = [FloorPlanView.ZOOM_STEP, 1]
+
+    def zoom():
+        factor = steps[0]
+        steps.reverse()
+        floorPlanView.setTransform(QTransform.fromScale(scale * factor,
+                                                        scale * factor))
+        return floorPlanView.grab()
+
+    assert not benchmark(zoom).isNull()
+
+
+def testSplashViewBaseline(benchmark, app, monkeypatch):
+    """
+    Benchmarks creating the splash screen with the logo decoded at full size
+    and then scaled, as on every start before.
+    """
+    def createImage(self):
+        pixMap = QPixmap(LOGO).scaled(500, 500, Qt.KeepAspectRatio)
+        image = QLabel()
+        image.setPixmap(pixMap)
+        return image
+
+    monkeypatch.setattr(SplashView, "createImage", createImage)
+    splash = benchmark.pedantic(SplashView, setup=QPixmapCache.clear,
+                                rounds=20)
+    assert splash.grab()
+
+
+def testSplashViewFirstStart(benchmark, app, coldCache):
+    """
+    Benchmarks creating the splash screen with nothing cached.
+    """
+    splash = benchmark.pedantic(SplashView, setup=coldCache, rounds=20)
+    assert splash.grab()
+
+
+def testSplashViewRestart(benchmark, app, coldCache):
+    """
+    Benchmarks creating the splash screen with the logo cached on disk only,
+    as on every start after the first (the memory cache does not outlive the
+    process).
+    """
+    coldCache()
+    SplashView()
+    splash = benchmark.pedantic(SplashView, setup=QPixmapCache.clear,
+                                rounds=20)
+    assert splash.grab()
@@ -0,0 +1,444 @@
+"""
+A load generator that simulates a full restaurant shift against the server.
+
+Every till is a thread driving its own client.model.Client (so the payloads
+are exactly the ones the GUI sends) which performs the shift's actions at
+random, Poisson distributed, intervals: menu fetches, order bursts, bill
+checks, payments and booking searches. Once the shift is over, the
+throughput, latency percentiles and error rate of every endpoint are
+reported.
+
+By default the server is spawned locally on a throwaway copy of the
+database so that the development data is left untouched, e.g.:
+
+    python test/load/shift.py --tills 30 --duration 60
+
+Alternatively an already running server can be targeted with --server.
+"""
+
+__docformat__ = 'reStructuredText'
+
+import argparse
+import bisect
+import itertools
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+import requests
+
+from aardvark.client.model import Client
+
+
+# Actions per till per minute at Friday-night rates
+FRIDAY_NIGHT = {"menu": 0.5,
+                "order": 6.0,
+                "bill": 3.0,
+                "payment": 1.5,
+                "sizes": 1.0,
+                "tables": 1.0}
+
+class RecordingSession(requests.Session):
+    """
+    A requests session that records the latency and outcome of every
+    request it sends into a shared report.
+    """
+
+    def __init__(self, report, urlToEndpoint):
+        """
+        :param report: The Report object that collects the results.
+        :param urlToEndpoint: A dictionary that maps URL to endpoint name.
+        """
+        super().__init__()
+        self.report = report
+        self.urlToEndpoint = urlToEndpoint
+
+    def request(self, method, url, *args, **kwargs):
+        """
+        Sends a request and records how long it took and whether it failed.
+        Connection errors are recorded as failures before being raised.
+        """
+        endpoint = self.urlToEndpoint.get(url, url)
+        start = time.perf_counter()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except requests.RequestException:
+            self.report.record(endpoint, time.perf_counter() - start, False)
+            raise
+
+        isOk = response.status_code == requests.codes.ok
+        self.report.record(endpoint, time.perf_counter() - start, isOk)
+        return response
+
+
+class Report:
+    """
+    Collects the latency and outcome of the requests sent during a shift.
+    """
+
+    def __init__(self):
+        """
+        Creates an empty report.
+        """
+        self.latencies = {}
+        self.errors = {}
+        self.duration = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, latency, isOk):
+        """
+        Records a single request.
+
+        :param endpoint: The name of the endpoint.
+        :param latency: The time taken by the request in seconds.
+        :param isOk: Whether the request succeeded.
+        """
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(latency)
+            self.errors.setdefault(endpoint, 0)
+            if not isOk:
+                self.errors[endpoint] += 1
+
+    def summarize(self):
+        """
+        Computes the statistics of every endpoint.
+
+        :return: A dictionary that maps endpoint name to a dictionary of
+                 its request count, error count, error rate, throughput
+                 (requests per second) and p50, p95 and p99 latencies (ms).
+        """
+        summary = {}
+        for endpoint, latencies in sorted(self.latencies.items()):
+            latencies = sorted(latencies)
+            count = len(latencies)
+            summary[endpoint] = {
+                "requests": count,
+                "errors": self.errors[endpoint],
+                "errorRate": self.errors[endpoint] / count,
+                "throughput": count / self.duration if self.duration else 0,
+                "p50": _percentile(latencies, 50) * 1000,
+                "p95": _percentile(latencies, 95) * 1000,
+                "p99": _percentile(latencies, 99) * 1000}
+        return summary
+
+    def totalErrorRate(self):
+        """
+        :return: The error rate over all the requests.
+        """
+        requestCount = sum(len(latencies)
+                           for latencies in self.latencies.values())
+        if not requestCount:
+            return 0.0
+        return sum(self.errors.values()) / requestCount
+
+    def printReport(self):
+        """
+        Prints the statistics of every endpoint as a table.
+        """
+        headerTemplate = "{:<18}{:>9}{:>8}{:>8}{:>9}{:>9}{:>9}{:>9}"
+        rowTemplate = "{:<18}{:>9}{:>8}{:>7.1%}{:>9.1f}{:>9.1f}{:>9.1f}" \
+                      "{:>9.1f}"
+
+        print(headerTemplate.format("Endpoint", "Requests", "Errors", "Err%",
+                                    "Req/s", "p50 ms", "p95 ms", "p99 ms"))
+        for endpoint, stats in self.summarize().items():
+            print(rowTemplate.format(endpoint, stats["requests"],
+                                     stats["errors"], stats["errorRate"],
+                                     stats["throughput"], stats["p50"],
+                                     stats["p95"], stats["p99"]))
+        print("Total error rate: {:.2%}".format(self.totalErrorRate()))
+
+
+class Till(threading.Thread):
+    """
+    A single till (waiter terminal) working through the shift.
+    """
+
+    def __init__(self, serverSocket, report, rates, tables, slots, deadline,
+                 seed):
+        """
+        :param serverSocket: The server socket (e.g. "127.0.0.1:8000").
+        :param report: The Report object that collects the results.
+        :param rates: A dictionary that maps action to actions per minute.
+        :param tables: The table numbers of the restaurant.
+        :param slots: The slots of every weekday, as sent by the server (see
+                      Client.requestSlots).
+        :param deadline: The time.monotonic() value at which the shift ends.
+        :param seed: The seed of the till's random generator.
+        """
+        super().__init__(daemon=True)
+        self.client = Client(serverSocket)
+        self.client.session = RecordingSession(
+            report, {url: name for name, url in self.client.tableToURL.items()})
+        self.rates = rates
+        self.tables = tables
+        self.slots = slots
+        self.deadline = deadline
+        self.random = random.Random(seed)
+        self.menu = []
+
+    def run(self):
+        """
+        Performs random actions until the end of the shift.
+        """
+        actions = [action for action, rate in self.rates.items() if rate > 0]
+        # The cumulative weights are bisected to pick an action (rather
+        # than random.choices, which needs Python 3.6)
+        cumulativeWeights = list(itertools.accumulate(
+            self.rates[action] for action in actions))
+        actionsPerSecond = cumulativeWeights[-1] / 60 if actions else 0
+
+        self.fetchMenu()
+        while actions:
+            delay = self.random.expovariate(actionsPerSecond)
+            remaining = self.deadline - time.monotonic()
+            time.sleep(max(0, min(delay, remaining)))
+            if delay >= remaining:
+                break
+
+            weight = self.random.random() * cumulativeWeights[-1]
+            action = actions[bisect.bisect_right(cumulativeWeights, weight)]
+            try:
+                getattr(self, "perform" + action.capitalize())()
+            except requests.RequestException:
+                # Already recorded by the session
+                pass
+
+    def fetchMenu(self):
+        """
+        Fetches the menu and remembers the food names that can be ordered.
+        """
+        try:
+            menu = self.client.requestMenu()
+        except requests.RequestException:
+            return
+        self.menu = sorted(food.name for food in menu.items)
+
+    def performMenu(self):
+        self.fetchMenu()
+
+    def performOrder(self):
+        """
+        Submits a burst of one to six items for a random table.
+        """
+        if not self.menu or not self.tables:
+            return
+
+        orderedItems = {}
+        for i in range(self.random.randint(1, 6)):
+            food = self.random.choice(self.menu)
+            orderedItems[food] = orderedItems.get(food, 0) + 1
+
+        self.client.submitOrder(orderedItems, self.random.choice(self.tables))
+
+    def performBill(self):
+        if self.tables:
+            self.client.requestTotalBill(self.random.choice(self.tables))
+
+    def performPayment(self):
+        if self.tables:
+            paid = "{:.2f}".format(self.random.uniform(10, 200))
+            self.client.sendPayment(paid, self.random.choice(self.tables))
+
+    def performSizes(self):
+        slot = self.randomSlot()
+        if slot is not None:
+            self.client.requestAvailableSizes(*slot)
+
+    def performTables(self):
+        slot = self.randomSlot()
+        if slot is not None:
+            size = self.random.randint(2, 6)
+            self.client.requestAvailableTables(slot[0], slot[1], size)
+
+    def randomSlot(self):
+        """
+        :return: A random booking date (within the next month) and time of
+                 one of the slots of its weekday, or None if the server has
+                 no slots.
+        """
+        days = [date.today() + timedelta(days=i) for i in range(31)]
+        days = [day for day in days
+                if day.weekday() < len(self.slots) and
+                self.slots[day.weekday()]]
+        if not days:
+            return None
+
+        bookingDate = self.random.choice(days)
+        slot = self.random.choice(self.slots[bookingDate.weekday()])
+        return bookingDate.isoformat(), slot["time"]
+
+
+def runShift(serverSocket, tills, duration, rates, seed=0):
+    """
+    Simulates a shift against a running server.
+
+    :param serverSocket: The server socket (e.g. "127.0.0.1:8000").
+    :param tills: The amount of tills working concurrently.
+    :param duration: The length of the shift in seconds.
+    :param rates: A dictionary that maps action to actions per minute.
+    :param seed: The seed of the random generators.
+    :return: The Report of the shift.
+    """
+    report = Report()
+    client = Client(serverSocket)
+    tables = client.requestTotalTables() or []
+    # The booking times follow the slot schedule of the server
+    slots = client.requestSlots()
+    deadline = time.monotonic() + duration
+
+    workers = [Till(serverSocket, report, rates, tables, slots, deadline,
+                    seed + i)
+               for i in range(tills)]
+
+    start = time.perf_counter()
+    for till in workers:
+        till.start()
+    for till in workers:
+        till.join()
+    report.duration = time.perf_counter() - start
+    return report
+
+
+def spawnServer(port):
+    """
+    Starts the development server on a copy of the database.
+
+    :param port: The port the server should listen on.
+    :return: A tuple of the server process and the temporary directory
+             holding the database copy.
+    """
+    serverDir = _getRelativePath("..", "..", "aardvark", "server")
+    tempDir = tempfile.mkdtemp(prefix="aardvark-load-")
+    database = os.path.join(tempDir, "db.sqlite3")
+    shutil.copy(os.path.join(serverDir, "db.sqlite3"), database)
+
+    env = dict(os.environ, DJANGO_DB_NAME=database, DJANGO_LOG_LEVEL="ERROR")
+    subprocess.check_call([sys.executable, "manage.py", "migrate", "-v", "0"],
+                          cwd=serverDir, env=env)
+    process = subprocess.Popen([sys.executable, "manage.py", "runserver",
+                                "--noreload", "127.0.0.1:{}".format(port)],
+                               cwd=serverDir, env=env,
+                               stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    _waitForPort(port, process)
+    return process, tempDir
+
+
+def parseRates(text):
+    """
+    Parses action rates overrides of the form "order=12,bill=4".
+
+    :param text: The comma separated overrides.
+    :return: The Friday-night rates updated with the overrides.
+    """
+    rates = dict(FRIDAY_NIGHT)
+    for pair in filter(None, text.split(",")):
+        action, rate = pair.split("=")
+        if action.strip() not in rates:
+            raise argparse.ArgumentTypeError(
+                "Unknown action '{}', expected one of: {}".format(
+                    action, ", ".join(sorted(rates))))
+        rates[action.strip()] = float(rate)
+    return rates
+
+
+def main(args=None):
+    """
+    Main entry point to run the load test.
+
+    :param args: The command line arguments (defaults to sys.argv).
+    :return: The exit code (non-zero if the error rate exceeded the limit).
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tills", type=int, default=30,
+                        help="amount of concurrent tills (default: 30)")
+    parser.add_argument("--duration", type=float, default=60,
+                        help="length of the shift in seconds (default: 60)")
+    parser.add_argument("--rates", type=parseRates, default=FRIDAY_NIGHT,
+                        help="actions per till per minute overrides, e.g. "
+                             "order=12,bill=4 (actions: {})".format(
+                                 ", ".join(sorted(FRIDAY_NIGHT))))
+    parser.add_argument("--server", default=None,
+                        help="socket of a running server to target instead "
+                             "of spawning one (e.g. 127.0.0.1:8000)")
+    parser.add_argument("--port", type=int, default=8765,
+                        help="port of the spawned server (default: 8765)")
+    parser.add_argument("--max-error-rate", type=float, default=0.01,
+                        help="error rate above which the run fails "
+                             "(default: 0.01)")
+    parser.add_argument("--seed", type=int, default=0)
+    options = parser.parse_args(args)
+
+    process = tempDir = None
+    serverSocket = options.server
+    if serverSocket is None:
+        process, tempDir = spawnServer(options.port)
+        serverSocket = "127.0.0.1:{}".format(options.port)
+
+    try:
+        print("Simulating a {:.0f}s shift with {} tills against {}".format(
+            options.duration, options.tills, serverSocket))
+        report = runShift(serverSocket, options.tills, options.duration,
+                          options.rates, options.seed)
+        report.printReport()
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+            shutil.rmtree(tempDir, ignore_errors=True)
+
+    return 0 if report.totalErrorRate() <= options.max_error_rate else 1
+
+
+def _percentile(sortedValues, percent):
+    """
+    :param sortedValues: A non-empty sorted list of values.
+    :param percent: The percentile to compute (0 - 100).
+    :return: The nearest-rank percentile of the values.
+    """
+    rank = max(1, -(-len(sortedValues) * percent // 100))
+    return sortedValues[int(rank) - 1]
+
+
+def _waitForPort(port, process, timeout=30):
+    """
+    Waits until the spawned server accepts connections.
+
+    :param port: The port the server listens on.
+    :param process: The server process.
+    :param timeout: The amount of seconds to wait at most.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The server exited before accepting requests!")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("The server did not start within {}s!".format(timeout))
+
+
+def _getRelativePath(*args):
+    """
+    Gets the relative path to a file.
+    (Cross-platform and cross-script compatible)
+
+    :param *args: The relative path to the desired file from the script that
+    calls this function (comma separated).
+    :return: The absolute path to the desired file.
+    """
+    return os.path.abspath(os.path.join(os.path.dirname(__file__), *args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
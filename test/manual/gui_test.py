@@ -17,8 +17,12 @@ Check Alignment:
 
 ##### 3. Order Tab Screen:
 Check Navigation:
-* First table screen should be able to enter the order screen by pressing any
-button.
+* First table screen should be able to enter the order screen by clicking any
+table on the floor plan or in the list of the tables.
+
+Check Table List:
+* Ensure that choosing a section and a state only lists the tables within the
+section and in the state, and that the list follows the state of the tables.
 * The back button on the order screen should return back to the table screen.
 
 Check Buttons:
@@ -29,8 +33,12 @@ the item.
 
 
 ##### 4. Booking Tab Screen:
-Check Image:
-* Ensure that the image appears to look fine and is not overstretched.
+Check Floor Plan:
+* Ensure that the tables are drawn with their number and amount of seats, in
+green when free, orange when booked and red when occupied.
+* Ensure that scrolling zooms in and out under the mouse, and that dragging
+pans the floor plan.
+* Clicking on a table selects it in the table field.
 
 Check Booking Details Fields:
 * Ensure that the time field has drop down options of time.
@@ -43,8 +51,8 @@ Check Customer Details Fields:
 
 ##### 5. Payment Tab Screen:
 Check Navigation:
-* First table screen should be able to enter the order screen by pressing any
-button.
+* First table screen should be able to enter the order screen by clicking any
+table on the floor plan or in the list of the tables.
 * The back button on the order screen should return back to the table screen.
 
 Check Calculations Fields:
@@ -98,13 +106,29 @@ class GUITest(unittest.TestCase):
                     items.append(mockFood)
 
         self.menu = Menu(items)
-
+        self.floorPlan = [{"number": number,
+                           "size": 2 * (1 + number % 4),
+                           "x": 100 * (number % 5),
+                           "y": 100 * (number // 5),
+                           "section": ("Ground floor" if number < 10
+                                       else "Terrace"),
+                           "isOccupied": number % 3 == 0,
+                           "isBooked": number % 4 == 0}
+                          for number in range(1, 16)]
+        self.slots = [[{"time": time, "duration": 120}
+                       for time in ["09:00", "11:00", "13:00", "15:00"]]
+                      for weekday in range(7)]
+
+    @patch("aardvark.client.model.Client.requestSlots")
+    @patch("aardvark.client.model.Client.requestFloorPlan")
     @patch("aardvark.client.model.Client.requestMenu")
-    def testGUI(self, mockRequest):
+    def testGUI(self, mockRequest, mockFloorPlanRequest, mockSlotsRequest):
         """
         Tests whether the GUI can be ran.
         """
         mockRequest.return_value = self.menu
+        mockFloorPlanRequest.return_value = self.floorPlan
+        mockSlotsRequest.return_value = self.slots
         MainController()
 
 
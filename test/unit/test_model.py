@@ -5,6 +5,7 @@ A set of unit tests for the model module in the client package.
 __docformat__ = 'reStructuredText'
 
 import json
+import threading
 import unittest
 import requests
 from unittest.mock import MagicMock
@@ -13,7 +14,8 @@ from unittest.mock import call
 from datetime import datetime
 
 from aardvark.client.model import (
-    Client, Table, Food, Menu, MenuSet, Reservation, Restaurant
+    AvailabilityCache, Client, Table, Food, Menu, MenuSet, PrefixIndex,
+    Reservation, Restaurant, msgpack
 )
 
 
@@ -113,6 +115,25 @@ class ClientTest(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.content, json.dumps(content))
 
+    def testSubmitOrderWithSession(self):
+        """
+        Tests whether the client sends its requests through the supplied
+        session and submits orders to the server's order update URL.
+        """
+        session = MagicMock()
+        session.post.return_value = MagicMock(status_code=200)
+        client = Client("127.0.0.1:8000", session=session)
+
+        response = client.submitOrder({"banana": 3}, 3)
+        url = session.post.call_args[0][0]
+        data = json.loads(session.post.call_args[1]["data"])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(url, "http://127.0.0.1:8000/order/update")
+        self.assertEqual(data, {"order": [{"food": "banana",
+                                           "quantity": 3,
+                                           "table": 3}]})
+
     @patch("requests.post")
     def testSendBookingDetails(self, mockRequestMethod):
         """
@@ -198,17 +219,15 @@ class ClientTest(unittest.TestCase):
         availableTimes = self.client.requestAvailableTables(date, time, size)
         self.assertEqual(availableTimes, data["tables"])
 
-    @patch("aardvark.client.model.Client._parseJsonMenu")
+    @patch("aardvark.client.model.Client._streamJsonMenu")
     @patch("aardvark.client.model.Menu")
     @patch("requests.get")
-    @patch("json.loads")
-    def testRequestMenu(self, _, mockRequestMethod, mockMenu, mockParse):
+    def testRequestMenu(self, mockRequestMethod, mockMenu, mockParse):
         """
         Tests whether the client can fetch the menu from a mock object
         representing the server.
         """
         response = MagicMock()
-        response.text = self.receivedJsonMenu
         response.status_code = 200
 
         mockRequestMethod.return_value = response
@@ -217,6 +236,8 @@ class ClientTest(unittest.TestCase):
         menuArgs = call([self.mockFood, self.mockFood])
         self.client.requestMenu()
         self.assertEqual(mockMenu.call_args, menuArgs)
+        self.assertEqual(mockRequestMethod.call_args[1]["params"],
+                         {"format": "compact"})
 
         response.status_code = 404
         self.client.requestMenu()
@@ -235,6 +256,181 @@ class ClientTest(unittest.TestCase):
 
         self.assertListEqual(foodList, [self.mockFood, self.mockFood])
 
+    def testStreamJsonMenu(self):
+        """
+        Tests whether a menu in either the compact or the serialized format
+        is parsed into Food objects when split into arbitrary chunks.
+        """
+        compactMenu = [["seaweed", "starter", "salé", "1.50"],
+                       ["sand", "dessert", "crunchy", 2]]
+        serializedMenu = [{"model": "menu.food", "pk": 1,
+                           "fields": {"name": "seaweed", "type": "starter",
+                                      "description": "salé",
+                                      "price": "1.50", "popularity": 0}},
+                          {"model": "menu.food", "pk": 2,
+                           "fields": {"name": "sand", "type": "dessert",
+                                      "description": "crunchy",
+                                      "price": 2, "popularity": 0}}]
+
+        for jsonMenu in [compactMenu, serializedMenu]:
+            data = " {} ".format(json.dumps(jsonMenu)).encode("utf-8")
+            chunks = [data[i:i + 3] for i in range(0, len(data), 3)]
+            foodList = list(self.client._streamJsonMenu(chunks))
+
+            self.assertEqual([food.name for food in foodList],
+                             ["seaweed", "sand"])
+            self.assertEqual([food.price for food in foodList], ["1.50", 2])
+
+    def testStreamJsonMenuTruncated(self):
+        """
+        Tests whether a menu that ends unexpectedly raises an error.
+        """
+        chunks = [b'[["seaweed", "starter", "salty", "1.50"], ["sa']
+
+        with self.assertRaises(ValueError):
+            list(self.client._streamJsonMenu(chunks))
+
+    def testStreamJsonMenuByByte(self):
+        """
+        Tests whether a menu is parsed when split into single bytes, the
+        numbers being split within their fraction and exponent.
+        """
+        data = b'[["seaweed", "starter", "salty", 1.5], ' \
+               b'["sand", "dessert", "crunchy", 12e-1]]'
+        chunks = [data[i:i + 1] for i in range(len(data))]
+        foodList = list(self.client._streamJsonMenu(chunks))
+
+        self.assertEqual([food.name for food in foodList], ["seaweed", "sand"])
+        self.assertEqual([food.price for food in foodList], [1.5, 1.2])
+
+    @unittest.skipIf(msgpack is None, "msgpack is not installed")
+    def testDecodeResponse(self):
+        """
+        Tests whether responses are decoded in the format the server sent
+        them in, falling back to Json.
+        """
+        data = {"bill": "33.15"}
+        response = MagicMock()
+
+        response.headers = {"Content-Type": "application/msgpack"}
+        response.content = msgpack.packb(data)
+        self.assertEqual(self.client._decodeResponse(response), data)
+
+        response.headers = {}
+        response.content = json.dumps(data).encode("utf-8")
+        self.assertEqual(self.client._decodeResponse(response), data)
+
+    def testAcceptHeader(self):
+        """
+        Tests whether the client only asks for MessagePack when it is wanted
+        and installed, and whether it accepts compressed responses.
+        """
+        client = Client(isBinary=False)
+        self.assertEqual(client.headers["Accept"], "application/json")
+        self.assertIn("gzip", client.headers["Accept-Encoding"])
+
+        with patch("aardvark.client.model.msgpack", None):
+            client = Client()
+        self.assertEqual(client.headers["Accept"], "application/json")
+
+    @unittest.skipIf(msgpack is None, "msgpack is not installed")
+    def testStreamMsgPackMenu(self):
+        """
+        Tests whether a menu in MessagePack formatting is parsed into Food
+        objects when split into arbitrary chunks, and whether a truncated
+        menu raises an error.
+        """
+        codec = self.client.codecs[0]
+        data = msgpack.packb([["seaweed", "starter", "salty", "1.50"],
+                              ["sand", "dessert", "crunchy", 2]])
+        chunks = [data[i:i + 3] for i in range(0, len(data), 3)]
+        foodList = list(self.client._streamJsonMenu(chunks, codec))
+
+        self.assertEqual([food.name for food in foodList], ["seaweed", "sand"])
+        self.assertEqual([food.price for food in foodList], ["1.50", 2])
+
+        with self.assertRaises(ValueError):
+            list(self.client._streamJsonMenu([data[:-4]], codec))
+
+    @patch("requests.get")
+    def testRequestPopularity(self, mockRequestMethod):
+        """
+        Tests whether the client can fetch the popularity of the food over
+        a window from a mock object representing the server.
+        """
+        data = {"popularity": {"seaweed": 3}}
+
+        response = MagicMock()
+        response.status_code = 200
+        response.content.decode.return_value = json.dumps(data)
+        mockRequestMethod.return_value = response
+
+        self.assertEqual(self.client.requestPopularity("day"),
+                         data["popularity"])
+        self.assertEqual(mockRequestMethod.call_args[1]["params"],
+                         {"window": "day"})
+
+    @patch("requests.get")
+    def testRequestFloorPlan(self, mockRequestMethod):
+        """
+        Tests whether the client can fetch the state of some tables of the
+        floor plan from a mock object representing the server.
+        """
+        data = {"tables": [{"number": 3, "size": 4, "x": 0, "y": 100,
+                            "section": "Terrace", "isOccupied": True,
+                            "isBooked": False}]}
+
+        response = MagicMock()
+        response.status_code = 200
+        response.content.decode.return_value = json.dumps(data)
+        mockRequestMethod.return_value = response
+
+        self.assertEqual(self.client.requestFloorPlan([3, 5]), data["tables"])
+        self.assertEqual(mockRequestMethod.call_args[1]["params"],
+                         {"tables": "3,5"})
+
+    @patch("requests.get")
+    def testRequestSlots(self, mockRequestMethod):
+        """
+        Tests whether the client can fetch the slot schedule from a mock
+        object representing the server.
+        """
+        data = {"slots": [[{"time": "19:00", "duration": 90}]] + [[]] * 6}
+
+        response = MagicMock()
+        response.status_code = 200
+        response.content.decode.return_value = json.dumps(data)
+        mockRequestMethod.return_value = response
+        self.assertEqual(self.client.requestSlots(), data["slots"])
+
+        response.status_code = 500
+        self.assertEqual(self.client.requestSlots(), [])
+
+    @patch("requests.get")
+    def testStreamEvents(self, mockRequestMethod):
+        """
+        Tests whether the events pushed by a mock object representing the
+        server are parsed, skipping heartbeats.
+        """
+        response = MagicMock()
+        response.status_code = 200
+        response.iter_lines.return_value = [
+            b"retry: 15000", b"",
+            b": heartbeat", b"",
+            b"id: 4", b"event: order-created", b'data: {"table": 2}', b"",
+            b"event: resync", b'data: {"dropped": 3}', b""]
+        mockRequestMethod.return_value = response
+
+        events = list(self.client.streamEvents(["order-created"], 3))
+
+        self.assertEqual(events, [(4, "order-created", {"table": 2}),
+                                  (None, "resync", {"dropped": 3})])
+        self.assertEqual(mockRequestMethod.call_args[1]["params"],
+                         {"types": "order-created"})
+        self.assertEqual(mockRequestMethod.call_args[1]["headers"]
+                         ["Last-Event-ID"], "3")
+        self.assertTrue(response.close.called)
+
     def testParseJsonFood(self):
         """
         Tests whether data about menu in Json formatting can be parsed
@@ -251,21 +447,23 @@ class ClientTest(unittest.TestCase):
         self.assertDictEqual(self.client._convertFoodToJson(self.mockFood),
                              self.jsonFood)
 
-    @patch("requests.post")
-    def testSendMenu(self, requestPostMethod):
+    def testSendMenu(self):
         """
         Tests whether the client can send the menu to a mock object
         representing the server.
         """
-        mockResponse = MagicMock()
-        mockResponse.text = self.receivedJsonMenu
-        requestPostMethod.return_value = mockResponse
+        session = MagicMock()
+        client = Client(session=session)
 
-        response = self.client.sendMenu(self.mockMenu)
+        client.sendMenu(self.mockMenu)
+        data = json.loads(session.post.call_args[1]["data"])
 
-        self.assertTrue(len(response.text) == 2)
-        for foodData in response.text:
-            self.assertDictEqual(foodData["fields"], self.jsonFood)
+        self.assertEqual(session.post.call_args[0][0],
+                         client.tableToURL["sendMenu"])
+        self.assertEqual([foodData["name"] for foodData in data["menu"]],
+                         [food.name for food in self.mockMenu.items])
+        self.assertDictEqual(data["menu"][2], self.client._convertFoodToJson(
+            self.cardboard))
 
     @patch("requests.post")
     def testSendPayment(self, requestPostMethod):
@@ -492,6 +690,39 @@ class MenuTest(unittest.TestCase):
         self.assertTrue(self.bread in sortedType["breakfast"])
         self.assertFalse(self.cardboard in sortedType["breakfast"])
 
+    def testCategorizeFoodByPopularity(self):
+        """
+        Tests whether the most popular food items of each type come first.
+        """
+        self.menu.setPopularity({"bread": 5, "wood": 2})
+        sortedType = self.menu.categorizeFood()
+
+        self.assertEqual(sortedType["breakfast"], [self.bread, self.wood])
+
+    def testSearchItems(self):
+        """
+        Tests whether the food on the menu can be found by a prefix.
+        """
+        self.assertEqual(self.menu.searchItems("BR"), {"bread"})
+        self.assertEqual(self.menu.searchItems("c"), {"cardboard"})
+        self.assertEqual(self.menu.searchItems("x"), set())
+
+    def testSearchRenamedItems(self):
+        """
+        Tests whether the items are searched again once they are replaced
+        or renamed, even when their amount is the same.
+        """
+        self.assertEqual(self.menu.searchItems("br"), {"bread"})
+
+        brick = MagicMock()
+        brick.name = "brick"
+        self.menu.items = [brick, self.wood, self.cardboard]
+        self.assertEqual(self.menu.searchItems("br"), {"brick"})
+
+        self.wood.name = "brie"
+        self.menu.invalidateIndex()
+        self.assertEqual(self.menu.searchItems("br"), {"brick", "brie"})
+
     def testFindItem(self):
         """
         Tests whether a specified food item can be found on the menu.
@@ -506,6 +737,128 @@ class MenuTest(unittest.TestCase):
             self.menu.findItem("salvation")
 
 
+class PrefixIndexTest(unittest.TestCase):
+    """
+    Unit test class for the PrefixIndex class.
+    """
+
+    def setUp(self):
+        """
+        Indexes some food names.
+        """
+        self.index = PrefixIndex(["fish and chips", "chicken wings",
+                                  "chips", "fishcake"])
+
+    def testSearch(self):
+        """
+        Tests whether the names (or their words) starting with a prefix are
+        found, regardless of case and spacing.
+        """
+        self.assertEqual(self.index.search("chi"),
+                         {"fish and chips", "chicken wings", "chips"})
+        self.assertEqual(self.index.search("FISH"),
+                         {"fish and chips", "fishcake"})
+        self.assertEqual(self.index.search("fish  and"), {"fish and chips"})
+        self.assertEqual(self.index.search("wings"), {"chicken wings"})
+        self.assertEqual(self.index.search("z"), set())
+
+    def testSearchEmpty(self):
+        """
+        Tests whether an empty prefix matches every name.
+        """
+        self.assertEqual(self.index.search(" "), self.index.names)
+        self.assertEqual(len(self.index), 4)
+
+
+class AvailabilityCacheTest(unittest.TestCase):
+    """
+    Unit test class for the AvailabilityCache class.
+    """
+
+    def setUp(self):
+        """
+        Creates a cache over a mock client, with a clock that is moved by
+        hand.
+        """
+        self.now = 0
+        self.client = MagicMock()
+        self.client.requestAvailableSizes.return_value = ["2", "4"]
+        self.client.requestAvailableTables.return_value = ["1", "3"]
+        self.cache = AvailabilityCache(self.client, ttl=30,
+                                       clock=lambda: self.now)
+
+    def testLookup(self):
+        """
+        Tests whether the lookups are cached until they expire.
+        """
+        self.assertEqual(self.cache.get("2018-03-01", "13:00"), None)
+        self.assertEqual(self.cache.lookup("2018-03-01", "13:00"), ["2", "4"])
+        self.assertEqual(self.cache.lookup("2018-03-01", "13:00", "4"),
+                         ["1", "3"])
+
+        self.now = 29
+        self.assertEqual(self.cache.get("2018-03-01", "13:00"), ["2", "4"])
+        self.cache.lookup("2018-03-01", "13:00", "4")
+        self.assertEqual(self.client.requestAvailableSizes.call_count, 1)
+        self.assertEqual(self.client.requestAvailableTables.call_count, 1)
+
+        self.now = 30
+        self.assertEqual(self.cache.get("2018-03-01", "13:00"), None)
+        self.cache.lookup("2018-03-01", "13:00")
+        self.assertEqual(self.client.requestAvailableSizes.call_count, 2)
+
+    def testInvalidate(self):
+        """
+        Tests whether invalidating drops the cached lookups, along with the
+        ones being requested.
+        """
+        self.cache.lookup("2018-03-01", "13:00")
+
+        def requestAvailableTables(date, time, size):
+            self.cache.invalidate()
+            return ["1"]
+
+        self.client.requestAvailableTables.side_effect = requestAvailableTables
+        self.assertEqual(self.cache.lookup("2018-03-01", "13:00", "2"), ["1"])
+        self.assertEqual(self.cache.get("2018-03-01", "13:00"), None)
+        self.assertEqual(self.cache.get("2018-03-01", "13:00", "2"), None)
+
+    def testLookupCoalesced(self):
+        """
+        Tests whether concurrent lookups of the same key send one request,
+        and whether failed requests are not cached.
+        """
+        isRequesting = threading.Event()
+        isAnswered = threading.Event()
+
+        def requestAvailableSizes(date, time):
+            isRequesting.set()
+            isAnswered.wait(5)
+            return ["6"]
+
+        self.client.requestAvailableSizes.side_effect = requestAvailableSizes
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            self.cache.lookup("2018-03-01", "13:00"))) for i in range(3)]
+
+        threads[0].start()
+        isRequesting.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        isAnswered.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(results, [["6"]] * 3)
+        self.assertEqual(self.client.requestAvailableSizes.call_count, 1)
+
+        self.client.requestAvailableTables.side_effect = \
+            requests.ConnectionError
+        with self.assertRaises(requests.ConnectionError):
+            self.cache.lookup("2018-03-01", "13:00", "6")
+        self.assertEqual(self.cache.get("2018-03-01", "13:00", "6"), None)
+
+
 class MenuSetTest(unittest.TestCase):
     """
     Unit test class for the MenuSet class.